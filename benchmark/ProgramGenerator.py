@@ -0,0 +1,328 @@
+import random
+from typing import Dict, List, Tuple
+
+# every generated program is valid, deterministic and terminating: divisors are kept in 2..14, array indices are
+# reduced into bounds, every variable is initialized before it is read, loops run a fixed number of times with
+# counters that the loop body never assigns, and a function only calls the one defined before it
+DIVISOR = "({} % 7 + 8)"
+TRIP_COUNT = 3
+ARRAY_LENGTHS = [2, 3]
+
+
+class Scope:
+    """names visible in a block: int, pointer (int *) or array, with the lengths of its dimensions"""
+    names: Dict[str, Tuple[str, Tuple[int, ...]]]
+
+    def __init__(self):
+        self.names = {}
+
+
+class ProgramGenerator:
+    """
+    seeded generator of MiniDecaf programs, scaling along separate axes:
+    functions, expression depth, block nesting, locals per function, loops per function, array dimensions, the
+    number of terms of a flat chain of binary operators in main and the depth of an expression nested in parentheses
+    in main, if any; whatever the axes, a program uses every construct of MiniDecaf.g4
+    """
+    functions: int
+    expression_depth: int
+    nesting: int
+    locals: int
+    loops: int
+    array_dims: int
+    chain_terms: int
+    parentheses: int
+
+    def __init__(self, seed: int, functions: int = 4, expression_depth: int = 3, nesting: int = 2, locals: int = 4,
+                 loops: int = 2, array_dims: int = 2, chain_terms: int = 0, parentheses: int = 0):
+        self.random = random.Random(seed)
+        self.functions = max(functions, 1)
+        self.expression_depth = expression_depth
+        self.nesting = nesting
+        self.locals = max(locals, 1)
+        self.loops = loops
+        self.array_dims = max(array_dims, 1)
+        self.chain_terms = chain_terms
+        self.parentheses = parentheses
+        self.__lines = []
+        self.__scopes = []
+        self.__counters = set()  # loop counters, read only
+        self.__loop_depth = 0
+        self.__name_count = 0
+        self.__hidden = None
+
+    def generate(self) -> str:
+        self.__lines = ["int g0 = 7;", "int g1;", "int *gp;",
+                        f"int garr{self.__lengths_text(self.__array_lengths())};"]
+        global_scope = Scope()
+        global_scope.names = {"g0": ("int", ()), "g1": ("int", ()), "gp": ("pointer", ())}
+        global_scope.names["garr"] = ("array", self.__lengths_of(self.__lines[-1]))
+        self.__scopes = [global_scope]
+        for i in range(self.functions):  # declarations first, definitions then
+            self.__lines.append(f"int f{i}(int a, int b, int *q);")
+        for i in range(self.functions):
+            self.__function(i)
+        self.__main()
+        return "\n".join(self.__lines) + "\n"
+
+    # declarations
+
+    def __array_lengths(self) -> List[int]:
+        return [self.random.choice(ARRAY_LENGTHS) for _ in range(self.array_dims)]
+
+    @staticmethod
+    def __lengths_text(lengths) -> str:
+        return "".join(f"[{length}]" for length in lengths)
+
+    @staticmethod
+    def __lengths_of(declaration: str) -> Tuple[int, ...]:
+        return tuple(int(part.split(']')[0]) for part in declaration.split('[')[1:])
+
+    def __new_name(self, prefix: str) -> str:
+        self.__name_count += 1
+        return f"{prefix}{self.__name_count}"
+
+    def __declare(self, name: str, kind: str, lengths: Tuple[int, ...] = ()):
+        self.__scopes[-1].names[name] = (kind, lengths)
+
+    def __visible(self, kind: str) -> List[Tuple[str, Tuple[int, ...]]]:
+        names = {}
+        for scope in self.__scopes:
+            names.update(scope.names)
+        return [(name, lengths) for name, (name_kind, lengths) in sorted(names.items())
+                if name_kind == kind and name != self.__hidden]
+
+    def __emit(self, indent: int, text: str):
+        self.__lines.append("    " * indent + text)
+
+    def __function(self, index: int):
+        self.__name_count = 0
+        self.__emit(0, f"int f{index}(int a, int b, int *q) {{")
+        self.__scopes.append(Scope())
+        for name in ("a", "b"):
+            self.__declare(name, "int")
+        self.__declare("q", "pointer")
+        for _ in range(self.locals):
+            name = self.__new_name("v")
+            self.__emit(1, f"int {name} = {self.__expression(self.expression_depth)};")
+            self.__declare(name, "int")
+        first_local = "v1"
+        self.__emit(1, f"int *p = &{first_local};")
+        self.__emit(1, "int **pp = &p;")
+        self.__declare("p", "pointer")
+        self.__emit(1, f"**pp = *p + {self.random.randrange(10)};")
+        lengths = self.__array_lengths()
+        self.__emit(1, f"int arr{self.__lengths_text(lengths)};")
+        self.__fill_array("arr", lengths, 1)
+        self.__declare("arr", "array", tuple(lengths))
+        if index > 0:
+            self.__emit(1, f"{first_local} = {first_local} + f{index - 1}({self.__expression(1)}, b, &{first_local});")
+        else:
+            self.__emit(1, f"*q = *q + {first_local};")
+        for _ in range(self.loops):
+            self.__loop(1, self.nesting)
+        self.__nested(1, self.nesting)
+        self.__emit(1, f"return {self.__expression(self.expression_depth)};")
+        self.__scopes.pop()
+        self.__emit(0, "}")
+
+    def __fill_array(self, name: str, lengths: List[int], indent: int):
+        # a loop nest writing every element, so that no element is read uninitialized
+        counters = []
+        for i, length in enumerate(lengths):
+            counter = self.__new_name("i")
+            counters.append(counter)
+            self.__emit(indent + i, f"for (int {counter} = 0; {counter} < {length}; {counter} = {counter} + 1)")
+        value = " + ".join(counters)
+        self.__emit(indent + len(lengths), f"{name}{''.join(f'[{c}]' for c in counters)} = {value} * a;")
+
+    def __main(self):
+        self.__name_count = 0
+        self.__emit(0, "int main() {")
+        self.__emit(1, "gp = &g0;")
+        self.__emit(1, "int x = 1;")
+        self.__emit(1, f"int r = f{self.functions - 1}(3, 4, &x);")
+        if self.chain_terms:
+            self.__emit(1, f"r = r + ({self.__chain()});")
+        if self.parentheses:
+            self.__emit(1, f"r = r + {self.__parenthesized()};")
+        self.__emit(1, "return ((r + x + *gp) % 256 + 256) % 256;")
+        self.__emit(0, "}")
+
+    # statements
+
+    def __block(self, indent: int, nesting: int, prologue: List[str] = ()):
+        # { declarations and statements }, the prologue of loops is written first
+        self.__scopes.append(Scope())
+        for line in prologue:
+            self.__emit(indent + 1, line)
+        if self.random.random() < 0.5:  # shadows a name of an enclosing block, if there is one
+            outer = [name for name, _ in self.__visible("int") if name.startswith("v")]
+            name = self.random.choice(outer) if outer else self.__new_name("v")
+            self.__hidden = name  # its scope starts at its declarator, so that the initializer cannot read it
+            self.__emit(indent + 1, f"int {name} = {self.__expression(self.expression_depth)};")
+            self.__hidden = None
+            self.__declare(name, "int")
+        for _ in range(2):
+            self.__simple_statement(indent + 1)
+        if self.__loop_depth > 0:
+            self.__emit(indent + 1, f"if ({self.__expression(1)}) {self.random.choice(['break', 'continue'])};")
+        if nesting > 0:
+            self.__nested(indent + 1, nesting)
+        self.__scopes.pop()
+        self.__emit(indent, "}")
+
+    def __nested(self, indent: int, nesting: int):
+        # a compound statement holding nesting - 1 more levels
+        if nesting <= 0:
+            self.__simple_statement(indent)
+            return
+        kind = self.random.choice(["if", "else", "block"])
+        if kind == "block":
+            self.__emit(indent, "{")
+            self.__block(indent, nesting - 1)
+        elif kind == "if":
+            self.__emit(indent, f"if ({self.__expression(self.expression_depth)}) {{")
+            self.__block(indent, nesting - 1)
+        else:
+            self.__emit(indent, f"if ({self.__expression(self.expression_depth)}) {{")
+            self.__block(indent, nesting - 1)
+            self.__emit(indent, "else {")
+            self.__block(indent, 0)  # only one branch goes deeper, or the size would double with each level
+
+    def __loop(self, indent: int, nesting: int):
+        # each kind of loop, running TRIP_COUNT times whatever break and continue do
+        kind = self.random.choice(["for", "for-expression", "for-forever", "while", "do"])
+        counter = self.__new_name("c")
+        self.__counters.add(counter)
+        self.__loop_depth += 1
+        if kind == "for":
+            self.__emit(indent, f"for (int {counter} = 0; {counter} < {TRIP_COUNT}; {counter} = {counter} + 1) {{")
+            self.__scopes.append(Scope())
+            self.__declare(counter, "int")
+            self.__block(indent, nesting)
+            self.__scopes.pop()
+        elif kind == "for-expression":
+            self.__emit(indent, f"int {counter};")
+            self.__declare(counter, "int")
+            self.__emit(indent, f"for ({counter} = 0; {counter} < {TRIP_COUNT}; {counter} = {counter} + 1) {{")
+            self.__block(indent, nesting)
+        else:
+            self.__emit(indent, f"int {counter} = 0;")
+            self.__declare(counter, "int")
+            increment = f"{counter} = {counter} + 1;"
+            if kind == "for-forever":
+                self.__emit(indent, "for (;;) {")
+                self.__block(indent, nesting, prologue=[f"if ({counter} >= {TRIP_COUNT}) break;", increment])
+            elif kind == "while":
+                self.__emit(indent, f"while ({counter} < {TRIP_COUNT}) {{")
+                self.__block(indent, nesting, prologue=[increment])
+            else:
+                self.__emit(indent, "do {")
+                self.__block(indent, nesting, prologue=[increment])
+                self.__lines[-1] += f" while ({counter} < {TRIP_COUNT});"
+        self.__loop_depth -= 1
+
+    def __simple_statement(self, indent: int):
+        kind = self.random.randrange(8)
+        if kind == 0:
+            self.__emit(indent, ";")
+        elif kind == 1:
+            self.__emit(indent, f"{self.__expression(self.expression_depth)};")
+        elif kind == 2:
+            self.__emit(indent, f"{self.__element()} = {self.__expression(self.expression_depth)};")
+        elif kind == 3:
+            self.__emit(indent, f"*{self.__pointer()} = {self.__expression(self.expression_depth)};")
+        else:
+            self.__emit(indent, f"{self.__assignable()} = {self.__expression(self.expression_depth)};")
+
+    def __assignable(self) -> str:
+        names = [name for name, _ in self.__visible("int") if name not in self.__counters]
+        return self.random.choice(names)
+
+    def __pointer(self) -> str:  # all pointers point to an int when functions run
+        return self.random.choice(self.__visible("pointer"))[0]
+
+    def __element(self) -> str:
+        name, lengths = self.random.choice(self.__visible("array"))
+        return name + "".join(f"[{self.__index(length)}]" for length in lengths)
+
+    def __index(self, length: int) -> str:
+        if self.random.random() < 0.5:
+            return str(self.random.randrange(length))
+        return f"({self.__expression(0)} % {length} + {length}) % {length}"
+
+    # expressions
+
+    def __expression(self, depth: int) -> str:
+        # one operand takes the full depth, the others stay shallow, so that the size grows with the depth linearly
+        if depth <= 0:
+            return self.__leaf()
+        deep = self.__expression(depth - 1)
+        shallow = self.__expression(self.random.randrange(min(depth, 3)))
+        if self.random.random() < 0.5:
+            deep, shallow = shallow, deep
+        kind = self.random.randrange(12)
+        if kind == 0:
+            return f"({deep} {self.random.choice(['+', '-', '*'])} {shallow})"
+        if kind == 1:
+            return f"({deep} {self.random.choice(['/', '%'])} {DIVISOR.format(shallow)})"
+        if kind == 2:
+            return f"({deep} {self.random.choice(['<', '>', '<=', '>=', '==', '!='])} {shallow})"
+        if kind == 3:
+            return f"({deep} {self.random.choice(['&&', '||'])} {shallow})"
+        if kind == 4:
+            return f"({deep} ? {shallow} : {self.__expression(depth - 1)})"
+        if kind == 5:
+            return f"{self.random.choice(['-', '~', '!'])}{deep}"
+        if kind == 6:
+            return f"(int) {deep}"
+        if kind == 7:
+            return f"({self.__assignable()} = {deep})"
+        if kind == 8:
+            return f"({self.__pointer()} {self.random.choice(['==', '!='])} &{self.__assignable()})"
+        if kind == 9:
+            name, lengths = self.random.choice(self.__visible("array"))
+            size = 1
+            for length in lengths:
+                size *= length
+            first = name + "[0]" * len(lengths)
+            return f"(*(&{first} + ({deep} % {size} + {size}) % {size}) + {shallow})"
+        if kind == 10:
+            return f"(*(int *) {self.__pointer()} + {deep})"
+        return f"({deep} + {self.__leaf()})"
+
+    def __chain(self) -> str:
+        # terms joined by left associative operators without parentheses, so that the tree leans as deep as the
+        # chain is long; mostly + and -, some * and comparisons, so that the chains of several rules interleave
+        terms = []
+        for i in range(self.chain_terms):
+            if i:
+                terms.append(self.random.choice(["+", "+", "-", "-", "*", "<", "==", "&&", "||"]))
+            terms.append(self.random.choice(["x", "r", "*gp", "g0", str(self.random.randrange(10))]))
+        return " ".join(terms)
+
+    def __parenthesized(self) -> str:
+        # each pair of parentheses holds the next one as the right operand of an operator, or alone, so that the
+        # tree is as deep as the parentheses are nested and goes down through every rule of expressions at each level
+        text = self.random.choice(["x", "r", "*gp", "g0"])
+        for _ in range(self.parentheses):
+            operator = self.random.choice(["+", "-", "*", "<", "==", "&&", "||", ""])
+            if operator:
+                operand = self.random.choice(["x", "r", "*gp", "g0", str(self.random.randrange(10))])
+                text = f"({operand} {operator} {text})"
+            else:
+                text = f"({text})"
+        return text
+
+    def __leaf(self) -> str:
+        kind = self.random.randrange(6)
+        if kind == 0:
+            return str(self.random.randrange(100))
+        if kind == 1:
+            return self.__element()
+        if kind == 2:
+            return f"*{self.__pointer()}"
+        if kind == 3:
+            return f"*&{self.random.choice(self.__visible('int'))[0]}"
+        return self.random.choice(self.__visible("int"))[0]
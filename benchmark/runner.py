@@ -0,0 +1,194 @@
+"""compiler throughput benchmark: compile time, peak memory and output size on generated programs, and the execution
+counts of the output in the built-in simulator, to follow the quality of the generated code
+
+python -m benchmark [--scenario NAME]... [--frontend antlr|fast] [--repeat N] [--save] [--tolerance T]
+each scenario scales one axis of the program generator from the base one; results are compared with those stored in
+baseline.json for the same front end, and the exit status is 1 when a scenario is worse by more than the tolerance
+in a metric of the generated code; time and memory depend on the machine and are only reported
+
+python -m benchmark --linearity [--frontend antlr|fast] [--repeat N]
+compile time of chains of binary operators growing up to 100k terms, whose time per term stays flat when compiling
+takes linear time; the fastest of the repeated compilations of each length counts, and the exit status is 1 when it
+grows more than LINEARITY_TOLERANCE times
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from minidecaf.main import Frontend, compile_file, parse_args as parse_compile_args
+from minidecaf.Profiler import Profiler
+from minidecaf.Simulator import Simulator
+
+from .ProgramGenerator import ProgramGenerator
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASE_SHAPE = {"functions": 4, "expression_depth": 3, "nesting": 2, "locals": 4, "loops": 2, "array_dims": 2}
+# nesting of the parentheses scenario, within what the ANTLR front end parses with the default recursion limit, so
+# that a visitor taking more stack per parenthesis fails the scenario
+PARENTHESES_DEPTH = 48
+# name: seed and the axes changed from the base shape
+SCENARIOS = {
+    "base": (1, {}),
+    "functions": (2, {"functions": 16}),
+    "expression-depth": (3, {"expression_depth": 16, "locals": 12}),
+    "nesting": (4, {"nesting": 10}),
+    "locals": (5, {"locals": 100}),
+    "loops": (6, {"loops": 16}),
+    "array-dims": (7, {"array_dims": 6}),
+    "chain": (8, {"chain_terms": 10000}),
+    "parentheses": (9, {"parentheses": PARENTHESES_DEPTH}),
+}
+CHAIN_TERMS = [25000, 50000, 100000]  # lengths compiled by --linearity, with the seed of the chain scenario
+LINEARITY_TOLERANCE = 1.5
+METRICS = ["seconds", "peak_memory", "output_bytes", "instructions", "loads", "stores", "max_stack_depth"]
+CHECKED_METRICS = ["output_bytes", "instructions", "loads", "stores", "max_stack_depth"]  # the same on any machine
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    parser.add_argument("--scenario", type=str, action="append", choices=list(SCENARIOS),
+                        help="run only these scenarios, all of them by default")
+    parser.add_argument("--frontend", choices=["antlr", "fast"], default="antlr")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="compilations timed per scenario or chain length, the fastest counts")
+    parser.add_argument("--baseline", type=str, default=BASELINE_PATH, help="results to compare with")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline of this front end")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="relative increase of a metric of the generated code over the baseline counted as a "
+                             "regression")
+    parser.add_argument("--sources", type=str, metavar="DIR", help="also keep the generated programs in DIR")
+    parser.add_argument("--linearity", action="store_true",
+                        help="check that compile time grows linearly with the length of operator chains instead")
+    return parser.parse_args()
+
+
+def generate(name: str, **axes) -> str:
+    seed, scenario_axes = SCENARIOS[name]
+    shape = dict(BASE_SHAPE, **scenario_axes)
+    shape.update(axes)
+    return ProgramGenerator(seed, **shape).generate()
+
+
+def measure(source_path: str, output_path: str, frontend: str, repeat: int,
+            frontends: Dict[str, Frontend]) -> Dict[str, float]:
+    # in the same process for every scenario, so that the front end is warm, as in batch mode or the compile server
+    args = parse_compile_args([source_path, output_path, "--frontend", frontend])
+    args.cache = None
+    seconds = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        compile_file(args, source_path, output_path, frontends)
+        seconds.append(time.perf_counter() - start)
+    # tracemalloc slows the compilation down, so memory is measured in a run of its own
+    with Profiler() as profiler:
+        compile_file(args, source_path, output_path, frontends, profiler)
+        peak_memory = profiler.report()["total"]["peak_memory"]
+    with open(output_path) as file:
+        simulator = Simulator(file.read())
+    simulator.run()
+    return {
+        "seconds": min(seconds),
+        "peak_memory": peak_memory,
+        "output_bytes": os.path.getsize(output_path),
+        "instructions": simulator.instructions,
+        "loads": simulator.loads,
+        "stores": simulator.stores,
+        "max_stack_depth": simulator.max_stack_depth,
+    }
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(result: dict, expected: Optional[dict], tolerance: float) -> List[str]:
+    # regressed metrics
+    if expected is None or expected["source"] != result["source"]:  # new scenario, or the generator changed
+        return []
+    return [metric for metric in CHECKED_METRICS
+            if metric in expected and result[metric] > expected[metric] * (1 + tolerance)]
+
+
+def ratio_text(result: dict, expected: Optional[dict]) -> str:
+    if expected is None:
+        return "no baseline"
+    if expected["source"] != result["source"]:
+        return "program changed since the baseline"
+    return "  ".join(f"{metric} x{result[metric] / expected[metric]:.2f}" if expected.get(metric) else f"{metric} -"
+                     for metric in METRICS)
+
+
+def linearity(frontend: str, repeat: int) -> bool:
+    # whether the time per term of the longest chain stays within LINEARITY_TOLERANCE of that of the shortest
+    frontends: Dict[str, Frontend] = {}
+    per_term = []
+    print(f"{'terms':>8}{'source B':>10}{'seconds':>10}{'us/term':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        source_path, output_path = os.path.join(directory, "chain.c"), os.path.join(directory, "chain.s")
+        args = parse_compile_args([source_path, output_path, "--frontend", frontend])
+        args.cache = None
+        for terms in CHAIN_TERMS:
+            source = generate("chain", chain_terms=terms)
+            with open(source_path, mode='w') as file:
+                file.write(source)
+            times = []
+            for _ in range(max(repeat, 1)):
+                start = time.perf_counter()
+                compile_file(args, source_path, output_path, frontends)
+                times.append(time.perf_counter() - start)
+            seconds = min(times)
+            per_term.append(seconds / terms)
+            print(f"{terms:>8}{len(source):>10}{seconds:>10.3f}{per_term[-1] * 1e6:>10.1f}")
+    growth = per_term[-1] / per_term[0]
+    print(f"time per term x{growth:.2f} from {CHAIN_TERMS[0]} to {CHAIN_TERMS[-1]} terms")
+    return growth <= LINEARITY_TOLERANCE
+
+
+def main():
+    args = parse_args()
+    if args.linearity:
+        sys.exit(0 if linearity(args.frontend, args.repeat) else 1)
+    names = args.scenario or list(SCENARIOS)
+    baseline = load_baseline(args.baseline)
+    expected_results = baseline.get(args.frontend, {})
+    frontends: Dict[str, Frontend] = {}
+    results = {}
+    regressions = []
+    print(f"{'scenario':<18}{'source B':>10}{'seconds':>10}{'peak KiB':>10}{'output B':>10}{'instrs':>10}"
+          f"{'loads':>8}{'stores':>8}   vs baseline")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            source = generate(name)
+            source_path = os.path.join(args.sources or directory, f"{name}.c")
+            os.makedirs(os.path.dirname(source_path), exist_ok=True)
+            with open(source_path, mode='w') as file:
+                file.write(source)
+            result = {"source": hashlib.sha256(source.encode()).hexdigest()[:16], "source_bytes": len(source)}
+            result.update(measure(source_path, os.path.join(directory, f"{name}.s"), args.frontend, args.repeat,
+                                  frontends))
+            results[name] = result
+            expected = expected_results.get(name)
+            regressed = compare(result, expected, args.tolerance)
+            regressions.extend(f"{name} {metric}" for metric in regressed)
+            print(f"{name:<18}{result['source_bytes']:>10}{result['seconds']:>10.3f}"
+                  f"{result['peak_memory'] / 1024:>10.0f}{result['output_bytes']:>10}{result['instructions']:>10}"
+                  f"{result['loads']:>8}{result['stores']:>8}   {ratio_text(result, expected)}"
+                  + ("  REGRESSED" if regressed else ""))
+    if args.save:
+        baseline[args.frontend] = dict(expected_results, **results)
+        with open(args.baseline, mode='w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"saved as the {args.frontend} baseline in {args.baseline}")
+    if regressions:
+        print(f"regressions over {args.tolerance:.0%}: {', '.join(regressions)}")
+    sys.exit(1 if regressions and not args.save else 0)
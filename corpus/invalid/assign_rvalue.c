@@ -0,0 +1 @@
+int main() { 1 = 2; return 0; }
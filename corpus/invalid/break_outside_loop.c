@@ -0,0 +1 @@
+int main() { break; return 0; }
@@ -0,0 +1 @@
+int main() { int a; int *p = a; return 0; }
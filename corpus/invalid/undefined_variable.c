@@ -0,0 +1 @@
+int main() { return y; }
@@ -0,0 +1,19 @@
+int main() {
+    int a[10];
+    int m[3][4];
+    for (int i = 0; i < 10; i = i + 1)
+        a[i] = i * i;
+    for (int i = 0; i < 3; i = i + 1)
+        for (int j = 0; j < 4; j = j + 1)
+            m[i][j] = i * 4 + j;
+    int *p = &a[2];
+    int s = *(p + 3) + p[1] + m[2][3] + *(&m[1][0] + 2);
+    for (int i = 0; i < 9; i = i + 1)
+        for (int j = 0; j < 9 - i; j = j + 1)
+            if (a[j] < a[j + 1]) {
+                int t = a[j];
+                a[j] = a[j + 1];
+                a[j + 1] = t;
+            }
+    return s + a[0];
+}
@@ -0,0 +1,8 @@
+// folded constants, strength reduction and division by constants
+int main() {
+    int n = 1000;
+    int a = n / 7 + n % 7 + n / -3 + n % -3 + (-n) / 8 + (-n) % 8;
+    int b = n * 16 + n * -4 + n * 0 + (2 + 3) * 4 - 2147483647 / 3;
+    int c = 0 && n / 0;
+    return (a + b + c) % 256;
+}
@@ -0,0 +1,97 @@
+// division and remainder by constants, against div and rem of the same values read from memory, with INT_MIN,
+// negative dividends and divisors, +-1, powers of two and divisors whose magic number needs the add-back step
+int dividends[19];
+int divisors[28];
+int wrong;
+int sum;
+int record(int quotient, int expected_quotient, int rest, int expected_rest) {
+    wrong = wrong + (quotient != expected_quotient) + (rest != expected_rest);
+    sum = (sum * 3 + quotient % 1009 + rest % 1009) % 100003;
+    return 0;
+}
+int main() {
+    int max = 2147483647;
+    int min = -max - 1;
+    dividends[0] = min;
+    dividends[1] = min + 1;
+    dividends[2] = -1000000007;
+    dividends[3] = -65537;
+    dividends[4] = -4097;
+    dividends[5] = -4096;
+    dividends[6] = -100;
+    dividends[7] = -7;
+    dividends[8] = -2;
+    dividends[9] = -1;
+    dividends[10] = 0;
+    dividends[11] = 1;
+    dividends[12] = 6;
+    dividends[13] = 7;
+    dividends[14] = 4096;
+    dividends[15] = 65535;
+    dividends[16] = 1000000007;
+    dividends[17] = max - 1;
+    dividends[18] = max;
+    divisors[0] = 2;
+    divisors[1] = -2;
+    divisors[2] = 4;
+    divisors[3] = -8;
+    divisors[4] = 1024;
+    divisors[5] = 4096;
+    divisors[6] = -4096;
+    divisors[7] = 65536;
+    divisors[8] = min;
+    divisors[9] = 3;
+    divisors[10] = -3;
+    divisors[11] = 5;
+    divisors[12] = -5;
+    divisors[13] = 6;
+    divisors[14] = 7;
+    divisors[15] = -7;
+    divisors[16] = 10;
+    divisors[17] = 11;
+    divisors[18] = 13;
+    divisors[19] = 25;
+    divisors[20] = 641;
+    divisors[21] = 1000;
+    divisors[22] = -1000;
+    divisors[23] = 10007;
+    divisors[24] = max;
+    divisors[25] = -max;
+    divisors[26] = 1;
+    divisors[27] = -1;
+    for (int i = 0; i < 19; i = i + 1) {
+        int n = dividends[i];
+        record(n / 2, n / divisors[0], n % 2, n % divisors[0]);
+        record(n / -2, n / divisors[1], n % -2, n % divisors[1]);
+        record(n / 4, n / divisors[2], n % 4, n % divisors[2]);
+        record(n / -8, n / divisors[3], n % -8, n % divisors[3]);
+        record(n / 1024, n / divisors[4], n % 1024, n % divisors[4]);
+        record(n / 4096, n / divisors[5], n % 4096, n % divisors[5]);
+        record(n / -4096, n / divisors[6], n % -4096, n % divisors[6]);
+        record(n / 65536, n / divisors[7], n % 65536, n % divisors[7]);
+        record(n / (-2147483647 - 1), n / divisors[8], n % (-2147483647 - 1), n % divisors[8]);
+        record(n / 3, n / divisors[9], n % 3, n % divisors[9]);
+        record(n / -3, n / divisors[10], n % -3, n % divisors[10]);
+        record(n / 5, n / divisors[11], n % 5, n % divisors[11]);
+        record(n / -5, n / divisors[12], n % -5, n % divisors[12]);
+        record(n / 6, n / divisors[13], n % 6, n % divisors[13]);
+        record(n / 7, n / divisors[14], n % 7, n % divisors[14]);
+        record(n / -7, n / divisors[15], n % -7, n % divisors[15]);
+        record(n / 10, n / divisors[16], n % 10, n % divisors[16]);
+        record(n / 11, n / divisors[17], n % 11, n % divisors[17]);
+        record(n / 13, n / divisors[18], n % 13, n % divisors[18]);
+        record(n / 25, n / divisors[19], n % 25, n % divisors[19]);
+        record(n / 641, n / divisors[20], n % 641, n % divisors[20]);
+        record(n / 1000, n / divisors[21], n % 1000, n % divisors[21]);
+        record(n / -1000, n / divisors[22], n % -1000, n % divisors[22]);
+        record(n / 10007, n / divisors[23], n % 10007, n % divisors[23]);
+        record(n / 2147483647, n / divisors[24], n % 2147483647, n % divisors[24]);
+        record(n / -2147483647, n / divisors[25], n % -2147483647, n % divisors[25]);
+        record(n / 1, n / divisors[26], n % 1, n % divisors[26]);
+        if (n != min)  // overflows
+            record(n / -1, n / divisors[27], n % -1, n % divisors[27]);
+    }
+    if (wrong)
+        return 255;
+    return (sum % 255 + 255) % 255;
+}
@@ -0,0 +1,13 @@
+// every operator, with precedence, associativity and parentheses
+int main() {
+    int a = 7;
+    int b = -3;
+    int c = ~a + !b - -b;
+    int d = a * b / 2 % 5 + a - b * (a + b);
+    int e = (a < b) + (a > b) + (a <= b) + (a >= b) + (a == b) + (a != b);
+    int f = a && b || !a && (b || 0);
+    int g = a > 0 ? b < 0 ? 1 : 2 : 3;
+    int h;
+    h = d = c = c + 1;
+    return (((c + d) * e + f + g + h) % 256 + 256) % 256;
+}
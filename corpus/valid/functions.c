@@ -0,0 +1,20 @@
+int add(int a, int b);
+int add(int a, int b) {
+    return a + b;
+}
+int many(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+    return a - b + c - d + e - f + g - h + i * j;
+}
+int fact(int n) {
+    if (n <= 1) return 1;
+    return n * fact(n - 1);
+}
+int sum(int n, int acc) {
+    if (n == 0) return acc;
+    return sum(n - 1, acc + n);
+}
+int none() {
+}
+int main() {
+    return add(fact(5), many(1, 2, 3, 4, 5, 6, 7, 8, 9, 10)) + sum(100, 0) % 7 + none();
+}
@@ -0,0 +1,18 @@
+int counter;
+int start = 5;
+int *where;
+int table[4];
+int grid[2][3];
+int bump(int n) {
+    counter = counter + n;
+    return counter;
+}
+int main() {
+    where = &start;
+    *where = *where + 1;
+    bump(start);
+    bump(2);
+    table[3] = counter;
+    grid[1][2] = table[3] * 2;
+    return grid[1][2] + start;
+}
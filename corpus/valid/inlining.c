@@ -0,0 +1,44 @@
+// small helpers called in a loop, inlined at the default budget: several returns, labels of branches and loops
+// inlined more than once into one caller, locals and arrays whose slots are renumbered after the caller's, and
+// arguments beyond the eight passed in registers
+int clamp(int x, int low, int high) {
+    if (x < low)
+        return low;
+    if (x > high)
+        return high;
+    return x;
+}
+int digits(int n) {
+    int count = 1;
+    while (n >= 10) {
+        n = n / 10;
+        count = count + 1;
+    }
+    return count;
+}
+int pick(int a, int b, int k) {
+    int v[2];
+    v[0] = a;
+    v[1] = b;
+    if (k < 0)
+        return v[0] - v[1];
+    return v[k % 2];
+}
+int mix(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+    return a + b * 2 - c + d * 3 - e + f - g * 2 + h + i * j;
+}
+int twice(int x) {
+    return clamp(x * 2, -50, 50);
+}
+int main() {
+    int total = 0;
+    int v[4];
+    for (int i = 0; i < 200; i = i + 1) {
+        int x = i * 37 % 101 - 50;
+        v[i % 4] = x;
+        total = total + clamp(x, -20, 30) + clamp(x * 3, -40, 40) + digits(i * i + 1) + twice(x);
+        total = total + pick(x, i % 7, x) + pick(v[0], v[(i + 1) % 4], i);
+        total = total + mix(i, x, 1, 2, 3, 4, 5, i % 3, x % 5, v[i % 4]) % 100;
+    }
+    return (total % 256 + 256) % 256;
+}
@@ -0,0 +1,17 @@
+int swap(int *a, int *b) {
+    int t = *a;
+    *a = *b;
+    *b = t;
+    return 0;
+}
+int main() {
+    int x = 3;
+    int y = 4;
+    int *p = &x;
+    int **pp = &p;
+    swap(&x, &y);
+    **pp = **pp + 10;
+    int *q = (int *) p;
+    int n = (int) q == (int) p;
+    return x * 10 + y + n + (p == &x) + (p != &y);
+}
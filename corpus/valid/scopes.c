@@ -0,0 +1,17 @@
+int x = 1;
+int main() {
+    int r = x;
+    int x = 2;
+    r = r * 10 + x;
+    {
+        int x = 3;
+        r = r * 10 + x;
+        {
+            x = 4;
+            int x = 5;
+            r = r * 10 + x;
+        }
+        r = r * 10 + x;
+    }
+    return r % 256;
+}
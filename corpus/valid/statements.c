@@ -0,0 +1,26 @@
+/* every statement */
+int main() {
+    int sum = 0;
+    int i;
+    for (i = 0; i < 10; i = i + 1) {
+        if (i % 2 == 0) continue;
+        sum = sum + i;
+    }
+    for (int j = 0; j < 5; j = j + 1)
+        sum = sum + j;
+    for (;;) {
+        if (sum > 40) break;
+        sum = sum + 1;
+    }
+    while (sum < 100) sum = sum * 2;
+    do {
+        sum = sum - 3;
+    } while (sum > 50);
+    {
+        int sum = 1;
+        ;
+        sum;
+    }
+    if (sum == 0) return 1; else if (sum < 0) return 2;
+    return sum;
+}
@@ -0,0 +1,42 @@
+// calls in tail position that must stay calls: with arguments on the stack, which the caller's frame holds, and
+// from functions taking the address of a local, which must outlive the call
+int pong(int a, int b, int c, int d, int e, int f, int g, int h, int i, int n);
+int ping(int a, int b, int c, int d, int e, int f, int g, int h, int i, int n) {
+    if (n == 0)
+        return a + 2 * b + 3 * c + 4 * d + 5 * e + 6 * f + 7 * g + 8 * h + 9 * i;
+    return pong(b, c, d, e, f, g, h, i, a + n, n - 1);
+}
+int pong(int a, int b, int c, int d, int e, int f, int g, int h, int i, int n) {
+    if (n == 0)
+        return a - b + c - d + e - f + g - h + i;
+    return ping(i, a, b, c, d, e, f, g, h + n, n - 1);
+}
+int wide(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) {
+    return a * b - c * d + e * f - g * h + i * j;
+}
+int relay(int x) {
+    return wide(x, x + 1, x + 2, x + 3, x + 4, x + 5, x + 6, x + 7, x + 8, x + 9);
+}
+int clobber(int *p, int n) {
+    int pad[8];
+    if (n < 0)
+        return clobber(p, -n);
+    for (int i = 0; i < 8; i = i + 1)
+        pad[i] = n + i;
+    return *p + pad[n % 8] - n;
+}
+int hold(int n) {
+    int x = n * 3;
+    return clobber(&x, n);
+}
+int walk(int *p, int n) {
+    int x = n;
+    if (n == 0)
+        return *p;
+    return walk(&x, n - 1);
+}
+int main() {
+    int r = ping(1, 2, 3, 4, 5, 6, 7, 8, 9, 41) % 100;
+    r = r + relay(3) % 50 + hold(-7) + hold(5) + walk(&r, 9);
+    return (r % 256 + 256) % 256;
+}
@@ -0,0 +1,42 @@
+// calls in tail position, deep enough that a frame per call shows in the stack depth recorded for make check:
+// self recursion turned into loops, mutual recursion turned into jumps, and is_even inlined into is_odd, whose
+// call to is_odd must stay in tail position to become a loop
+int sum(int n, int acc) {
+    if (n == 0)
+        return acc;
+    return sum(n - 1, acc + n);
+}
+int gcd(int a, int b) {
+    if (b == 0)
+        return a;
+    return gcd(b, a % b);
+}
+int fib(int n, int a, int b) {
+    if (n == 0)
+        return a;
+    return fib(n - 1, b, (a + b) % 1000007);
+}
+int count_down(int n, int steps) {
+    if (n <= 0)
+        return steps;
+    if (n % 2)
+        return count_down(n - 3, steps + 1);
+    return count_down(n - 1, steps + 1);
+}
+int is_odd(int n);
+int is_even(int n) {
+    if (n == 0)
+        return 1;
+    return is_odd(n - 1);
+}
+int is_odd(int n) {
+    if (n == 0)
+        return 0;
+    return is_even(n - 1);
+}
+int main() {
+    int s = sum(60000, 0) % 1000;
+    int g = gcd(1134903170, 701408733) + gcd(462, 1071);
+    int f = fib(50000, 0, 1) % 100;
+    return (s + g + f + count_down(100000, 0) % 50 + is_even(100001) * 2 + is_odd(77777)) % 256;
+}
@@ -0,0 +1,73 @@
+import sys
+import time
+
+import antlr4
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ConsoleErrorListener
+from antlr4.error.Errors import ParseCancellationException
+
+from .Profiler import NO_PROFILER
+from .generated.MiniDecafLexer import MiniDecafLexer
+from .generated.MiniDecafParser import MiniDecafParser
+
+
+class AntlrFrontend:
+    """
+    lexer and parser kept across inputs, so that their prediction caches stay warm
+    parsing first tries the cheaper SLL prediction, and reruns with full LL only when SLL fails; SLL never accepts
+    an invalid program, so the tree is the same, and errors are only reported by the LL run
+    """
+    lexer: MiniDecafLexer
+    parser: MiniDecafParser
+    # instrumentation
+    parse_count: int
+    fallback_count: int  # parses rerun with LL
+    sll_seconds: float
+    ll_seconds: float
+
+    def __init__(self):
+        self.lexer = MiniDecafLexer(None)
+        self.parser = MiniDecafParser(None)
+        self.parser._errHandler = antlr4.BailErrorStrategy()
+        self.parse_count = 0
+        self.fallback_count = 0
+        self.sll_seconds = 0.0
+        self.ll_seconds = 0.0
+
+    def parse(self, path: str, two_stage: bool = True, profiler=NO_PROFILER) -> MiniDecafParser.ProgramContext:
+        with profiler.phase("lex"):
+            self.lexer.inputStream = antlr4.FileStream(path)
+            token_stream = antlr4.CommonTokenStream(self.lexer)
+            if profiler.enabled:  # tokens are otherwise lexed on demand by the parser
+                token_stream.fill()
+        with profiler.phase("parse"):
+            return self.__parse(token_stream, two_stage)
+
+    def __parse(self, token_stream: antlr4.CommonTokenStream, two_stage: bool) -> MiniDecafParser.ProgramContext:
+        self.parser.setTokenStream(token_stream)
+        self.parse_count += 1
+        if two_stage:
+            start = time.perf_counter()
+            self.parser._interp.predictionMode = PredictionMode.SLL
+            self.parser.removeErrorListeners()
+            try:
+                return self.parser.program()
+            except ParseCancellationException:  # a syntax error, or an input that needs full context
+                self.fallback_count += 1
+                token_stream.seek(0)
+                self.parser.reset()
+            finally:
+                self.sll_seconds += time.perf_counter() - start
+                self.parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+        start = time.perf_counter()
+        self.parser._interp.predictionMode = PredictionMode.LL
+        try:
+            return self.parser.program()
+        except ParseCancellationException:  # the error is already printed by the parser
+            raise Exception("syntax error") from None
+        finally:
+            self.ll_seconds += time.perf_counter() - start
+
+    def print_stats(self):
+        print(f"parse: {self.parse_count} parses, {self.fallback_count} fell back to LL, "
+              f"{self.sll_seconds:.3f}s in SLL, {self.ll_seconds:.3f}s in LL", file=sys.stderr)
@@ -0,0 +1,488 @@
+from typing import List, Optional
+
+# syntax tree built by the fast front end
+# nodes answer the same accessors as the ANTLR contexts used by MainVisitor (ctx.expression(), ctx.Identifier(i),
+# ctx.children, ...), so that MainVisitor can visit either tree; chains of single-child rules
+# (expression -> conditional -> ... -> primary) are not materialized, a node is only built where a rule does something
+
+
+def pick(items: list, i: Optional[int]):  # the accessor convention of ANTLR for repeated children
+    return items if i is None else items[i]
+
+
+class Token:
+    __slots__ = ("kind", "text", "position")
+
+    def __init__(self, kind: str, text: str, position: int):
+        self.kind = kind  # Identifier, Integer, EOF, or the text of keywords and punctuation
+        self.text = text
+        self.position = position  # offset in the source
+
+    def getText(self) -> str:
+        return self.text
+
+
+class Node:
+    __slots__ = ()
+
+
+class Program(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def accept(self, visitor):
+        return visitor.visitProgram(self)
+
+
+class Function(Node):
+    __slots__ = ("types", "names")
+
+    def __init__(self, types: List["VarType"], names: List[Token]):
+        self.types = types  # return type, then parameter types
+        self.names = names  # function name, then parameter names
+
+    def varType(self, i=None):
+        return pick(self.types, i)
+
+    def Identifier(self, i=None):
+        return pick(self.names, i)
+
+
+class DefFunc(Function):
+    __slots__ = ("items",)
+
+    def __init__(self, types: List["VarType"], names: List[Token], items: List[Node]):
+        super().__init__(types, names)
+        self.items = items
+
+    def blockItem(self, i=None):
+        return pick(self.items, i)
+
+    def accept(self, visitor):
+        return visitor.visitDefFunc(self)
+
+
+class DeclareFunc(Function):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitDeclareFunc(self)
+
+
+class VarType(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: List[Token]):
+        self.children = children  # int, then one * per pointer level
+
+    def accept(self, visitor):
+        return visitor.visitVarType(self)
+
+
+class Declaration(Node):
+    __slots__ = ("type", "name")
+
+    def __init__(self, var_type: VarType, name: Token):
+        self.type = var_type
+        self.name = name
+
+    def varType(self):
+        return self.type
+
+    def Identifier(self):
+        return self.name
+
+
+class ScalarDeclaration(Declaration):  # int or pointer, with an optional initializer
+    __slots__ = ("init",)
+
+    def __init__(self, var_type: VarType, name: Token, init):
+        super().__init__(var_type, name)
+        self.init = init
+
+
+class ArrayDeclaration(Declaration):
+    __slots__ = ("lengths",)
+
+    def __init__(self, var_type: VarType, name: Token, lengths: List[Token]):
+        super().__init__(var_type, name)
+        self.lengths = lengths
+
+    def Integer(self, i=None):
+        return pick(self.lengths, i)
+
+
+class GlobalIntOrPointer(ScalarDeclaration):
+    __slots__ = ()
+
+    def Integer(self) -> Optional[Token]:
+        return self.init
+
+    def accept(self, visitor):
+        return visitor.visitGlobalIntOrPointer(self)
+
+
+class GlobalArray(ArrayDeclaration):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitGlobalArray(self)
+
+
+class IntOrPointerDecl(ScalarDeclaration):
+    __slots__ = ()
+
+    def expression(self):
+        return self.init
+
+    def accept(self, visitor):
+        return visitor.visitIntOrPointerDecl(self)
+
+
+class ArrayDecl(ArrayDeclaration):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitArrayDecl(self)
+
+
+class RetStatement(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: Node):
+        self.value = value
+
+    def expression(self):
+        return self.value
+
+    def accept(self, visitor):
+        return visitor.visitRetStatement(self)
+
+
+class ExprStatement(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: Optional[Node]):
+        self.value = value
+
+    def expression(self):
+        return self.value
+
+    def accept(self, visitor):
+        return visitor.visitExprStatement(self)
+
+
+class IfStatement(Node):
+    __slots__ = ("condition", "branches")
+
+    def __init__(self, condition: Node, branches: List[Node]):
+        self.condition = condition
+        self.branches = branches  # then, and else if present
+
+    def expression(self):
+        return self.condition
+
+    def statement(self, i=None):
+        return pick(self.branches, i)
+
+    def accept(self, visitor):
+        return visitor.visitIfStatement(self)
+
+
+class BlockStatement(Node):
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Node]):
+        self.items = items
+
+    def blockItem(self, i=None):
+        return pick(self.items, i)
+
+    def accept(self, visitor):
+        return visitor.visitBlockStatement(self)
+
+
+class WhileStatement(Node):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition: Node, body: Node):
+        self.condition = condition
+        self.body = body
+
+    def expression(self):
+        return self.condition
+
+    def statement(self):
+        return self.body
+
+    def accept(self, visitor):
+        return visitor.visitWhileStatement(self)
+
+
+class ForStatement(Node):
+    __slots__ = ("children", "expressions", "init", "body")
+
+    def __init__(self, children: list, expressions: List[Node], init: Optional[IntOrPointerDecl], body: Node):
+        self.children = children  # for ( ... ) statement, with the ; tokens, as MainVisitor finds the parts by them
+        self.expressions = expressions
+        self.init = init
+        self.body = body
+
+    def expression(self, i=None):
+        return pick(self.expressions, i)
+
+    def declaration(self):
+        return self.init
+
+    def statement(self):
+        return self.body
+
+    def accept(self, visitor):
+        return visitor.visitForStatement(self)
+
+
+class DoWhileStatement(WhileStatement):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitDoWhileStatement(self)
+
+
+class BreakStatement(Node):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitBreakStatement(self)
+
+
+class ContinueStatement(Node):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitContinueStatement(self)
+
+
+class Binary(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, lhs: Node, operator: Token, rhs: Node):
+        self.children = [lhs, operator, rhs]
+
+
+class Assignment(Binary):
+    __slots__ = ()
+
+    def unary(self):
+        return self.children[0]
+
+    def expression(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitExpression(self)
+
+
+class LogicalOr(Binary):
+    __slots__ = ()
+
+    def logicalOr(self):
+        return self.children[0]
+
+    def logicalAnd(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitLogicalOr(self)
+
+
+class LogicalAnd(Binary):
+    __slots__ = ()
+
+    def logicalAnd(self):
+        return self.children[0]
+
+    def equality(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitLogicalAnd(self)
+
+
+class Equality(Binary):
+    __slots__ = ()
+
+    def equality(self):
+        return self.children[0]
+
+    def relational(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitEquality(self)
+
+
+class Relational(Binary):
+    __slots__ = ()
+
+    def relational(self):
+        return self.children[0]
+
+    def additive(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitRelational(self)
+
+
+class Additive(Binary):
+    __slots__ = ()
+
+    def additive(self):
+        return self.children[0]
+
+    def multiplicative(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitAdditive(self)
+
+
+class Multiplicative(Binary):
+    __slots__ = ()
+
+    def multiplicative(self):
+        return self.children[0]
+
+    def unary(self):
+        return self.children[2]
+
+    def accept(self, visitor):
+        return visitor.visitMultiplicative(self)
+
+
+class Conditional(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, condition: Node, question: Token, then: Node, colon: Token, otherwise: Node):
+        self.children = [condition, question, then, colon, otherwise]
+
+    def logicalOr(self):
+        return self.children[0]
+
+    def expression(self):
+        return self.children[2]
+
+    def conditional(self):
+        return self.children[4]
+
+    def accept(self, visitor):
+        return visitor.visitConditional(self)
+
+
+class OpUnary(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, operator: Token, operand: Node):
+        self.children = [operator, operand]
+
+    def unary(self):
+        return self.children[1]
+
+    def accept(self, visitor):
+        return visitor.visitOpUnary(self)
+
+
+class CastUnary(Node):
+    __slots__ = ("type", "operand")
+
+    def __init__(self, var_type: VarType, operand: Node):
+        self.type = var_type
+        self.operand = operand
+
+    def varType(self):
+        return self.type
+
+    def unary(self):
+        return self.operand
+
+    def accept(self, visitor):
+        return visitor.visitCastUnary(self)
+
+
+class FuncCallPostfix(Node):
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: Token, args: List[Node]):
+        self.name = name
+        self.args = args
+
+    def Identifier(self):
+        return self.name
+
+    def expression(self, i=None):
+        return pick(self.args, i)
+
+    def accept(self, visitor):
+        return visitor.visitFuncCallPostfix(self)
+
+
+class ArrayPostfix(Node):
+    __slots__ = ("base", "index")
+
+    def __init__(self, base: Node, index: Node):
+        self.base = base
+        self.index = index
+
+    def postfix(self):
+        return self.base
+
+    def expression(self):
+        return self.index
+
+    def accept(self, visitor):
+        return visitor.visitArrayPostfix(self)
+
+
+class NumPrimary(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value: Token):
+        self.value = value
+
+    def Integer(self):
+        return self.value
+
+    def accept(self, visitor):
+        return visitor.visitNumPrimary(self)
+
+
+class ParenthesizedPrimary(Node):
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: Node):
+        self.inner = inner
+
+    def expression(self):
+        return self.inner
+
+    def accept(self, visitor):
+        return visitor.visitParenthesizedPrimary(self)
+
+
+class IdentPrimary(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name: Token):
+        self.name = name
+
+    def Identifier(self):
+        return self.name
+
+    def accept(self, visitor):
+        return visitor.visitIdentPrimary(self)
+
+
+# nodes the grammar derives from unary, the only ones allowed left of =
+UNARY_NODES = (OpUnary, CastUnary, FuncCallPostfix, ArrayPostfix, NumPrimary, ParenthesizedPrimary, IdentPrimary)
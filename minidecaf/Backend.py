@@ -0,0 +1,257 @@
+from typing import List, Optional, Tuple, Union
+
+from .CFG import CFG
+from .Emitter import Emitter
+from .FrameLayout import layout_frame
+from .IR import Function, Instr, Slot, BINARY_OPS, UNARY_OPS, IMMEDIATE_OPS, COMPARE_BRANCH_OPS, NEGATED_BRANCH
+from .Peephole import Peephole
+from .RegAlloc import Allocation, allocate
+from .constants import ARG_REGS
+
+Location = Union[str, Slot]
+
+
+class RiscvBackend:
+    """prints RV32IM assembly for IR functions"""
+    __emitter: Emitter
+    __func: Function
+    __allocation: Allocation
+    __slot_offset: List[int]  # offset of each slot from fp
+    __saved_regs: List[str]  # callee-saved registers used, saved above the outgoing arguments
+    __outgoing_size: int
+    __lines: List[str]  # assembly of the current function, before the peephole pass
+    peephole: Peephole
+
+    def __init__(self, emitter: Emitter, peephole: Optional[Peephole] = None):
+        self.__emitter = emitter
+        self.peephole = Peephole() if peephole is None else peephole
+
+    def emit_text(self, text: str):  # of a function
+        self.__emitter.begin_function()
+        self.__emitter.emit(text)
+        self.__emitter.end_function()
+
+    def function_text(self, func: Function) -> str:  # assembly of func, written out by emit_text
+        self.__func = func
+        cfg = CFG(func)
+        self.__allocation = allocate(func, cfg)
+        # frame: ra and old fp above fp, then slots, saved registers and outgoing arguments down to sp
+        self.__slot_offset, slot_area = layout_frame(func, cfg, self.__allocation)
+        self.__outgoing_size = 4 * max([len(instr.args) - len(ARG_REGS) for block in func.blocks
+                                        for instr in block.instrs if instr.op == "call"] + [0])
+        self.__saved_regs = self.__allocation.used_callee_saved
+        frame_size = slot_area + 4 * len(self.__saved_regs) + self.__outgoing_size
+        frame_size = (frame_size + 8 + 15) // 16 * 16 - 8  # keep sp 16-byte aligned
+
+        self.__lines = []
+        self.__emit(f"\t.text\n"
+                    f"\t.global {func.name}\n"
+                    f"{func.name}:\n"
+                    f"# prologue\n"
+                    f"\taddi sp, sp, -8\n"
+                    f"\tsw ra, 4(sp)\n"
+                    f"\tsw fp, 0(sp)\n"
+                    f"\tmv fp, sp\n")
+        if frame_size:
+            self.__add_immediate("sp", "sp", -frame_size)
+        for i, reg in enumerate(self.__saved_regs):
+            self.__emit(f"\tsw {reg}, {self.__outgoing_size + 4 * i}(sp)\n")
+        self.__emit_params()
+        for i, block in enumerate(func.blocks):
+            next_label = func.blocks[i + 1].label if i + 1 < len(func.blocks) else None
+            if i > 0:
+                self.__emit(f"{block.label}:\n")
+            for instr in block.instrs:
+                if instr.op != "param":
+                    self.__emit_instr(instr, next_label)
+        self.__emit(f"# epilogue\n"
+                    f".exit.{func.name}:\n")
+        self.__restore_frame()
+        self.__emit("\tret\n")
+        return "\n".join(self.peephole.run(self.__lines)) + "\n\n"
+
+    def emit_global(self, name: str, size: int, value: Optional[str]):
+        if value is None:
+            self.__emitter.emit(f"\t.comm {name}, {size}, 4\n")
+        else:
+            self.__emitter.emit("\t.data\n"
+                                "\t.align 4\n"
+                                f"{name}:\n"
+                                f"\t.word {value}\n")
+
+    def __emit(self, asm: str):
+        self.__lines.extend(asm.splitlines())
+
+    def __restore_frame(self):  # saved registers, sp, fp and ra as the caller left them
+        for i, reg in enumerate(self.__saved_regs):
+            self.__emit(f"\tlw {reg}, {self.__outgoing_size + 4 * i}(sp)\n")
+        self.__emit("\tmv sp, fp\n"
+                    "\tlw fp, 0(sp)\n"
+                    "\tlw ra, 4(sp)\n"
+                    "\taddi sp, sp, 8\n")
+
+    def __emit_params(self):
+        # all parameters at once, as their registers may be allocated to a0-a7 in a different order
+        params = [instr for instr in self.__func.blocks[0].instrs if instr.op == "param"]
+        location = self.__allocation.location
+        self.__parallel_move([(location[instr.dst], ARG_REGS[instr.imm])
+                              for instr in params if instr.imm < len(ARG_REGS)])
+        for instr in params:
+            if instr.imm >= len(ARG_REGS):  # passed on stack, above ra and fp
+                reg = self.__def_reg(instr.dst)
+                self.__emit(f"\tlw {reg}, {8 + 4 * (instr.imm - len(ARG_REGS))}(fp)\n")
+                self.__finish_def(instr.dst)
+
+    def __emit_instr(self, instr: Instr, next_label: Optional[str]):
+        op = instr.op
+        if op in BINARY_OPS:
+            lhs = self.__use_reg(instr.args[0], "t0")
+            rhs = self.__use_reg(instr.args[1], "t1")
+            self.__emit(f"\t{op} {self.__def_reg(instr.dst)}, {lhs}, {rhs}\n")
+        elif op in UNARY_OPS:
+            src = self.__use_reg(instr.args[0], "t0")
+            self.__emit(f"\t{op} {self.__def_reg(instr.dst)}, {src}\n")
+        elif op in IMMEDIATE_OPS:
+            src = self.__use_reg(instr.args[0], "t0")
+            self.__emit(f"\t{op} {self.__def_reg(instr.dst)}, {src}, {instr.imm}\n")
+        elif op == "li":
+            self.__emit(f"\tli {self.__def_reg(instr.dst)}, {instr.imm}\n")
+        elif op == "mv":
+            src = self.__use_reg(instr.args[0], "t0")
+            dst = self.__def_reg(instr.dst)
+            if dst != src:
+                self.__emit(f"\tmv {dst}, {src}\n")
+        elif op == "la":
+            self.__emit(f"\tla {self.__def_reg(instr.dst)}, {instr.imm}\n")
+        elif op == "addr":
+            self.__add_immediate(self.__def_reg(instr.dst), "fp", self.__slot_offset[instr.imm.index])
+        elif op == "load":
+            base = self.__use_reg(instr.args[0], "t0")
+            self.__emit(f"\tlw {self.__def_reg(instr.dst)}, {instr.imm}({base})\n")
+        elif op == "store":
+            value = self.__use_reg(instr.args[0], "t0")
+            base = self.__use_reg(instr.args[1], "t1")
+            self.__emit(f"\tsw {value}, {instr.imm}({base})\n")
+        elif op == "loadslot":
+            self.__frame_access("lw", self.__def_reg(instr.dst), self.__slot_offset[instr.imm.index])
+        elif op == "storeslot":
+            self.__frame_access("sw", self.__use_reg(instr.args[0], "t0"), self.__slot_offset[instr.imm.index])
+        elif op == "call":
+            self.__emit_call(instr)
+        elif op == "tailcall":  # the arguments are read before the frame is torn down, then the callee returns for us
+            location = self.__allocation.location
+            self.__parallel_move([(reg, location[arg]) for reg, arg in zip(ARG_REGS, instr.args)])
+            self.__restore_frame()
+            self.__emit(f"\ttail {instr.imm}\n")
+        elif op == "j":
+            if instr.labels[0] != next_label:
+                self.__emit(f"\tj {instr.labels[0]}\n")
+        elif op in ("beqz", "bnez") or op in COMPARE_BRANCH_OPS:
+            srcs = ", ".join(self.__use_reg(arg, scratch) for arg, scratch in zip(instr.args, ("t0", "t1")))
+            taken, not_taken = instr.labels
+            if taken == next_label:  # branch to the other target on the opposite condition
+                self.__emit(f"\t{NEGATED_BRANCH[op]} {srcs}, {not_taken}\n")
+            else:
+                self.__emit(f"\t{op} {srcs}, {taken}\n")
+                if not_taken != next_label:
+                    self.__emit(f"\tj {not_taken}\n")
+        elif op == "ret":
+            src = self.__use_reg(instr.args[0], "a0")
+            if src != "a0":
+                self.__emit(f"\tmv a0, {src}\n")
+            if next_label is not None:
+                self.__emit(f"\tj .exit.{self.__func.name}\n")
+        else:
+            raise Exception(f"Unknown IR instruction {instr}.")
+        if instr.dst is not None:
+            self.__finish_def(instr.dst)
+
+    def __emit_call(self, instr: Instr):
+        location = self.__allocation.location
+        for i in range(len(ARG_REGS), len(instr.args)):
+            self.__emit(f"\tsw {self.__use_reg(instr.args[i], 't0')}, {4 * (i - len(ARG_REGS))}(sp)\n")
+        self.__parallel_move([(reg, location[arg]) for reg, arg in zip(ARG_REGS, instr.args)])
+        self.__emit(f"\tcall {instr.imm}\n")
+        dst = self.__def_reg(instr.dst)
+        if dst != "a0":
+            self.__emit(f"\tmv {dst}, a0\n")
+
+    def __parallel_move(self, moves: List[Tuple[Location, Location]]):
+        # emit moves dst <- src that happen at the same time, breaking cycles with t0
+        pending = [(dst, src) for dst, src in moves if dst != src]
+        while pending:
+            sources = {src for _, src in pending}
+            for i, (dst, src) in enumerate(pending):
+                if dst not in sources:
+                    self.__move(dst, src)
+                    pending.pop(i)
+                    break
+            else:  # every destination is still to be read, so all remaining moves are cycles
+                dst, src = pending[0]
+                self.__move("t0", src)
+                pending[0] = (dst, "t0")
+
+    def __move(self, dst: Location, src: Location):
+        if isinstance(src, Slot):
+            if isinstance(dst, Slot):
+                self.__frame_access("lw", "t0", self.__slot_offset[src.index])
+                src = "t0"
+            else:
+                self.__frame_access("lw", dst, self.__slot_offset[src.index])
+                return
+        if isinstance(dst, Slot):
+            self.__frame_access("sw", src, self.__slot_offset[dst.index])
+        else:
+            self.__emit(f"\tmv {dst}, {src}\n")
+
+    def __use_reg(self, reg: int, scratch: str) -> str:
+        # physical register holding a virtual register, loading it into scratch if spilled
+        location = self.__allocation.location[reg]
+        if isinstance(location, Slot):
+            self.__frame_access("lw", scratch, self.__slot_offset[location.index])
+            return scratch
+        return location
+
+    def __def_reg(self, reg: int) -> str:
+        location = self.__allocation.location[reg]
+        return "t0" if isinstance(location, Slot) else location
+
+    def __finish_def(self, reg: int):
+        location = self.__allocation.location[reg]
+        if isinstance(location, Slot):
+            self.__frame_access("sw", "t0", self.__slot_offset[location.index])
+
+    def __add_immediate(self, dst: str, src: str, imm: int):
+        if -2048 <= imm < 2048:
+            self.__emit(f"\taddi {dst}, {src}, {imm}\n")
+        else:  # out of the 12-bit immediate range
+            self.__emit(f"\tli t2, {imm}\n"
+                        f"\tadd {dst}, {src}, t2\n")
+
+    def __frame_access(self, op: str, reg: str, offset: int):  # load or store a word at fp + offset
+        if -2048 <= offset < 2048:
+            self.__emit(f"\t{op} {reg}, {offset}(fp)\n")
+        else:
+            self.__emit(f"\tli t2, {offset}\n"
+                        f"\tadd t2, fp, t2\n"
+                        f"\t{op} {reg}, 0(t2)\n")
+
+
+class IRPrinter:
+    """prints the IR itself instead of assembly, for --emit-ir"""
+    __emitter: Emitter
+
+    def __init__(self, emitter: Emitter):
+        self.__emitter = emitter
+
+    def emit_text(self, text: str):
+        self.__emitter.begin_function()
+        self.__emitter.emit(text)
+        self.__emitter.end_function()
+
+    @staticmethod
+    def function_text(func: Function) -> str:
+        return f"{func}\n"
+
+    def emit_global(self, name: str, size: int, value: Optional[str]):
+        self.__emitter.emit(f"global {name}[{size}]" + (f" = {value}\n" if value is not None else "\n"))
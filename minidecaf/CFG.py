@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+from .IR import Function, BasicBlock
+
+
+class CFG:
+    """
+    control flow graph of a function: blocks by index, in layout order, with their successors and predecessors,
+    and a reverse postorder of the blocks reachable from the entry block
+    blocks that cannot be reached are left out of rpo and have rpo_number -1
+    """
+    blocks: List[BasicBlock]
+    index: Dict[str, int]  # label: block index
+    successors: List[List[int]]
+    predecessors: List[List[int]]
+    rpo: List[int]  # block indices
+    rpo_number: List[int]  # position of each block in rpo
+
+    def __init__(self, func: Function):
+        self.blocks = func.blocks
+        self.index = {block.label: i for i, block in enumerate(self.blocks)}
+        self.successors = [[self.index[label] for label in block.successors()] for block in self.blocks]
+        self.predecessors = [[] for _ in self.blocks]
+        for i, successors in enumerate(self.successors):
+            for successor in successors:
+                self.predecessors[successor].append(i)
+        self.rpo = self.__postorder()
+        self.rpo.reverse()
+        self.rpo_number = [-1] * len(self.blocks)
+        for number, i in enumerate(self.rpo):
+            self.rpo_number[i] = number
+
+    def __postorder(self) -> List[int]:
+        # depth first from the entry, with a stack of (block, successors visited) instead of recursion; successors
+        # are visited from the last laid out, so that rpo follows the layout where it can: the body of a loop comes
+        # before its exit, and a change is carried through the loop before going past it
+        if not self.blocks:
+            return []
+        order = []
+        visited = [False] * len(self.blocks)
+        visited[0] = True
+        stack = [(0, 0)]
+        while stack:
+            i, visited_count = stack.pop()
+            successors = self.successors[i]
+            if visited_count < len(successors):
+                stack.append((i, visited_count + 1))
+                successor = sorted(successors, reverse=True)[visited_count]
+                if not visited[successor]:
+                    visited[successor] = True
+                    stack.append((successor, 0))
+            else:
+                order.append(i)
+        return order
+
+    def reachable(self, i: int) -> bool:
+        return self.rpo_number[i] >= 0
+
+    def order(self) -> List[int]:
+        """every block index: the reachable ones in reverse postorder, then the others in layout order"""
+        return self.rpo + [i for i in range(len(self.blocks)) if self.rpo_number[i] < 0]
@@ -0,0 +1,124 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterator, Optional
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+__fingerprint: Optional[str] = None
+
+
+def compiler_fingerprint() -> str:
+    # hash of the compiler sources and grammar, so that any change to the compiler invalidates the cache
+    global __fingerprint
+    if __fingerprint is None:
+        digest = hashlib.sha256()
+        for directory, dirs, files in os.walk(PACKAGE_DIR):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith((".py", ".g4")):
+                    path = os.path.join(directory, name)
+                    digest.update(os.path.relpath(path, PACKAGE_DIR).encode())
+                    with open(path, mode='rb') as file:
+                        digest.update(file.read())
+        __fingerprint = digest.hexdigest()
+    return __fingerprint
+
+
+class CompileCache:
+    """
+    content-addressed store of compiled outputs, safe to share between concurrent compilers
+    an entry is a file named by the hash of the source, the compiler and the options, written to a temporary file
+    and renamed into place, so that readers never see a partial entry; hits touch the entry's mtime, and when the
+    total size kept in stats.json exceeds the limit, the least recently used entries are removed
+    """
+    __directory: str
+    __max_size: int
+
+    def __init__(self, directory: str, max_size: int):
+        self.__directory = directory
+        self.__max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(source: bytes, options: str) -> str:
+        digest = hashlib.sha256(compiler_fingerprint().encode())
+        digest.update(options.encode() + b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.__path(key)
+        try:
+            with open(path) as file:
+                text = file.read()
+        except FileNotFoundError:  # never stored, or evicted
+            text = None
+        if text is not None:
+            try:
+                os.utime(path)  # most recently used
+            except FileNotFoundError:  # evicted since it was read, which is still a hit
+                pass
+        with self.__locked_stats() as stats:
+            stats["hits" if text is not None else "misses"] += 1
+        return text
+
+    def put(self, key: str, text: str):
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+        with os.fdopen(fd, mode='w') as file:
+            file.write(text)
+        size = os.path.getsize(temp_path)
+        with self.__locked_stats() as stats:
+            if os.path.exists(path):  # stored by another compiler in the meantime
+                stats["bytes"] -= os.path.getsize(path)
+                stats["entries"] -= 1
+            os.replace(temp_path, path)
+            stats["bytes"] += size
+            stats["entries"] += 1
+            if stats["bytes"] > self.__max_size:
+                self.__evict(stats)
+
+    def stats(self) -> Dict[str, int]:
+        with self.__locked_stats() as stats:
+            return dict(stats)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, key[:2], key[2:] + ".s")
+
+    def __evict(self, stats: Dict[str, int]):
+        # down to 90% of the limit, so that the directory is not scanned again on the next put
+        entries = []
+        for directory, _, files in os.walk(self.__directory):
+            for name in files:
+                if name.endswith(".s") and not name.startswith(".tmp"):
+                    path = os.path.join(directory, name)
+                    status = os.stat(path)
+                    entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+        for _, size, path in entries:
+            if stats["bytes"] <= self.__max_size * 9 // 10:
+                break
+            os.remove(path)
+            stats["bytes"] -= size
+            stats["entries"] -= 1
+            stats["evictions"] += 1
+
+    @contextlib.contextmanager
+    def __locked_stats(self) -> Iterator[Dict[str, int]]:
+        # the counters of all compilers using this directory, read and written under an exclusive lock
+        with open(os.path.join(self.__directory, "lock"), mode='w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stats_path = os.path.join(self.__directory, "stats.json")
+            stats = {"hits": 0, "misses": 0, "entries": 0, "bytes": 0, "evictions": 0}
+            if os.path.exists(stats_path):
+                with open(stats_path) as file:
+                    stats.update(json.load(file))
+            yield stats
+            with open(stats_path + ".tmp", mode='w') as file:
+                json.dump(stats, file)
+            os.replace(stats_path + ".tmp", stats_path)
@@ -0,0 +1,207 @@
+from collections import Counter
+from typing import Dict, Optional, Set
+
+from .IR import Function, Instr, BRANCH_OPS, COMPARE_BRANCH_OPS, PURE_OPS
+
+INT_MIN = -0x80000000
+
+
+def wrap(value: int) -> int:  # two's complement 32-bit
+    return (value - INT_MIN) % 0x100000000 + INT_MIN
+
+
+def __div(lhs: int, rhs: int) -> int:  # RISC-V div: rounds toward zero, x / 0 is -1, INT_MIN / -1 overflows
+    if rhs == 0:
+        return -1
+    quotient = abs(lhs) // abs(rhs)
+    return quotient if (lhs < 0) == (rhs < 0) else -quotient
+
+
+def __rem(lhs: int, rhs: int) -> int:  # RISC-V rem: sign of the dividend, x % 0 is x
+    if rhs == 0:
+        return lhs
+    return lhs - rhs * __div(lhs, rhs)
+
+
+FOLD_BINARY = {
+    "add": lambda lhs, rhs: lhs + rhs,
+    "sub": lambda lhs, rhs: lhs - rhs,
+    "mul": lambda lhs, rhs: lhs * rhs,
+    "mulh": lambda lhs, rhs: lhs * rhs >> 32,
+    "div": __div,
+    "rem": __rem,
+    "slt": lambda lhs, rhs: int(lhs < rhs),
+    "sgt": lambda lhs, rhs: int(lhs > rhs),
+    "and": lambda lhs, rhs: lhs & rhs,
+    "or": lambda lhs, rhs: lhs | rhs,
+    "xor": lambda lhs, rhs: lhs ^ rhs,
+    "sll": lambda lhs, rhs: lhs << (rhs & 31),
+    "sra": lambda lhs, rhs: lhs >> (rhs & 31),
+}
+
+FOLD_UNARY = {
+    "neg": lambda value: -value,
+    "not": lambda value: ~value,
+    "seqz": lambda value: int(value == 0),
+    "snez": lambda value: int(value != 0),
+}
+
+FOLD_IMMEDIATE = {
+    "addi": lambda value, imm: value + imm,
+    "slti": lambda value, imm: int(value < imm),
+    "andi": lambda value, imm: value & imm,
+    "ori": lambda value, imm: value | imm,
+    "xori": lambda value, imm: value ^ imm,
+    "slli": lambda value, imm: value << (imm & 31),
+    "srli": lambda value, imm: (value & 0xffffffff) >> (imm & 31),
+    "srai": lambda value, imm: value >> (imm & 31),
+}
+
+FOLD_COMPARE_BRANCH = {
+    "beq": lambda lhs, rhs: lhs == rhs,
+    "bne": lambda lhs, rhs: lhs != rhs,
+    "blt": lambda lhs, rhs: lhs < rhs,
+    "bge": lambda lhs, rhs: lhs >= rhs,
+}
+
+BOOLEAN_OPS = {"slt", "sgt", "slti", "seqz", "snez"}  # ops whose result is always 0 or 1
+
+
+class ConstantFolder:
+    """
+    folds constants and simplifies identities in one function
+    only registers with a single definition are tracked, the others (e.g. the result of ?:) are left alone;
+    copies of such registers are propagated, so the moves become unused and are removed afterwards
+    """
+    __single_def: Set[int]  # registers defined once
+    __defs: Dict[int, Instr]  # defining instruction of registers with a single definition
+    __constants: Dict[int, int]
+    __copies: Dict[int, int]  # register -> register it is a copy of
+    __booleans: Set[int]  # registers known to hold 0 or 1
+
+    def __init__(self, func: Function):
+        self.__func = func
+        def_count = Counter(instr.dst for block in func.blocks for instr in block.instrs if instr.dst is not None)
+        self.__single_def = {reg for reg, count in def_count.items() if count == 1}
+        self.__defs = {}
+        self.__constants = {}
+        self.__copies = {}
+        self.__booleans = set()
+
+    def run(self):
+        changed = True
+        while changed:  # a register may be used in a block laid out before the one defining it
+            changed = False
+            for block in self.__func.blocks:
+                for i, instr in enumerate(block.instrs):
+                    args = tuple(self.__copies.get(arg, arg) for arg in instr.args)
+                    if args != instr.args:
+                        instr.args = args
+                        changed = True
+                    simplified = self.__simplify(instr)
+                    if simplified is not None:
+                        block.instrs[i] = instr = simplified
+                        changed = True
+                    if instr.dst in self.__single_def:
+                        self.__record(instr)
+
+    def __record(self, instr: Instr):
+        dst = instr.dst
+        self.__defs[dst] = instr
+        if instr.op == "li":
+            self.__constants[dst] = instr.imm
+            if instr.imm in (0, 1):
+                self.__booleans.add(dst)
+        elif instr.op == "mv" and instr.args[0] in self.__single_def:
+            self.__copies[dst] = instr.args[0]
+        elif instr.op in BOOLEAN_OPS or (instr.op in ("and", "or") and self.__is_boolean(*instr.args)) \
+                or (instr.op == "xori" and instr.imm == 1 and self.__is_boolean(*instr.args)):
+            self.__booleans.add(dst)
+
+    def __is_boolean(self, *regs: int) -> bool:
+        return all(reg in self.__booleans for reg in regs)
+
+    def __simplify(self, instr: Instr) -> Optional[Instr]:
+        op, dst, args = instr.op, instr.dst, instr.args
+        constants = self.__constants
+        values = [constants.get(arg) for arg in args]
+        if op == "mv" and values[0] is not None:
+            return Instr("li", dst, imm=values[0])
+        if op in FOLD_BINARY:
+            lhs, rhs = values
+            if lhs is not None and rhs is not None:
+                return Instr("li", dst, imm=wrap(FOLD_BINARY[op](lhs, rhs)))
+            return self.__identity(op, dst, args, lhs, rhs)
+        if op in FOLD_UNARY:
+            if values[0] is not None:
+                return Instr("li", dst, imm=wrap(FOLD_UNARY[op](values[0])))
+            inner = self.__defs.get(args[0])
+            if op == "snez" and self.__is_boolean(args[0]):  # !!x where x is already 0 or 1
+                return Instr("mv", dst, args)
+            if inner is not None and op == "seqz" and inner.op in ("seqz", "snez"):  # !!x is x != 0
+                return Instr("snez" if inner.op == "seqz" else "seqz", dst, inner.args)
+            if inner is not None and op in ("neg", "not") and inner.op == op:  # --x, ~~x
+                return Instr("mv", dst, inner.args)
+            return None
+        if op in FOLD_IMMEDIATE:
+            if values[0] is not None:
+                return Instr("li", dst, imm=wrap(FOLD_IMMEDIATE[op](values[0], instr.imm)))
+            if op in ("slli", "srli", "srai") and instr.imm & 31 == 0 \
+                    or op in ("addi", "ori", "xori") and instr.imm == 0:
+                return Instr("mv", dst, args)
+            if op == "andi" and instr.imm == 0:
+                return Instr("li", dst, imm=0)
+            return None
+        if op in BRANCH_OPS:
+            if values[0] is not None:
+                taken = (values[0] == 0) == (op == "beqz")
+                return Instr("j", labels=(instr.labels[0 if taken else 1],))
+            inner = self.__defs.get(args[0])
+            if inner is not None and inner.op == "snez":  # branch on x instead of x != 0
+                return Instr(op, args=inner.args, labels=instr.labels)
+            if inner is not None and inner.op == "seqz":
+                return Instr("bnez" if op == "beqz" else "beqz", args=inner.args, labels=instr.labels)
+            if inner is not None and inner.op in ("slt", "sgt"):  # compare and branch at once
+                lhs, rhs = inner.args if inner.op == "slt" else inner.args[::-1]
+                return Instr("blt" if op == "bnez" else "bge", args=(lhs, rhs), labels=instr.labels)
+        if op in COMPARE_BRANCH_OPS:
+            lhs, rhs = values
+            if lhs is not None and rhs is not None:
+                taken = FOLD_COMPARE_BRANCH[op](lhs, rhs)
+                return Instr("j", labels=(instr.labels[0 if taken else 1],))
+            if op in ("beq", "bne") and 0 in (lhs, rhs):  # against zero
+                return Instr(op + "z", args=args[1:] if lhs == 0 else args[:1], labels=instr.labels)
+        return None
+
+    @staticmethod
+    def __identity(op: str, dst: int, args, lhs: Optional[int], rhs: Optional[int]) -> Optional[Instr]:
+        if op in ("add", "or", "xor") and lhs == 0 or op == "mul" and lhs == 1:  # 0 + x, 1 * x
+            return Instr("mv", dst, args[1:])
+        if op in ("add", "sub", "or", "xor", "sll", "sra") and rhs == 0 or op in ("mul", "div") and rhs == 1:
+            return Instr("mv", dst, args[:1])  # x + 0, x * 1, x / 1
+        if op in ("mul", "and") and (lhs == 0 or rhs == 0) or op == "rem" and rhs in (1, -1):
+            return Instr("li", dst, imm=0)  # x * 0, x % 1
+        if op == "sub" and args[0] == args[1]:  # x - x
+            return Instr("li", dst, imm=0)
+        return None
+
+
+def fold_constants(func: Function):
+    ConstantFolder(func).run()
+
+
+def remove_unused_values(func: Function):
+    """removes instructions without side effects whose results are never read"""
+    uses = Counter(arg for block in func.blocks for instr in block.instrs for arg in instr.args)
+    changed = True
+    while changed:
+        changed = False
+        for block in func.blocks:
+            kept = []
+            for instr in block.instrs:
+                if instr.op in PURE_OPS and uses[instr.dst] == 0:
+                    uses.subtract(instr.args)
+                    changed = True
+                else:
+                    kept.append(instr)
+            block.instrs = kept
@@ -0,0 +1,163 @@
+from heapq import heapify, heappop, heappush
+from typing import Dict, Iterator, List, Set, Tuple
+
+from .CFG import CFG
+from .IR import BINARY_OPS, UNARY_OPS, IMMEDIATE_OPS
+
+# sets of registers, slots, definitions or expressions are Python ints used as bitsets, bit k standing for item k
+
+
+def bits(mask: int) -> Iterator[int]:
+    """items of a bitset, in increasing order"""
+    digits = bin(mask)[:1:-1]  # lowest bit first, scanned in one pass whatever the size of the set
+    i = digits.find("1")
+    while i >= 0:
+        yield i
+        i = digits.find("1", i + 1)
+
+
+def to_bits(items) -> int:
+    """bitset of items, built in one pass: setting bits one by one in an int copies it each time"""
+    items = list(items)
+    if not items:
+        return 0
+    buffer = bytearray(max(items) // 8 + 1)
+    for item in items:
+        buffer[item >> 3] |= 1 << (item & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def solve(cfg: CFG, gen: List[int], kill: List[int], forward: bool, intersect: bool = False,
+          universe: int = 0) -> Tuple[List[int], List[int]]:
+    """
+    worklist solver of a gen/kill dataflow problem over the blocks of cfg, facts being bits:
+    forward problems compute out = gen | (in & ~kill) from the meet of the predecessors' out, backward ones
+    in = gen | (out & ~kill) from the meet of the successors' in; the meet is union, or intersection for
+    must-problems, which start from universe except at the entry block
+    every block is visited at least once, blocks that cannot be reached included
+    returns the facts at the beginning and at the end of each block, by block index
+    """
+    count = len(cfg.blocks)
+    initial = universe if intersect else 0
+    facts_in = [initial] * count
+    facts_out = [initial] * count
+    if forward:
+        sources, dependents, order = cfg.predecessors, cfg.successors, cfg.order()
+    else:
+        sources, dependents, order = cfg.successors, cfg.predecessors, cfg.order()[::-1]
+    before, after = (facts_in, facts_out) if forward else (facts_out, facts_in)
+    # the pending block first in order is taken first, so that a change is carried along the whole graph in one
+    # sweep, instead of in waves of a first in first out list
+    position = [0] * count
+    for number, i in enumerate(order):
+        position[i] = number
+    worklist = list(range(count))
+    heapify(worklist)
+    listed = [True] * count
+    while worklist:
+        i = order[heappop(worklist)]
+        listed[i] = False
+        if not sources[i]:  # the entry block, or the exits of a backward problem
+            meet = 0
+        elif intersect:
+            meet = universe
+            for source in sources[i]:
+                meet &= after[source]
+        else:
+            meet = 0
+            for source in sources[i]:
+                meet |= after[source]
+        before[i] = meet
+        result = gen[i] | (meet & ~kill[i])
+        if result != after[i]:
+            after[i] = result
+            for dependent in dependents[i]:
+                if not listed[dependent]:
+                    listed[dependent] = True
+                    heappush(worklist, position[dependent])
+    return facts_in, facts_out
+
+
+def liveness(cfg: CFG) -> Tuple[List[int], List[int]]:
+    """live-in and live-out virtual registers of each block"""
+    gen, kill = [], []
+    for block in cfg.blocks:
+        uses, defs = set(), set()
+        for instr in block.instrs:
+            uses.update(arg for arg in instr.args if arg not in defs)
+            if instr.dst is not None:
+                defs.add(instr.dst)
+        gen.append(to_bits(uses))
+        kill.append(to_bits(defs))
+    return solve(cfg, gen, kill, forward=False)
+
+
+def slot_liveness(cfg: CFG, slots: Set[int]) -> Tuple[List[int], List[int]]:
+    """live-in and live-out slots of each block, for slots only accessed by loadslot and storeslot"""
+    gen, kill = [], []
+    for block in cfg.blocks:
+        uses, defs = set(), set()
+        for instr in block.instrs:
+            if instr.op == "loadslot" and instr.imm.index in slots and instr.imm.index not in defs:
+                uses.add(instr.imm.index)
+            elif instr.op == "storeslot" and instr.imm.index in slots:
+                defs.add(instr.imm.index)
+        gen.append(to_bits(uses))
+        kill.append(to_bits(defs))
+    return solve(cfg, gen, kill, forward=False)
+
+
+def reaching_definitions(cfg: CFG) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+    """
+    definitions of virtual registers, as (block index, instruction index), and the ones reaching the beginning and
+    the end of each block, as bitsets over that list
+    """
+    definitions: List[Tuple[int, int]] = []
+    defs_of_reg: Dict[int, List[int]] = {}
+    last_defs: List[Dict[int, int]] = []  # register: its last definition, in each block
+    for b, block in enumerate(cfg.blocks):
+        last: Dict[int, int] = {}
+        for k, instr in enumerate(block.instrs):
+            if instr.dst is not None:
+                defs_of_reg.setdefault(instr.dst, []).append(len(definitions))
+                last[instr.dst] = len(definitions)
+                definitions.append((b, k))
+        last_defs.append(last)
+    gen = [to_bits(last.values()) for last in last_defs]
+    kill = [to_bits(number for reg in last for number in defs_of_reg[reg]) for last in last_defs]
+    facts_in, facts_out = solve(cfg, gen, kill, forward=True)
+    return definitions, facts_in, facts_out
+
+
+def available_expressions(cfg: CFG) -> Tuple[List[tuple], List[int], List[int]]:
+    """
+    expressions, as (op, args, imm) of instructions computed from registers only, and the ones available at the
+    beginning and at the end of each block, i.e. computed on every path and not invalidated by a redefinition of
+    their arguments since, as bitsets over that list
+    """
+    expressions: Dict[tuple, int] = {}
+    uses_of_reg: Dict[int, List[int]] = {}  # register: expressions reading it
+    for block in cfg.blocks:
+        for instr in block.instrs:
+            if instr.op in BINARY_OPS or instr.op in UNARY_OPS or instr.op in IMMEDIATE_OPS:
+                key = (instr.op, instr.args, instr.imm)
+                if key not in expressions:
+                    expressions[key] = len(expressions)
+                    for arg in set(instr.args):
+                        uses_of_reg.setdefault(arg, []).append(expressions[key])
+    gen, kill = [], []
+    for block in cfg.blocks:
+        block_gen, block_kill = set(), set()
+        for instr in block.instrs:
+            expression = expressions.get((instr.op, instr.args, instr.imm))
+            if expression is not None:
+                block_gen.add(expression)
+            if instr.dst is not None:  # invalidates the expressions reading it, the one just computed included
+                invalidated = uses_of_reg.get(instr.dst, ())
+                block_gen.difference_update(invalidated)
+                block_kill.update(invalidated)
+        gen.append(to_bits(block_gen))
+        kill.append(to_bits(block_kill))
+    universe = (1 << len(expressions)) - 1
+    facts_in, facts_out = solve(cfg, gen, kill, forward=True, intersect=True, universe=universe)
+    return list(expressions), facts_in, facts_out
@@ -0,0 +1,73 @@
+from collections import Counter
+from typing import Dict, Set
+
+from .CFG import CFG
+from .ConstFold import remove_unused_values
+from .Dataflow import bits, slot_liveness
+from .IR import Function
+
+
+def scalar_slots(func: Function) -> Set[int]:
+    """slots of the locals only read and written by loadslot and storeslot, as their address is never taken"""
+    addressed = {instr.imm.index for block in func.blocks for instr in block.instrs if instr.op == "addr"}
+    return {slot.index for slot in func.slots if slot.index not in addressed and slot.size == 4}
+
+
+def remove_unreachable_blocks(func: Function):
+    """
+    removes the blocks that cannot be reached from the entry: code after return, break or continue, the default
+    return after a function whose paths all return, and branches folded away by constant folding
+    """
+    cfg = CFG(func)
+    func.blocks = [block for i, block in enumerate(func.blocks) if cfg.reachable(i)]
+
+
+def forward_stores(func: Function):
+    """
+    replaces loads of scalar locals by the register stored to them before in the same block, when that register is
+    defined once, so that it still holds the value wherever the load is used; the stores may then become dead
+    """
+    scalars = scalar_slots(func)
+    def_count = Counter(instr.dst for block in func.blocks for instr in block.instrs if instr.dst is not None)
+    renamed: Dict[int, int] = {}  # register loaded: register stored
+    for block in func.blocks:
+        stored: Dict[int, int] = {}  # slot index: register holding its value
+        for instr in block.instrs:
+            if instr.op == "storeslot" and instr.imm.index in scalars:
+                value = renamed.get(instr.args[0], instr.args[0])
+                if def_count[value] == 1:
+                    stored[instr.imm.index] = value
+                else:
+                    stored.pop(instr.imm.index, None)
+            elif instr.op == "loadslot" and instr.imm.index in stored and def_count[instr.dst] == 1:
+                renamed[instr.dst] = stored[instr.imm.index]
+    if renamed:
+        for block in func.blocks:
+            for instr in block.instrs:
+                if any(arg in renamed for arg in instr.args):
+                    instr.args = tuple(renamed.get(arg, arg) for arg in instr.args)
+        remove_unused_values(func)
+
+
+def remove_dead_stores(func: Function):
+    """
+    removes stores to scalar locals that are not read before being stored again or before returning, then the
+    values that were only computed to be stored; locals whose address is taken may be read through it and are kept
+    """
+    scalars = scalar_slots(func)
+    cfg = CFG(func)
+    _, live_out = slot_liveness(cfg, scalars)
+    for b, block in enumerate(func.blocks):
+        live = set(bits(live_out[b]))
+        kept = []
+        for instr in reversed(block.instrs):
+            if instr.op == "storeslot" and instr.imm.index in scalars:
+                if instr.imm.index not in live:
+                    continue
+                live.discard(instr.imm.index)
+            elif instr.op == "loadslot":
+                live.add(instr.imm.index)
+            kept.append(instr)
+        kept.reverse()
+        block.instrs = kept
+    remove_unused_values(func)
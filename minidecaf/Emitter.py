@@ -0,0 +1,31 @@
+from itertools import chain
+from typing import List, Optional, TextIO
+
+
+class Emitter:
+    # assembly is kept as a list of chunks per function (and per run of top-level directives between functions),
+    # so emitting is an append and the output is joined only once
+    __chunks: List[List[str]]
+    __sink: Optional[TextIO]
+
+    def __init__(self, sink: Optional[TextIO] = None):
+        self.__chunks = [[]]
+        self.__sink = sink  # streaming mode: finished functions are written here and dropped
+
+    def emit(self, asm: str):
+        self.__chunks[-1].append(asm)
+
+    def begin_function(self):
+        self.__chunks.append([])
+
+    def end_function(self):
+        if self.__sink is not None:
+            self.flush()
+        self.__chunks.append([])
+
+    def flush(self):
+        self.__sink.writelines(self)
+        self.__chunks = [[]]
+
+    def __iter__(self):
+        return chain.from_iterable(self.__chunks)
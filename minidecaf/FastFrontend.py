@@ -0,0 +1,330 @@
+import re
+import sys
+import time
+from typing import List
+
+from .Ast import Token, Node, Program, Function, DefFunc, DeclareFunc, VarType, GlobalIntOrPointer, GlobalArray, \
+    IntOrPointerDecl, ArrayDecl, RetStatement, ExprStatement, IfStatement, BlockStatement, WhileStatement, \
+    ForStatement, DoWhileStatement, BreakStatement, ContinueStatement, Assignment, LogicalOr, LogicalAnd, Equality, \
+    Relational, Additive, Multiplicative, Conditional, OpUnary, CastUnary, FuncCallPostfix, ArrayPostfix, NumPrimary, \
+    ParenthesizedPrimary, IdentPrimary, UNARY_NODES
+from .Profiler import NO_PROFILER
+
+# lexer table, in order of priority; like the ANTLR lexer, the longest match wins and keywords are identifiers
+# with a reserved spelling
+TOKEN_TABLE = [
+    ("skip", r"[ \t\r\n\f]+|/\*[\s\S]*?\*/|//[^\r\n]*"),
+    ("Integer", r"[0-9]+"),
+    ("Identifier", r"[a-zA-Z_][a-zA-Z_0-9]*"),
+    ("punctuation", r"<=|>=|==|!=|&&|\|\||[-+*/%<>=!~&?:;,(){}\[\]]"),
+    ("error", r"."),
+]
+TOKEN_PATTERN = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in TOKEN_TABLE), re.DOTALL)
+KEYWORDS = {"int", "return", "if", "else", "while", "for", "do", "break", "continue"}
+
+# binary operators: precedence and node, from the loosest binding rule of the grammar to the tightest
+BINARY_OPERATORS = {
+    "||": (1, LogicalOr),
+    "&&": (2, LogicalAnd),
+    "==": (3, Equality), "!=": (3, Equality),
+    "<": (4, Relational), ">": (4, Relational), "<=": (4, Relational), ">=": (4, Relational),
+    "+": (5, Additive), "-": (5, Additive),
+    "*": (6, Multiplicative), "/": (6, Multiplicative), "%": (6, Multiplicative),
+}
+UNARY_OPERATORS = {"-", "~", "!", "&", "*"}
+
+
+def position_text(source: str, position: int) -> str:  # line:column as ANTLR reports them
+    line = source.count("\n", 0, position) + 1
+    return f"{line}:{position - (source.rfind(chr(10), 0, position) + 1)}"
+
+
+def tokenize(source: str) -> List[Token]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "skip":
+            continue
+        if kind == "error":  # reported and dropped, as ANTLR does
+            print(f"line {position_text(source, match.start())} token recognition error at: '{text}'", file=sys.stderr)
+            continue
+        if kind == "punctuation" or kind == "Identifier" and text in KEYWORDS:
+            kind = text
+        tokens.append(Token(kind, text, match.start()))
+    tokens.append(Token("EOF", "<EOF>", len(source)))
+    return tokens
+
+
+class Parser:
+    """
+    recursive descent parser for MiniDecaf.g4, with precedence climbing for the binary operators;
+    it accepts the same language and builds trees that MainVisitor compiles to the same code as the ANTLR trees
+    """
+    __source: str
+    __tokens: List[Token]
+    __index: int
+
+    def __init__(self, source: str):
+        self.__source = source
+        self.__tokens = tokenize(source)
+        self.__index = 0
+
+    def program(self) -> Program:
+        children = []
+        while self.__peek().kind != "EOF":
+            var_type = self.__var_type()
+            name = self.__expect("Identifier")
+            if self.__peek().kind == '(':
+                children.append(self.__function(var_type, name))
+            else:
+                children.append(self.__global(var_type, name))
+        return Program(children)
+
+    def __peek(self, offset: int = 0) -> Token:
+        return self.__tokens[min(self.__index + offset, len(self.__tokens) - 1)]
+
+    def __next(self) -> Token:
+        token = self.__tokens[self.__index]
+        if token.kind != "EOF":
+            self.__index += 1
+        return token
+
+    def __accept(self, kind: str) -> bool:  # consume the next token if it is of this kind
+        if self.__tokens[self.__index].kind == kind:
+            self.__index += 1
+            return True
+        return False
+
+    def __expect(self, kind: str) -> Token:
+        token = self.__peek()
+        if token.kind != kind:
+            self.__error(token)
+        return self.__next()
+
+    def __error(self, token: Token):
+        raise Exception(f"line {position_text(self.__source, token.position)} syntax error at '{token.text}'.")
+
+    def __var_type(self) -> VarType:
+        children = [self.__expect("int")]
+        while self.__peek().kind == '*':
+            children.append(self.__next())
+        return VarType(children)
+
+    def __function(self, ret_type: VarType, name: Token) -> Function:
+        types, names = [ret_type], [name]
+        self.__expect('(')
+        if self.__peek().kind != ')':
+            types.append(self.__var_type())
+            names.append(self.__expect("Identifier"))
+            while self.__accept(','):
+                types.append(self.__var_type())
+                names.append(self.__expect("Identifier"))
+        self.__expect(')')
+        if self.__accept(';'):
+            return DeclareFunc(types, names)
+        return DefFunc(types, names, self.__block())
+
+    def __global(self, var_type: VarType, name: Token) -> Node:
+        if self.__peek().kind == '[':
+            return GlobalArray(var_type, name, self.__lengths())
+        init = self.__expect("Integer") if self.__accept('=') else None
+        self.__expect(';')
+        return GlobalIntOrPointer(var_type, name, init)
+
+    def __lengths(self) -> List[Token]:  # ('[' Integer ']')+ ';'
+        lengths = []
+        while self.__accept('['):
+            lengths.append(self.__expect("Integer"))
+            self.__expect(']')
+        self.__expect(';')
+        return lengths
+
+    def __block(self) -> List[Node]:  # '{' blockItem* '}'
+        # blocks nested directly in blocks are kept on a stack of open blocks rather than parsed by recursion
+        self.__expect('{')
+        open_blocks: List[List[Node]] = [[]]
+        while True:
+            if self.__accept('}'):
+                items = open_blocks.pop()
+                if not open_blocks:
+                    return items
+                open_blocks[-1].append(BlockStatement(items))
+            elif self.__accept('{'):
+                open_blocks.append([])
+            else:
+                open_blocks[-1].append(self.__declaration() if self.__peek().kind == "int" else self.__statement())
+
+    def __declaration(self) -> Node:
+        var_type = self.__var_type()
+        name = self.__expect("Identifier")
+        if self.__peek().kind == '[':
+            return ArrayDecl(var_type, name, self.__lengths())
+        init = self.__expression() if self.__accept('=') else None
+        self.__expect(';')
+        return IntOrPointerDecl(var_type, name, init)
+
+    def __statement(self) -> Node:
+        kind = self.__peek().kind
+        if kind == "return":
+            self.__next()
+            value = self.__expression()
+            self.__expect(';')
+            return RetStatement(value)
+        if kind == "if":
+            self.__next()
+            condition = self.__parenthesized()
+            branches = [self.__statement()]
+            if self.__accept("else"):
+                branches.append(self.__statement())
+            return IfStatement(condition, branches)
+        if kind == '{':
+            return BlockStatement(self.__block())
+        if kind == "while":
+            self.__next()
+            condition = self.__parenthesized()
+            return WhileStatement(condition, self.__statement())
+        if kind == "for":
+            return self.__for()
+        if kind == "do":
+            self.__next()
+            body = self.__statement()
+            self.__expect("while")
+            condition = self.__parenthesized()
+            self.__expect(';')
+            return DoWhileStatement(condition, body)
+        if kind == "break" or kind == "continue":
+            self.__next()
+            self.__expect(';')
+            return BreakStatement() if kind == "break" else ContinueStatement()
+        value = None if self.__peek().kind == ';' else self.__expression()
+        self.__expect(';')
+        return ExprStatement(value)
+
+    def __parenthesized(self) -> Node:  # '(' expression ')'
+        self.__expect('(')
+        value = self.__expression()
+        self.__expect(')')
+        return value
+
+    def __for(self) -> ForStatement:
+        # 'for' '(' (declaration | expression? ';') expression? ';' expression? ')' statement
+        children: list = [self.__next(), self.__expect('(')]
+        expressions = []
+        init = None
+        if self.__peek().kind == "int":
+            init = self.__declaration()
+            children.append(init)
+        else:
+            self.__optional_expression(children, expressions, ';')
+        self.__optional_expression(children, expressions, ';')
+        self.__optional_expression(children, expressions, ')')
+        body = self.__statement()
+        children.append(body)
+        return ForStatement(children, expressions, init, body)
+
+    def __optional_expression(self, children: list, expressions: list, end: str):
+        if self.__peek().kind != end:
+            expressions.append(self.__expression())
+            children.append(expressions[-1])
+        children.append(self.__expect(end))
+
+    def __expression(self) -> Node:
+        # unary '=' expression | conditional; a unary is also a conditional, so parse that and check before '='
+        lhs = self.__conditional()
+        if self.__peek().kind == '=':
+            if not isinstance(lhs, UNARY_NODES):
+                self.__error(self.__peek())
+            operator = self.__next()
+            return Assignment(lhs, operator, self.__expression())
+        return lhs
+
+    def __conditional(self) -> Node:
+        condition = self.__binary(1)
+        if self.__peek().kind != '?':
+            return condition
+        question = self.__next()
+        then = self.__expression()
+        colon = self.__expect(':')
+        return Conditional(condition, question, then, colon, self.__conditional())
+
+    def __binary(self, min_precedence: int) -> Node:
+        # left associative operators of at least this precedence, so a chain of any length takes a loop, not recursion
+        lhs = self.__unary()
+        while True:
+            operator = self.__peek()
+            entry = BINARY_OPERATORS.get(operator.kind)
+            if entry is None or entry[0] < min_precedence:
+                return lhs
+            self.__next()
+            lhs = entry[1](lhs, operator, self.__binary(entry[0] + 1))
+
+    def __unary(self) -> Node:
+        token = self.__peek()
+        if token.kind in UNARY_OPERATORS:
+            self.__next()
+            return OpUnary(token, self.__unary())
+        if token.kind == '(' and self.__peek(1).kind == "int":
+            self.__next()
+            var_type = self.__var_type()
+            self.__expect(')')
+            return CastUnary(var_type, self.__unary())
+        return self.__postfix()
+
+    def __postfix(self) -> Node:
+        token = self.__peek()
+        if token.kind == "Identifier" and self.__peek(1).kind == '(':
+            self.__next()
+            self.__next()
+            args = []
+            if not self.__accept(')'):
+                args.append(self.__expression())
+                while self.__accept(','):
+                    args.append(self.__expression())
+                self.__expect(')')
+            node = FuncCallPostfix(token, args)
+        else:
+            node = self.__primary()
+        while self.__accept('['):
+            index = self.__expression()
+            self.__expect(']')
+            node = ArrayPostfix(node, index)
+        return node
+
+    def __primary(self) -> Node:
+        token = self.__next()
+        if token.kind == "Integer":
+            return NumPrimary(token)
+        if token.kind == "Identifier":
+            return IdentPrimary(token)
+        if token.kind == '(':
+            inner = self.__expression()
+            self.__expect(')')
+            return ParenthesizedPrimary(inner)
+        self.__error(token)
+
+
+class FastFrontend:
+    """pure Python front end, selected by --frontend=fast, with the same interface as the ANTLR one"""
+    parse_count: int
+    seconds: float
+
+    def __init__(self):
+        self.parse_count = 0
+        self.seconds = 0.0
+
+    def parse(self, path: str, two_stage: bool = True, profiler=NO_PROFILER) -> Program:
+        # prediction modes are an ANTLR matter
+        start = time.perf_counter()
+        try:
+            with profiler.phase("lex"):
+                with open(path) as file:
+                    parser = Parser(file.read())
+            with profiler.phase("parse"):
+                return parser.program()
+        finally:
+            self.parse_count += 1
+            self.seconds += time.perf_counter() - start
+
+    def print_stats(self):
+        print(f"parse: {self.parse_count} parses, {self.seconds:.3f}s in the fast front end", file=sys.stderr)
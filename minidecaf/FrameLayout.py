@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple
+
+from .CFG import CFG
+from .Dataflow import bits, slot_liveness
+from .IR import Function
+from .RegAlloc import Allocation
+
+
+def layout_frame(func: Function, cfg: CFG, allocation: Allocation) -> Tuple[List[int], int]:
+    """
+    offset of each slot from fp, and the size of the slot area below fp
+    slots whose address is taken keep a place of their own; scalar locals, only read and written by loadslot and
+    storeslot, and spill slots share places when their live intervals do not overlap, packed by linear scan over
+    the instruction positions of the register allocator; slots never accessed get no place
+    """
+    addressed = set()
+    accessed = set()
+    for block in func.blocks:
+        for instr in block.instrs:
+            if instr.op == "addr":
+                addressed.add(instr.imm.index)
+            elif instr.op == "loadslot" or instr.op == "storeslot":
+                accessed.add(instr.imm.index)
+    scalars = {index for index in accessed - addressed if func.slots[index].size == 4}
+    addressed |= accessed - scalars
+
+    intervals: Dict[int, Tuple[int, int]] = dict(allocation.spill_intervals)
+    live_in, live_out = slot_liveness(cfg, scalars)
+    start: Dict[int, int] = {}
+    end: Dict[int, int] = {}
+
+    def extend(index, position):
+        if index not in start:
+            start[index] = end[index] = position
+        elif position < start[index]:
+            start[index] = position
+        elif position > end[index]:
+            end[index] = position
+
+    # the same positions as in allocate: a load reads the slot at 2k, a store writes it at 2k + 1
+    position = 0
+    for b, block in enumerate(func.blocks):
+        for index in bits(live_in[b]):
+            extend(index, position - 1)
+        for instr in block.instrs:
+            if instr.op == "loadslot" and instr.imm.index in scalars:
+                extend(instr.imm.index, position)
+            elif instr.op == "storeslot" and instr.imm.index in scalars:
+                extend(instr.imm.index, position + 1)
+            position += 2
+        for index in bits(live_out[b]):
+            extend(index, position - 1)
+    intervals.update((index, (start[index], end[index])) for index in start)
+
+    offsets = [0] * len(func.slots)
+    offset = 0
+    for index in sorted(addressed):
+        offset -= func.slots[index].size
+        offsets[index] = offset
+    # shared places of 4 bytes, reused once the interval holding them has ended
+    free_places: List[int] = []
+    active: List[Tuple[int, int]] = []  # end and place, ordered by end
+    for index in sorted(intervals, key=lambda i: (intervals[i][0], i)):
+        interval_start, interval_end = intervals[index]
+        while active and active[0][0] < interval_start:
+            free_places.append(active.pop(0)[1])
+        if free_places:
+            place = free_places.pop()
+        else:
+            offset -= 4
+            place = offset
+        offsets[index] = place
+        i = len(active)
+        while i > 0 and active[i - 1][0] > interval_end:
+            i -= 1
+        active.insert(i, (interval_end, place))
+    return offsets, -offset
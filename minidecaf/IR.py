@@ -0,0 +1,110 @@
+from typing import List, Optional, Tuple, Union
+
+# three-address intermediate representation
+# values live in an unlimited set of virtual registers, numbered from 0 in each function;
+# locals live in frame slots, whose offsets are decided by the backend
+
+# ops with a destination register computed from register arguments only, see Instr
+BINARY_OPS = {"add", "sub", "mul", "mulh", "div", "rem", "slt", "sgt", "and", "or", "xor", "sll", "sra"}
+UNARY_OPS = {"neg", "not", "seqz", "snez"}
+IMMEDIATE_OPS = {"addi", "slti", "andi", "ori", "xori", "slli", "srli", "srai"}  # register and immediate arguments
+BRANCH_OPS = {"beqz", "bnez"}
+COMPARE_BRANCH_OPS = {"beq", "bne", "blt", "bge"}  # two register arguments, signed comparison
+NEGATED_BRANCH = {"beqz": "bnez", "bnez": "beqz", "beq": "bne", "bne": "beq", "blt": "bge", "bge": "blt"}
+TERMINATOR_OPS = BRANCH_OPS | COMPARE_BRANCH_OPS | {"j", "ret", "tailcall"}
+# ops without side effects, which can be removed when their result is not used
+PURE_OPS = BINARY_OPS | UNARY_OPS | IMMEDIATE_OPS | {"li", "mv", "la", "addr", "param", "load", "loadslot"}
+
+
+class Slot:
+    __slots__ = ("index", "size")
+
+    def __init__(self, index: int, size: int):
+        self.index = index
+        self.size = size
+
+    def __str__(self):
+        return f"${self.index}"
+
+
+class Instr:
+    """
+    op     opcode, see the sets above and the table below
+    dst    virtual register written, or None
+    args   virtual registers read
+    imm    immediate integer, symbol name (la, call), Slot (addr, loadslot, storeslot) or parameter index (param)
+    labels branch targets, (taken, not taken) for conditional branches
+
+    li dst, imm                  mv dst, a
+    la dst, symbol               addr dst, slot          (address of a frame slot)
+    param dst, index             (only at the beginning of the entry block)
+    load dst, a, offset          store v, a, offset      (memory at a + offset)
+    loadslot dst, slot           storeslot v, slot
+    call dst, function, args...
+    tailcall function, args...   (returns what the call returns, with at most as many args as a0-a7)
+    j label                      beqz a, taken, not_taken
+    blt a, b, taken, not_taken   (and beq, bne, bge)
+    ret a
+    """
+    __slots__ = ("op", "dst", "args", "imm", "labels")
+
+    def __init__(self, op: str, dst: Optional[int] = None, args: Tuple[int, ...] = (),
+                 imm: Union[int, str, Slot, None] = None, labels: Tuple[str, ...] = ()):
+        self.op = op
+        self.dst = dst
+        self.args = args
+        self.imm = imm
+        self.labels = labels
+
+    def __str__(self):
+        operands = [f"%{arg}" for arg in self.args]
+        if self.imm is not None:
+            first = self.op in ("call", "tailcall", "loadslot", "storeslot")
+            operands.insert(0 if first else len(operands), str(self.imm))
+        operands += self.labels
+        text = f"{self.op} {', '.join(operands)}".rstrip()
+        if self.dst is not None:
+            return f"%{self.dst} = {text}"
+        return text
+
+
+class BasicBlock:
+    __slots__ = ("label", "instrs")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.instrs: List[Instr] = []
+
+    def terminated(self) -> bool:
+        return bool(self.instrs) and self.instrs[-1].op in TERMINATOR_OPS
+
+    def successors(self) -> Tuple[str, ...]:
+        return self.instrs[-1].labels if self.terminated() else ()
+
+
+class Function:
+    __slots__ = ("name", "param_count", "blocks", "slots", "reg_count")
+
+    def __init__(self, name: str, param_count: int):
+        self.name = name
+        self.param_count = param_count
+        self.blocks: List[BasicBlock] = []
+        self.slots: List[Slot] = []
+        self.reg_count = 0
+
+    def new_reg(self) -> int:
+        self.reg_count += 1
+        return self.reg_count - 1
+
+    def new_slot(self, size: int) -> Slot:
+        self.slots.append(Slot(len(self.slots), size))
+        return self.slots[-1]
+
+    def __str__(self):
+        lines = [f"function {self.name}({self.param_count}):"]
+        if self.slots:
+            lines.append("\tslots " + ", ".join(f"{slot}[{slot.size}]" for slot in self.slots))
+        for block in self.blocks:
+            lines.append(f"{block.label}:")
+            lines.extend(f"\t{instr}" for instr in block.instrs)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+from typing import Dict, List
+
+from .IR import Function, BasicBlock, Instr, Slot
+
+INLINE_BUDGET = 40  # default size limit of inlined leaf functions, in IR instructions
+GROWTH_LIMIT = 4  # a caller grows by at most this many times its own size, plus the budget
+
+
+def function_size(func: Function) -> int:
+    return sum(1 for block in func.blocks for instr in block.instrs if instr.op != "param")
+
+
+class Inliner:
+    """
+    inlines calls to small functions into the IR of their caller, before the caller is optimized, so that constant
+    arguments are folded into the body; only functions defined before the caller are known, as their optimized IR
+    leaf functions up to the budget are inlined, and those making calls up to half of it, as the frame they still
+    need is kept by the caller; a function calling itself is never inlined, and the caller stops growing once it
+    has grown by GROWTH_LIMIT times its own size plus the budget, whatever the number of call sites
+    the registers and slots of the callee are renumbered after those of the caller, its labels are prefixed, its
+    parameters are moves from the arguments, and each of its returns a move to the result of the call and a jump
+    to the code following the call, or a return of the caller when the call was in tail position, so that the
+    calls in tail position of the callee stay in tail position
+    """
+    budget: int
+    __candidates: Dict[str, Function]  # optimized IR of the functions small enough to be inlined
+    __count: int  # inlined calls, numbering their labels in the whole program
+
+    def __init__(self, budget: int = INLINE_BUDGET):
+        self.budget = budget
+        self.__candidates = {}
+        self.__count = 0
+
+    def add(self, func: Function):
+        # once optimized
+        callees = {instr.imm for block in func.blocks for instr in block.instrs if instr.op in ("call", "tailcall")}
+        if func.name in callees:  # recursive
+            return
+        if function_size(func) <= (self.budget // 2 if callees else self.budget):
+            self.__candidates[func.name] = func
+
+    def run(self, func: Function):
+        if not self.__candidates:
+            return
+        growth = GROWTH_LIMIT * function_size(func) + self.budget
+        i = 0
+        while i < len(func.blocks):  # inlined blocks are visited in turn, for the calls they make
+            block = func.blocks[i]
+            for k, instr in enumerate(block.instrs):
+                callee = self.__candidates.get(instr.imm) if instr.op == "call" else None
+                if callee is not None and callee.name != func.name and function_size(callee) <= growth:
+                    growth -= function_size(callee)
+                    func.blocks[i + 1:i + 1] = self.__inline(func, block, k, callee)
+                    break
+            i += 1
+
+    def __inline(self, func: Function, block: BasicBlock, k: int, callee: Function) -> List[BasicBlock]:
+        # the blocks following block, which is cut at the call k
+        self.__count += 1
+        prefix = f".inline{self.__count}"
+        call = block.instrs[k]
+        following = block.instrs[k + 1:]
+        tail = len(following) == 1 and following[0].op == "ret" and following[0].args == (call.dst,)
+        reg_offset = func.reg_count
+        func.reg_count += callee.reg_count
+        slots = [func.new_slot(slot.size) for slot in callee.slots]
+        continuation = BasicBlock(f"{prefix}.end")
+        continuation.instrs = block.instrs[k + 1:]
+        block.instrs[k:] = [Instr("j", labels=(prefix + callee.blocks[0].label,))]
+        blocks = []
+        for callee_block in callee.blocks:
+            copy = BasicBlock(prefix + callee_block.label)
+            for instr in callee_block.instrs:
+                args = tuple(arg + reg_offset for arg in instr.args)
+                if instr.op == "param":
+                    copy.instrs.append(Instr("mv", instr.dst + reg_offset, (call.args[instr.imm],)))
+                elif instr.op == "ret" and tail:
+                    copy.instrs.append(Instr("ret", None, args))
+                elif instr.op == "ret":
+                    copy.instrs.append(Instr("mv", call.dst, args))
+                    copy.instrs.append(Instr("j", labels=(continuation.label,)))
+                elif instr.op == "tailcall":  # a call again, followed by the return
+                    copy.instrs.append(Instr("call", call.dst, args, instr.imm))
+                    copy.instrs.append(Instr("ret", None, (call.dst,)) if tail
+                                       else Instr("j", labels=(continuation.label,)))
+                else:
+                    dst = None if instr.dst is None else instr.dst + reg_offset
+                    imm = slots[instr.imm.index] if isinstance(instr.imm, Slot) else instr.imm
+                    copy.instrs.append(Instr(instr.op, dst, args, imm, tuple(prefix + label for label in instr.labels)))
+            blocks.append(copy)
+        blocks.append(continuation)
+        return blocks
@@ -0,0 +1,194 @@
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from .IR import Function, Instr, BINARY_OPS
+
+# register-register ops with an immediate form taking the right operand
+IMMEDIATE_FORMS = {"add": "addi", "and": "andi", "or": "ori", "xor": "xori", "slt": "slti", "sll": "slli",
+                   "sra": "srai"}
+COMMUTATIVE_OPS = {"add", "and", "or", "xor", "mul"}
+
+
+def fits_immediate(value: int) -> bool:  # 12-bit signed immediate of I-type instructions
+    return -2048 <= value < 2048
+
+
+def power_of_two(value: int) -> Optional[int]:  # k with value == 2 ** k, if any
+    return value.bit_length() - 1 if value > 0 and value & (value - 1) == 0 else None
+
+
+def division_magic(divisor: int) -> Tuple[int, int]:
+    """
+    magic multiplier and shift of signed 32-bit division by a constant, |divisor| >= 2 (Hacker's Delight, 10-1):
+    n / divisor is the high word of n * multiplier, corrected by n, shifted right, plus one when negative
+    """
+    abs_divisor = abs(divisor)
+    t = 2 ** 31 + (divisor < 0)
+    abs_nc = t - 1 - t % abs_divisor
+    p = 31
+    q1, r1 = divmod(2 ** 31, abs_nc)
+    q2, r2 = divmod(2 ** 31, abs_divisor)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= abs_nc:
+            q1, r1 = q1 + 1, r1 - abs_nc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= abs_divisor:
+            q2, r2 = q2 + 1, r2 - abs_divisor
+        delta = abs_divisor - r2
+        if q1 > delta or q1 == delta and r1 != 0:
+            break
+    multiplier = (q2 + 1) % 2 ** 32
+    if divisor < 0:
+        multiplier = -multiplier % 2 ** 32
+    if multiplier >= 2 ** 31:
+        multiplier -= 2 ** 32
+    return multiplier, p - 32
+
+
+class InstructionSelector:
+    """
+    picks cheaper instructions for the IR of one function, after constant folding:
+    immediate forms (addi, slti, andi, ori, xori, slli, srai) for constant operands that fit, shifts for
+    multiplication and division by powers of two, and multiplication by a magic reciprocal for division by other
+    constants; constants added to an address are moved out of additions and into the offset of loads and stores,
+    so that a subscript with constant parts is one address computation
+    the li instructions left unused are removed by remove_unused_values
+    """
+    __func: Function
+    __single_def: Set[int]
+    __uses: Counter
+    __constants: Dict[int, int]  # registers defined once by li
+    __defs: Dict[int, Instr]  # defining instruction of registers defined once, as selected
+    __instrs: List[Instr]  # selected instructions of the current block
+
+    def __init__(self, func: Function):
+        self.__func = func
+        def_count = Counter(instr.dst for block in func.blocks for instr in block.instrs if instr.dst is not None)
+        self.__single_def = {reg for reg, count in def_count.items() if count == 1}
+        self.__uses = Counter(arg for block in func.blocks for instr in block.instrs for arg in instr.args)
+        self.__constants = {instr.dst: instr.imm for block in func.blocks for instr in block.instrs
+                            if instr.op == "li" and instr.dst in self.__single_def}
+        self.__defs = {}
+        self.__instrs = []
+
+    def run(self):
+        for block in self.__func.blocks:
+            self.__instrs = []
+            for instr in block.instrs:
+                self.__select(instr)
+            block.instrs = self.__instrs
+
+    def __emit(self, op: str, args: Tuple[int, ...] = (), imm=None, dst: Optional[int] = None) -> int:
+        if dst is None:  # a new register, defined once
+            dst = self.__func.new_reg()
+            self.__single_def.add(dst)
+        instr = Instr(op, dst, args, imm)
+        self.__instrs.append(instr)
+        if dst in self.__single_def:
+            self.__defs[dst] = instr
+        return dst
+
+    def __select(self, instr: Instr):
+        op, args = instr.op, instr.args
+        if op in BINARY_OPS and self.__select_binary(instr):
+            return
+        if op in ("load", "store"):  # fold a constant added to the address into the offset
+            address = args[-1]
+            inner = self.__defs.get(address)
+            if inner is not None and inner.op == "addi" and inner.args[0] in self.__single_def \
+                    and fits_immediate(instr.imm + inner.imm):
+                instr = Instr(op, instr.dst, args[:-1] + inner.args, instr.imm + inner.imm)
+        self.__instrs.append(instr)
+        if instr.dst in self.__single_def:
+            self.__defs[instr.dst] = instr
+
+    def __select_binary(self, instr: Instr) -> bool:
+        # whether instr was replaced
+        op, dst, (lhs, rhs) = instr.op, instr.dst, instr.args
+        constants = self.__constants
+        if op in COMMUTATIVE_OPS and lhs in constants and rhs not in constants:
+            lhs, rhs = rhs, lhs
+        if op == "sgt" and lhs in constants and rhs not in constants:  # c > x is x < c
+            op, lhs, rhs = "slt", rhs, lhs
+        value = constants.get(rhs)
+        if value is None or lhs in constants:  # both constant when folding is disabled
+            return op == "add" and self.__reassociate(dst, lhs, rhs)
+        if op == "sub" and fits_immediate(-value):
+            op, value = "add", -value
+        if op in ("sll", "sra"):
+            self.__emit(IMMEDIATE_FORMS[op], (lhs,), value & 31, dst)
+        elif op in IMMEDIATE_FORMS and fits_immediate(value):
+            if op == "add" and self.__reassociate(dst, lhs, None, value):
+                return True
+            self.__emit(IMMEDIATE_FORMS[op], (lhs,), value, dst)
+        elif op == "mul":
+            return self.__multiply(dst, lhs, value)
+        elif op in ("div", "rem") and abs(value) >= 2:
+            self.__divide(op, dst, lhs, value)
+        else:
+            return False
+        return True
+
+    def __reassociate(self, dst: int, lhs: int, rhs: Optional[int], value: int = 0) -> bool:
+        # (x + c) + y is (x + y) + c, so that constants end up in the last addition, then in an offset
+        for reg, other in ((lhs, rhs), (rhs, lhs)):
+            inner = self.__defs.get(reg)
+            if inner is not None and inner.op == "addi" and self.__uses[reg] == 1 \
+                    and inner.args[0] in self.__single_def and fits_immediate(inner.imm + value):
+                total = inner.args[0] if other is None else self.__emit("add", (inner.args[0], other))
+                self.__emit("addi", (total,), inner.imm + value, dst)
+                return True
+        return False
+
+    def __multiply(self, dst: int, lhs: int, value: int) -> bool:
+        shift = power_of_two(abs(value))
+        if shift is None or value == 1:
+            return False
+        if value > 0:
+            self.__emit("slli", (lhs,), shift, dst)
+        elif shift == 0:
+            self.__emit("neg", (lhs,), dst=dst)
+        else:
+            self.__emit("neg", (self.__emit("slli", (lhs,), shift),), dst=dst)
+        return True
+
+    def __divide(self, op: str, dst: int, lhs: int, value: int):
+        # rounding toward zero, as div and rem do; the remainder is lhs - quotient * value
+        shift = power_of_two(abs(value))
+        if shift is not None:
+            # negative dividends are biased by |value| - 1 first
+            sign = lhs if shift == 1 else self.__emit("srai", (lhs,), 31)
+            biased = self.__emit("add", (lhs, self.__emit("srli", (sign,), 32 - shift)))
+            if op == "rem":
+                mask = -(1 << shift)
+                if fits_immediate(mask):
+                    truncated = self.__emit("andi", (biased,), mask)
+                else:
+                    truncated = self.__emit("and", (biased, self.__emit("li", imm=mask)))
+                self.__emit("sub", (lhs, truncated), dst=dst)
+            elif value > 0:
+                self.__emit("srai", (biased,), shift, dst)
+            else:
+                self.__emit("neg", (self.__emit("srai", (biased,), shift),), dst=dst)
+            return
+        multiplier, shift = division_magic(value)
+        quotient = self.__emit("mulh", (lhs, self.__emit("li", imm=multiplier)))
+        if value > 0 > multiplier:
+            quotient = self.__emit("add", (quotient, lhs))
+        elif value < 0 < multiplier:
+            quotient = self.__emit("sub", (quotient, lhs))
+        if shift:
+            quotient = self.__emit("srai", (quotient,), shift)
+        sign = self.__emit("srli", (quotient,), 31)
+        if op == "div":
+            self.__emit("add", (quotient, sign), dst=dst)
+        else:
+            quotient = self.__emit("add", (quotient, sign))
+            product = self.__emit("mul", (quotient, self.__emit("li", imm=value)))
+            self.__emit("sub", (lhs, product), dst=dst)
+
+
+def select_instructions(func: Function):
+    InstructionSelector(func).run()
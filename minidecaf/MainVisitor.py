@@ -1,36 +1,143 @@
-from typing import List, Dict
-
-from antlr4.tree.Tree import TerminalNodeImpl
-
+from __future__ import annotations
+
+from typing import Any, Callable, List, Dict, Optional, Set, TextIO, Tuple, TYPE_CHECKING
+
+from .Backend import RiscvBackend, IRPrinter
+from .ConstFold import fold_constants, remove_unused_values
+from .DeadCode import remove_unreachable_blocks, forward_stores, remove_dead_stores
+from .Inliner import Inliner, INLINE_BUDGET
+from .InstrSelect import select_instructions
+from .Emitter import Emitter
+from .IR import Function, BasicBlock, Instr, Slot
+from .Peephole import Peephole
+from .Profiler import NO_PROFILER
+from .TailCall import loop_self_tail_calls, mark_tail_calls
 from .Symbol import Symbol, SymbolTable
 from .Type import NoType, IntType, MiniDecafType, FuncType, ValueCategory, PointerType, ArrayType
-from .constants import UNOPR2ASM, BIOPR2ASM
-from .generated.MiniDecafParser import MiniDecafParser
-from .generated.MiniDecafVisitor import MiniDecafVisitor
+from .constants import UNOPR2IR, BIOPR2IR, COMPARE_BRANCHES
+
+if TYPE_CHECKING:  # the fast front end runs without antlr4
+    from antlr4.tree.Tree import TerminalNodeImpl
+    from .generated.MiniDecafParser import MiniDecafParser
+
+
+class LogicalProbe:
+    """
+    finds whether a condition is a || or && chain, a ! or a comparison, through parentheses and the single-child
+    rules of the ANTLR tree, without visiting anything; the trees dispatch to it like to MainVisitor, other nodes
+    answer None
+    """
+
+    def visitExpression(self, ctx):
+        return ctx.conditional().accept(self) if len(ctx.children) == 1 else None
+
+    def visitConditional(self, ctx):
+        return ctx.logicalOr().accept(self) if len(ctx.children) == 1 else None
+
+    def visitLogicalOr(self, ctx):
+        return ("||", ctx) if len(ctx.children) > 1 else ctx.logicalAnd().accept(self)
+
+    def visitLogicalAnd(self, ctx):
+        return ("&&", ctx) if len(ctx.children) > 1 else ctx.equality().accept(self)
+
+    def visitEquality(self, ctx):
+        return (ctx.children[1].getText(), ctx) if len(ctx.children) > 1 else ctx.relational().accept(self)
+
+    def visitRelational(self, ctx):
+        return (ctx.children[1].getText(), ctx) if len(ctx.children) > 1 else ctx.additive().accept(self)
+
+    def visitOpUnary(self, ctx):
+        return ("!", ctx) if ctx.children[0].getText() == '!' else None
+
+    def visitParenthesizedPrimary(self, ctx):
+        return ctx.expression().accept(self)
+
+    def visitChildren(self, ctx):  # what ANTLR trees call for visit methods a visitor lacks
+        return None
+
+    def __single_child(self, ctx):
+        return ctx.children[0].accept(self) if len(ctx.children) == 1 else None
+
+    visitAdditive = visitMultiplicative = __single_child
+    visitPostfixUnary = visitPrimaryPostfix = __single_child  # only in the ANTLR tree
 
+    def __getattr__(self, name):  # the visit methods of the other nodes
+        return self.visitChildren
 
-class MainVisitor(MiniDecafVisitor):
+
+LOGICAL_PROBE = LogicalProbe()
+
+
+class SingleChildProbe:
+    """
+    the node inside a rule with a single child, or inside parentheses, one level at a time, so that the visitor
+    steps down the rules between an expression and its operators in a loop instead of a visit method per rule;
+    other nodes answer None
+    """
+
+    def visitParenthesizedPrimary(self, ctx):
+        return ctx.expression()
+
+    def visitChildren(self, ctx):
+        return None
+
+    def __single_child(self, ctx):
+        return ctx.children[0] if len(ctx.children) == 1 else None
+
+    visitExpression = visitConditional = visitLogicalOr = visitLogicalAnd = __single_child
+    visitEquality = visitRelational = visitAdditive = visitMultiplicative = __single_child
+    visitPostfixUnary = visitPrimaryPostfix = __single_child  # only in the ANTLR tree
+
+    def __getattr__(self, name):
+        return self.visitChildren
+
+
+SINGLE_CHILD_PROBE = SingleChildProbe()
+
+
+class MainVisitor:
+    """
+    compiles a parse tree of the ANTLR front end, or an Ast tree of the fast front end, which has the same accessors
+    """
     declare_global_var_dict: Dict[str, MiniDecafType]
     init_global_var_dict: Dict[str, MiniDecafType]
+    init_global_value_dict: Dict[str, str]
     define_func_dict: Dict[str, FuncType]
     declare_func_dict: Dict[str, FuncType]
 
     class FunctionInfo:
         name: str
+        ir: Function
+        block: BasicBlock  # block being appended to
+        value_stack: List[int]  # registers holding the values of visited expressions
+        slot_addr_dict: Dict[int, Slot]  # registers holding the address of a frame slot
+        free_slots: Dict[int, List[Slot]]  # size: slots of the arrays of closed scopes, for later siblings
 
         def __init__(self, name):
             self.name = name
-            self.local_var_count = 0
+            self.ir = Function(name, 0)
+            self.block = BasicBlock(f".entry.{name}")
+            self.ir.blocks.append(self.block)
+            self.value_stack = []
+            self.slot_addr_dict = {}
+            self.free_slots = {}
 
     current_function: FunctionInfo
 
-    def __init__(self):
+    def __init__(self, sink: Optional[TextIO] = None, emit_ir: bool = False, peephole: Optional[Peephole] = None,
+                 profiler=NO_PROFILER, inline_budget: int = INLINE_BUDGET):
         self.contains_main = False
-        self.asm_str = ""
+        self.profiler = profiler
+        self.emitter = Emitter(sink)  # with a sink, each function is written out once it is finished
+        self.streaming = sink is not None
+        self.backend = IRPrinter(self.emitter) if emit_ir else RiscvBackend(self.emitter, peephole)
         self.symbol_table = SymbolTable()
+        self.inliner = Inliner(inline_budget)
         # statement count use for label numbering
         self.condition_count = 0
         self.loop_count = 0
+        self.unreachable_count = 0
+        self.logic_count = 0
 
         self.loop_stack = []  # loop number stack for break and continue
         # function dict
@@ -39,13 +146,28 @@ class MainVisitor(MiniDecafVisitor):
         # global var dict
         self.declare_global_var_dict = {}
         self.init_global_var_dict = {}
+        self.init_global_value_dict = {}
+        # call graph, over the defined functions: callees of each one
+        self.call_graph: Dict[str, Set[str]] = {}
+        self.func_texts: Dict[str, str] = {}  # text of the functions defined, in order, unless streaming
+
+    def visit(self, tree):
+        return tree.accept(self)
+
+    def visitTerminal(self, node) -> MiniDecafType:  # EOF of the ANTLR tree
+        return NoType()
+
+    def visitBlockItem(self, ctx: MiniDecafParser.BlockItemContext) -> MiniDecafType:  # only in the ANTLR tree
+        return self.visit(ctx.getChild(0))
 
     def visitProgram(self, ctx: MiniDecafParser.ProgramContext) -> MiniDecafType:
         for child in ctx.children:
             self.visit(child)
+        for name in self.__reachable_funcs():
+            self.backend.emit_text(self.func_texts[name])
+        # globals go after all functions, so that functions can be streamed out as soon as they are done
         for name, var_type in self.declare_global_var_dict.items():
-            if name not in self.init_global_var_dict:
-                self.asm_str += f"\t.comm {name}, {var_type.get_size()}, 4\n"
+            self.backend.emit_global(name, var_type.get_size(), self.init_global_value_dict.get(name))
         if not self.contains_main:
             raise Exception("No main function.")
         return NoType()
@@ -66,9 +188,6 @@ class MainVisitor(MiniDecafVisitor):
             raise Exception(f"{self.current_function.name} is already defined as a global variable.")
         if self.current_function.name == "main":
             self.contains_main = True
-        self.asm_str += (f"\t.text\n"  # .text notation
-                         f"\t.global {self.current_function.name}\n"  # global label
-                         f"{self.current_function.name}:\n")  # label name
         # add func type
         if self.current_function.name in self.define_func_dict:
             raise Exception(f"Redefine function {self.current_function.name}.")
@@ -78,50 +197,60 @@ class MainVisitor(MiniDecafVisitor):
         self.declare_func_dict[self.current_function.name] = func_type
         self.define_func_dict[self.current_function.name] = func_type
 
-        self.asm_str += "# function prologue\n"
-        self.__push('ra')
-        self.__push('fp')
-        self.asm_str += "\tmv fp, sp\n"
-        prologue_end = len(self.asm_str)
         # new scope
         self.symbol_table.add_scope()
-        # get parameters
+        # get parameters, and copy them into frame slots like local variables
+        self.current_function.ir.param_count = len(func_type.para_types)
+        param_regs = [self.__emit_value("param", imm=i) for i in range(len(func_type.para_types))]
         for i in range(1, len(ctx.Identifier())):
             para_name = ctx.Identifier(i).getText()
             if self.symbol_table.lookup_top(para_name) is not None:
                 raise Exception(f"Two parameters named as {para_name}.")
-            if i < 9:  # load a[i-1] into stack
-                self.current_function.local_var_count += 1
-                self.asm_str += f"\tsw a{i - 1}, {-4 * i}(fp)\n"
-                self.symbol_table.add_symbol(
-                    Symbol(para_name, -4 * i,
-                           func_type.para_types[i - 1].value_category_cast(ValueCategory.lvalue)))
-            else:  # currently in stack above ra and fp
-                self.symbol_table.add_symbol(
-                    Symbol(para_name, 4 * (i - 9 + 2),
-                           func_type.para_types[i - 1].value_category_cast(ValueCategory.lvalue)))
+            slot = self.current_function.ir.new_slot(4)
+            self.__emit("storeslot", (param_regs[i - 1],), slot)
+            self.symbol_table.add_symbol(
+                Symbol(para_name, slot, func_type.para_types[i - 1].value_category_cast(ValueCategory.lvalue)))
 
         # begin visiting
-        for block_item in ctx.blockItem():
-            self.visit(block_item)
+        self.__visit_block_items(ctx.blockItem())
         # pop scope
         self.symbol_table.pop_scope()
-        # stack space for local var
-        self.asm_str = (self.asm_str[:prologue_end] +
-                        f"\taddi sp, sp, {-4 * self.current_function.local_var_count}\n"
-                        f"# prologue end\n" +
-                        self.asm_str[prologue_end:])
-        self.asm_str += "# return 0 as default\n"
-        self.__push("zero")
-        self.asm_str += (f"# epilogue\n"
-                         f".exit.{self.current_function.name}:\n"
-                         f"\tlw a0, 0(sp)\n"
-                         f"\tmv sp, fp\n")
-        self.__pop("fp")
-        self.__pop("ra")
-        self.asm_str += "\tret\n\n"
+        if not self.current_function.block.terminated():  # return 0 as default
+            self.__emit("ret", (self.__emit_value("li", imm=0),))
+        with self.profiler.phase("optimize"):
+            self.inliner.run(self.current_function.ir)
+            loop_self_tail_calls(self.current_function.ir)  # those of the inlined functions included
+            fold_constants(self.current_function.ir)
+            remove_unreachable_blocks(self.current_function.ir)
+            select_instructions(self.current_function.ir)
+            remove_unused_values(self.current_function.ir)  # with addresses only used by loadslot/storeslot
+            forward_stores(self.current_function.ir)
+            remove_dead_stores(self.current_function.ir)
+            mark_tail_calls(self.current_function.ir)
+        ir = self.current_function.ir
+        self.inliner.add(ir)
+        self.call_graph[ir.name] = {instr.imm for block in ir.blocks for instr in block.instrs
+                                    if instr.op in ("call", "tailcall")}
+        with self.profiler.phase("codegen"):
+            text = self.backend.function_text(ir)
+        if self.streaming:  # written out right away, so that memory does not grow with the program
+            self.backend.emit_text(text)
+        else:
+            self.func_texts[ir.name] = text
         return NoType()
 
+    def __reachable_funcs(self) -> List[str]:
+        # the functions kept for the end of the program that are reachable from main through the calls left after
+        # optimization, in the order they are defined; the ones never called are not emitted at all
+        reachable = set()
+        worklist = ["main"] if "main" in self.func_texts else []
+        while worklist:
+            name = worklist.pop()
+            if name not in reachable:
+                reachable.add(name)
+                worklist.extend(callee for callee in self.call_graph[name] if callee in self.func_texts)
+        return [name for name in self.func_texts if name in reachable]
+
     def visitGlobalIntOrPointer(self, ctx: MiniDecafParser.GlobalIntOrPointerContext) -> MiniDecafType:
         var_name = ctx.Identifier().getText()
         if var_name in self.declare_func_dict:
@@ -130,16 +259,14 @@ class MainVisitor(MiniDecafVisitor):
         if self.declare_global_var_dict.get(var_name, var_type) != var_type:
             raise Exception(f"{var_name} is already defined with a different type.")
         self.declare_global_var_dict[var_name] = var_type.value_category_cast(ValueCategory.lvalue)
+        self.symbol_table.add_symbol(Symbol(var_name, None, self.declare_global_var_dict[var_name]))
 
         num = ctx.Integer()
         if num is not None:
             if var_name in self.init_global_var_dict:
                 raise Exception(f"{var_name} is already initialized")
             self.init_global_var_dict[var_name] = var_type.value_category_cast(ValueCategory.rvalue)
-            self.asm_str += ("\t.data\n"
-                             "\t.align 4\n"
-                             f"{var_name}:\n"
-                             f"\t.word {num.getText()}\n")
+            self.init_global_value_dict[var_name] = num.getText()
         return NoType()
 
     def visitGlobalArray(self, ctx: MiniDecafParser.GlobalArrayContext) -> MiniDecafType:
@@ -150,17 +277,15 @@ class MainVisitor(MiniDecafVisitor):
         if self.declare_global_var_dict.get(arr_name, arr_type) != arr_type:
             raise Exception(f"{arr_name} is already defined with a different type.")
         self.declare_global_var_dict[arr_name] = arr_type
+        self.symbol_table.add_symbol(Symbol(arr_name, None, arr_type))
         return NoType()
 
     def visitIntOrPointerDecl(self, ctx: MiniDecafParser.IntOrPointerDeclContext) -> MiniDecafType:
         name: str = ctx.Identifier().getText()
         if self.symbol_table.lookup_top(name) is not None:
             raise Exception(f"Redefine variable {name}.")
-        self.current_function.local_var_count += 1
         var_type: MiniDecafType = self.visit(ctx.varType())
-        symbol = Symbol(
-            name, -4 * self.current_function.local_var_count, var_type.value_category_cast(ValueCategory.lvalue)
-        )
+        symbol = Symbol(name, self.current_function.ir.new_slot(4), var_type.value_category_cast(ValueCategory.lvalue))
         self.symbol_table.add_symbol(symbol)
         # initialize
         expression = ctx.expression()
@@ -168,8 +293,7 @@ class MainVisitor(MiniDecafVisitor):
             expression_type = self.__type_check(self.visit(expression))
             if not expression_type == var_type:
                 raise Exception(f"Assign {expression_type} to {var_type} variable {name}.")
-            self.__pop('t0')
-            self.__write_local_var(symbol)
+            self.__emit("storeslot", (self.__pop(),), symbol.slot)
         return NoType()
 
     def visitArrayDecl(self, ctx: MiniDecafParser.ArrayDeclContext) -> MiniDecafType:
@@ -177,8 +301,7 @@ class MainVisitor(MiniDecafVisitor):
         if self.symbol_table.lookup_top(arr_name) is not None:
             raise Exception(f"Redefine variable {arr_name}.")
         arr_type = self.__get_arr_type(ctx, arr_name)
-        self.current_function.local_var_count += arr_type.get_size() // 4
-        symbol = Symbol(arr_name, -4 * self.current_function.local_var_count, arr_type)
+        symbol = Symbol(arr_name, self.__new_array_slot(arr_type.get_size()), arr_type)
         self.symbol_table.add_symbol(symbol)
         return NoType()
 
@@ -186,7 +309,7 @@ class MainVisitor(MiniDecafVisitor):
         expresion = ctx.expression()
         if expresion is not None:
             self.visit(ctx.expression())
-            self.__pop('t0')  # expression won't be used again
+            self.__pop()  # expression won't be used again
         return NoType()
 
     def visitRetStatement(self, ctx: MiniDecafParser.RetStatementContext) -> MiniDecafType:
@@ -194,255 +317,157 @@ class MainVisitor(MiniDecafVisitor):
         expected_type = self.define_func_dict[self.current_function.name].ret_type
         if expected_type != return_type:
             raise Exception(f"Return {return_type} instead of {expected_type} in signature")
-        self.asm_str += f"\tj .exit.{self.current_function.name}\n"
+        self.__emit("ret", (self.__pop(),))
         return NoType()
 
     def visitIfStatement(self, ctx: MiniDecafParser.IfStatementContext) -> MiniDecafType:
         cur_conditional_count = self.condition_count  # self.conditional_count may change during visiting
         self.condition_count += 1
 
-        self.asm_str += f"# the {cur_conditional_count}th conditional (if)\n"
-        self.__type_check(self.visit(ctx.expression()), IntType)
-        self.__pop("t0")
-        self.asm_str += (f"\tbeqz t0, .else{cur_conditional_count}\n"
-                         f"# then\n")
+        self.__visit_condition(ctx.expression(), f".then{cur_conditional_count}", f".else{cur_conditional_count}")
+        self.__label(f".then{cur_conditional_count}")
         self.visit(ctx.statement(0))
-        self.asm_str += (f"\tj .ifEnd{cur_conditional_count}\n"
-                         f".else{cur_conditional_count}:\n")
+        self.__emit("j", labels=(f".ifEnd{cur_conditional_count}",))
+        self.__label(f".else{cur_conditional_count}")
         if len(ctx.statement()) > 1:  # with else statement
             self.visit(ctx.statement(1))
-        self.asm_str += f".ifEnd{cur_conditional_count}:\n"
+        self.__label(f".ifEnd{cur_conditional_count}")
         return NoType()
 
     def visitBlockStatement(self, ctx: MiniDecafParser.BlockStatementContext) -> MiniDecafType:
         self.symbol_table.add_scope()
-        for block_item in ctx.blockItem():
-            self.visit(block_item)
-        self.symbol_table.pop_scope()
+        self.__visit_block_items(ctx.blockItem())
+        self.__pop_scope()
         return NoType()
 
     def visitWhileStatement(self, ctx: MiniDecafParser.WhileStatementContext) -> MiniDecafType:
         cur_loop_count = self.loop_count
         self.loop_count += 1
-        self.asm_str += (f"# the {cur_loop_count} loop (while)\n"
-                         f".continue{cur_loop_count}:\n")
-        self.__type_check(self.visit(ctx.expression()), IntType)
-        self.__pop('t0')
-        self.asm_str += f"\tbeqz t0, .loopEnd{cur_loop_count}\n"
+        self.__label(f".continue{cur_loop_count}")
+        self.__visit_condition(ctx.expression(), f".loopBody{cur_loop_count}", f".loopEnd{cur_loop_count}")
+        self.__label(f".loopBody{cur_loop_count}")
         self.loop_stack.append(cur_loop_count)
         self.visit(ctx.statement())
         self.loop_stack.pop()
-        self.asm_str += f"\tj .continue{cur_loop_count}\n" \
-                        f".loopEnd{cur_loop_count}:\n"
+        self.__emit("j", labels=(f".continue{cur_loop_count}",))
+        self.__label(f".loopEnd{cur_loop_count}")
         return NoType()
 
     def visitForStatement(self, ctx: MiniDecafParser.ForStatementContext) -> MiniDecafType:
         cur_loop_count = self.loop_count
         self.loop_count += 1
         semicolon_count = 0  # count semicolon to determine expression position
-        self.asm_str += f"# the {cur_loop_count} loop (for)\n"
         for_expression: List[MiniDecafParser.ExpressionContext] = [None] * 3
-        for child in ctx.children:
-            if ';' in child.getText():
-                semicolon_count += 1
-            if isinstance(child, MiniDecafParser.ExpressionContext):
+        expressions = ctx.expression()
+        for child in ctx.children[2:-2]:  # between the parentheses
+            if child in expressions:
                 for_expression[semicolon_count] = child
+            else:  # ';', or a declaration ending with its own ';'
+                semicolon_count += 1
         self.symbol_table.add_scope()
         if for_expression[0] is not None:  # init with expression
             self.visit(for_expression[0])
-            self.__pop('t0')  # expression won't be used again
+            self.__pop()  # expression won't be used again
         if ctx.declaration() is not None:  # init with declaration
             self.visit(ctx.declaration())
-        self.asm_str += f".loopBegin{cur_loop_count}:\n"
+        self.__label(f".loopBegin{cur_loop_count}")
         if for_expression[1] is not None:  # condition
-            self.__type_check(self.visit(for_expression[1]), IntType)
-            self.__pop('t1')
-            self.asm_str += f"beqz t1, .loopEnd{cur_loop_count}\n"
+            self.__visit_condition(for_expression[1], f".loopBody{cur_loop_count}", f".loopEnd{cur_loop_count}")
+            self.__label(f".loopBody{cur_loop_count}")
         self.loop_stack.append(cur_loop_count)
         self.symbol_table.add_scope()
         self.visit(ctx.statement())
-        self.symbol_table.pop_scope()
+        self.__pop_scope()
         self.loop_stack.pop()
         # if continue. run increment and go to condition
-        self.asm_str += f".continue{cur_loop_count}:\n"
+        self.__label(f".continue{cur_loop_count}")
         if for_expression[2] is not None:  # increment
             self.visit(for_expression[2])
-            self.__pop('t0')
-        self.symbol_table.pop_scope()
-        self.asm_str += f"\tj .loopBegin{cur_loop_count}\n" \
-                        f".loopEnd{cur_loop_count}:\n"
+            self.__pop()
+        self.__pop_scope()
+        self.__emit("j", labels=(f".loopBegin{cur_loop_count}",))
+        self.__label(f".loopEnd{cur_loop_count}")
         return NoType()
 
     def visitDoWhileStatement(self, ctx: MiniDecafParser.DoWhileStatementContext) -> MiniDecafType:
         cur_loop_count = self.loop_count
         self.loop_count += 1
-        self.asm_str += f"# the {cur_loop_count} loop (do while)\n"
-        self.asm_str += f".loopBegin{cur_loop_count}:\n"
+        self.__label(f".loopBegin{cur_loop_count}")
         self.loop_stack.append(cur_loop_count)
         self.visit(ctx.statement())
         self.loop_stack.pop()
-        self.asm_str += f".continue{cur_loop_count}:\n"
-        self.__type_check(self.visit(ctx.expression()), IntType)
-        self.__pop('t0')  # expression won't be used again
-        self.asm_str += f"\tbnez t0, .loopBegin{cur_loop_count}\n" \
-                        f".loopEnd{cur_loop_count}:\n"
+        self.__label(f".continue{cur_loop_count}")
+        self.__visit_condition(ctx.expression(), f".loopBegin{cur_loop_count}", f".loopEnd{cur_loop_count}")
+        self.__label(f".loopEnd{cur_loop_count}")
         return NoType()
 
     def visitBreakStatement(self, ctx: MiniDecafParser.BreakStatementContext) -> MiniDecafType:
         if not self.loop_stack:
             raise Exception("Break statement is not in any loop.")
-        self.asm_str += (f"# break\n"
-                         f"\tj .loopEnd{self.loop_stack[-1]}\n")
+        self.__emit("j", labels=(f".loopEnd{self.loop_stack[-1]}",))
         return NoType()
 
     def visitContinueStatement(self, ctx: MiniDecafParser.ContinueStatementContext) -> MiniDecafType:
         if not self.loop_stack:
             raise Exception("Continue statement is not in any loop.")
-        self.asm_str += (f"# contine\n"
-                         f"\tj .continue{self.loop_stack[-1]}\n")
+        self.__emit("j", labels=(f".continue{self.loop_stack[-1]}",))
         return NoType()
 
     def visitExpression(self, ctx: MiniDecafParser.ExpressionContext) -> MiniDecafType:
         if len(ctx.children) == 1:  # conditional
-            return self.visit(ctx.conditional())
+            return self.visit(self.__innermost(ctx))
         # ident = expression
         unary_type = self.__type_check(self.visit(ctx.unary()), MiniDecafType, ValueCategory.lvalue)
         expr_type = self.__type_check(self.visit(ctx.expression()))
         if expr_type != unary_type.value_category_cast(ValueCategory.rvalue):
             raise Exception(f"Assign {expr_type} to {unary_type} variable")
-        self.__pop('t1')  # expr value
-        self.__pop('t0')  # unary addr
-        self.asm_str += (f"# assign\n"
-                         f"\tsw t1, 0(t0)\n")
-        self.__push('t0')
+        value = self.__pop()
+        addr = self.__pop()
+        if addr in self.current_function.slot_addr_dict:
+            self.__emit("storeslot", (value,), self.current_function.slot_addr_dict[addr])
+        else:
+            self.__emit("store", (value, addr), 0)
+        self.__push(addr)
         return unary_type
 
     def visitConditional(self, ctx: MiniDecafParser.ConditionalContext) -> MiniDecafType:
         if len(ctx.children) == 1:  # or
-            return self.visit(ctx.logicalOr())
+            return self.visit(self.__innermost(ctx))
         # ternary
         cur_conditional_count = self.condition_count
         self.condition_count += 1
-        self.asm_str += f"# the {cur_conditional_count}th conditional (ternary)\n"
-        self.__type_check(self.visit(ctx.logicalOr()), IntType)
-        self.__pop('t0')
-        self.asm_str += f"\tbeqz t0, .else{cur_conditional_count}\n"
+        self.__visit_condition(ctx.logicalOr(), f".then{cur_conditional_count}", f".else{cur_conditional_count}")
+        self.__label(f".then{cur_conditional_count}")
         ten_true_type = self.__type_check(self.visit(ctx.expression()))
-        self.asm_str += f"\tj .terEnd{cur_conditional_count}\n" \
-                        f".else{cur_conditional_count}:\n"
+        result = self.current_function.ir.new_reg()  # both branches move their value here
+        self.__emit("mv", (self.__pop(),), dst=result)
+        self.__emit("j", labels=(f".terEnd{cur_conditional_count}",))
+        self.__label(f".else{cur_conditional_count}")
         ten_false_type = self.__type_check(self.visit(ctx.conditional()))
-        self.asm_str += f".terEnd{cur_conditional_count}:\n"
+        self.__emit("mv", (self.__pop(),), dst=result)
+        self.__label(f".terEnd{cur_conditional_count}")
+        self.__push(result)
         if ten_false_type != ten_true_type:
             raise Exception("Ternary operator with two different result type.")
         return ten_false_type
 
     def visitLogicalOr(self, ctx: MiniDecafParser.LogicalOrContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # or || and
-            self.__type_check(self.visit(ctx.logicalOr()), IntType)
-            self.__type_check(self.visit(ctx.logicalAnd()), IntType)
-            self.__logic_operation('or')
-            return IntType()
-        else:  # and
-            return self.visit(ctx.logicalAnd())
+        return self.__visit_logical(ctx, "bnez")
 
     def visitLogicalAnd(self, ctx: MiniDecafParser.LogicalAndContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # and || equ
-            self.__type_check(self.visit(ctx.logicalAnd()), IntType)
-            self.__type_check(self.visit(ctx.equality()), IntType)
-            self.__logic_operation('and')
-            return IntType()
-        else:  # equ
-            return self.visit(ctx.equality())
+        return self.__visit_logical(ctx, "beqz")
 
     def visitEquality(self, ctx: MiniDecafParser.EqualityContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # equ op rel
-            equ_type = self.__type_check(self.visit(ctx.equality()))
-            rel_type = self.__type_check(self.visit(ctx.relational()))
-            if equ_type != rel_type:
-                raise Exception("Equality operator with different type.")
-            if isinstance(equ_type, ArrayType):
-                raise Exception("Equality operator with array type.")
-            self.__pop('t1')
-            self.__pop('t0')
-            operator: str = ctx.children[1].getText()
-            self.asm_str += (f"# calculate {operator}\n"
-                             f"\t{BIOPR2ASM['-']}\n"  # t0 = t0 - t1
-                             f"\t{BIOPR2ASM[operator]}\n")
-            self.__push('t0')
-            return IntType()
-        else:  # rel
-            return self.visit(ctx.relational())
+        return self.__visit_left_recursive(ctx, self.__equality)
 
     def visitRelational(self, ctx: MiniDecafParser.RelationalContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # rel op add
-            self.__type_check(self.visit(ctx.relational()), IntType)
-            self.__type_check(self.visit(ctx.additive()), IntType)
-            self.__pop('t1')
-            self.__pop('t0')
-            operator: str = ctx.children[1].getText()
-            self.asm_str += (f"# calculate {operator}\n"
-                             f"\t{BIOPR2ASM[operator]}\n")
-            self.__push('t0')
-            return IntType()
-        else:  # add
-            return self.visit(ctx.additive())
+        return self.__visit_left_recursive(ctx, self.__relational)
 
     def visitAdditive(self, ctx: MiniDecafParser.AdditiveContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # add op mul
-            left_type = self.__type_check(self.visit(ctx.additive()))
-            right_type = self.__type_check(self.visit(ctx.multiplicative()))
-            self.__pop('t1')
-            self.__pop('t0')
-            operator: str = ctx.children[1].getText()
-            ret_type: MiniDecafType = IntType()
-            additional_asm = ""
-            if operator == '+':
-                if isinstance(left_type, IntType) and isinstance(right_type, IntType):
-                    self.asm_str += f"# calculate int + int\n"
-                    ret_type = IntType()
-                elif isinstance(left_type, PointerType) and isinstance(right_type, IntType):
-                    self.asm_str += (f"# pointer + int\n"
-                                     f"\tslli t1, t1, 2\n")
-                    ret_type = left_type
-                elif isinstance(left_type, IntType) and isinstance(right_type, PointerType):
-                    self.asm_str += (f"# int + pointer\n"
-                                     f"\tslli t0, t0, 2\n")
-                    ret_type = right_type
-                else:
-                    raise Exception(f"Illegal type for addition: {left_type}, {right_type}.")
-            else:
-                if isinstance(left_type, IntType) and isinstance(right_type, IntType):
-                    self.asm_str += f"# calculate int - int\n"
-                    ret_type = IntType()
-                elif isinstance(left_type, PointerType) and isinstance(right_type, IntType):
-                    self.asm_str += (f"# pointer - int\n"
-                                     f"\tslli t1, t1, 2\n")
-                    ret_type = left_type
-                elif isinstance(left_type, PointerType) and right_type == left_type:
-                    self.asm_str += f"# pointer - pointer\n"
-                    additional_asm = "\tsrai t0, t0, 2\n"
-                    ret_type = IntType()
-                else:
-                    raise Exception(f"Illegal type for subtraction: {left_type}, {right_type}.")
-            self.asm_str += f"\t{BIOPR2ASM[operator]}\n{additional_asm}"
-            self.__push("t0")
-            return ret_type
-        else:  # mul
-            return self.visit(ctx.multiplicative())
+        return self.__visit_left_recursive(ctx, self.__additive)
 
     def visitMultiplicative(self, ctx: MiniDecafParser.MultiplicativeContext) -> MiniDecafType:
-        if len(ctx.children) > 1:  # mul op una
-            self.__type_check(self.visit(ctx.multiplicative()), IntType)
-            self.__type_check(self.visit(ctx.unary()), IntType)
-            operator: str = ctx.children[1].getText()
-            self.__pop('t1')
-            self.__pop('t0')
-            self.asm_str += (f"# calculate {operator}\n"
-                             f"\t{BIOPR2ASM[operator]}\n")
-            self.__push("t0")
-            return IntType()
-        else:  # una
-            return self.visit(ctx.unary())
+        return self.__visit_left_recursive(ctx, self.__multiplicative)
 
     def visitOpUnary(self, ctx: MiniDecafParser.OpUnaryContext) -> MiniDecafType:
         var_type: MiniDecafType = self.visit(ctx.unary())
@@ -453,10 +478,7 @@ class MainVisitor(MiniDecafVisitor):
             return var_type.reference()
         else:
             self.__type_check(var_type, IntType)
-            self.__pop('t0')
-            self.asm_str += (f"# calculate {operator}int\n"
-                             f"\t{UNOPR2ASM[operator]}\n")
-            self.__push('t0')
+            self.__push(self.__emit_value(UNOPR2IR[operator], (self.__pop(),)))
             return IntType()
 
     def visitCastUnary(self, ctx: MiniDecafParser.CastUnaryContext) -> MiniDecafType:
@@ -465,10 +487,10 @@ class MainVisitor(MiniDecafVisitor):
         return dst_type.value_category_cast(src_type.value_cat)
 
     def visitPostfixUnary(self, ctx: MiniDecafParser.PostfixUnaryContext) -> MiniDecafType:
-        return self.visit(ctx.postfix())
+        return self.visit(self.__innermost(ctx))
 
     def visitPrimaryPostfix(self, ctx: MiniDecafParser.PrimaryPostfixContext) -> MiniDecafType:
-        return self.visit(ctx.primary())
+        return self.visit(self.__innermost(ctx))
 
     def visitFuncCallPostfix(self, ctx: MiniDecafParser.FuncCallPostfixContext) -> MiniDecafType:
         name = ctx.Identifier().getText()
@@ -477,66 +499,67 @@ class MainVisitor(MiniDecafVisitor):
         fun_type = self.declare_func_dict[name]
         if len(fun_type.para_types) != len(ctx.expression()):
             raise Exception(f"{name} arguments mismatch.")
-        self.asm_str += "# fill arguments\n"
+        args: List[int] = [0] * len(ctx.expression())
         for i in range(len(ctx.expression()) - 1, -1, -1):
             arg_type = self.__type_check(self.visit(ctx.expression(i)))
             if arg_type != fun_type.para_types[i]:
                 raise Exception(f"{name} call {i}th parameter type mismatch.")
-            if i < 8:
-                self.__pop(f'a{i}')
-        self.asm_str += f"\tcall {name}\n"
-        self.__push('a0')  # ret val
+            args[i] = self.__pop()
+        self.__push(self.__emit_value("call", tuple(args), name))  # ret val
         return fun_type.ret_type
 
     def visitArrayPostfix(self, ctx: MiniDecafParser.ArrayPostfixContext) -> MiniDecafType:
-        # postfix[expression]
-        postfix_type = self.__type_check(self.visit(ctx.postfix()))
-        self.__type_check(self.visit(ctx.expression()), IntType, ValueCategory.rvalue)
-        self.__pop('t1')  # expr
-        self.__pop('t0')  # postfix
-        if isinstance(postfix_type, PointerType):
-            self.asm_str += (f"# pointer[int]\n"
-                             f"\tslli t1, t1, 2\n"
-                             f"\tadd t0, t0, t1\n")
-            self.__push('t0')
-            return postfix_type.dereference()
-        elif isinstance(postfix_type, ArrayType):
-            base_type = postfix_type.base_type
-            self.asm_str += (f"# arr[int]\n"
-                             f"\tli t2, {base_type.get_size()}\n"
-                             f"\tmul t1, t1, t2\n"
-                             f"\tadd t0, t0, t1\n")
-            self.__push('t0')
-            return base_type
-        else:
-            raise Exception(f"Subscript operator applied to {postfix_type}.")
+        # postfix[expression]...; the subscripts of the dimensions of an array are summed into one offset, added to
+        # its address once the element is reached
+        rule = type(ctx)
+        subscripts = []
+        while type(ctx) is rule:  # down the chain of subscripts, without recursion
+            subscripts.append(ctx.expression())
+            ctx = ctx.postfix()
+        postfix_type = self.visit(ctx)
+        offset = None
+        for expression in reversed(subscripts):
+            postfix_type = self.__type_check(postfix_type)
+            self.__type_check(self.visit(expression), IntType, ValueCategory.rvalue)
+            index = self.__pop()  # expr
+            if isinstance(postfix_type, PointerType):
+                base = self.__pop()  # postfix
+                self.__push(self.__emit_value("add", (base, self.__emit_value("slli", (index,), 2))))
+                postfix_type = postfix_type.dereference()
+            elif isinstance(postfix_type, ArrayType):
+                postfix_type = postfix_type.base_type
+                term = self.__emit_value("mul", (index, self.__emit_value("li", imm=postfix_type.get_size())))
+                offset = term if offset is None else self.__emit_value("add", (offset, term))
+                if not isinstance(postfix_type, ArrayType):
+                    self.__push(self.__emit_value("add", (self.__pop(), offset)))
+                    offset = None
+            else:
+                raise Exception(f"Subscript operator applied to {postfix_type}.")
+        if offset is not None:  # an array of a lower dimension
+            self.__push(self.__emit_value("add", (self.__pop(), offset)))
+        return postfix_type
 
     def visitNumPrimary(self, ctx: MiniDecafParser.NumPrimaryContext) -> MiniDecafType:
         num: TerminalNodeImpl = ctx.Integer()
         # overflow
         if int(num.getText()) > 0x7fffffff:
             raise Exception(f"{int(num.getText())} is too large for int.")
-        self.asm_str += (f"# load number {num}\n"
-                         f"\tli t0, {num.getText()}\n")
-        self.__push('t0')
+        self.__push(self.__emit_value("li", imm=int(num.getText())))
         return IntType()
 
     def visitParenthesizedPrimary(self, ctx: MiniDecafParser.ParenthesizedPrimaryContext) -> MiniDecafType:
-        return self.visit(ctx.expression())
+        return self.visit(self.__innermost(ctx))
 
     def visitIdentPrimary(self, ctx: MiniDecafParser.IdentPrimaryContext) -> MiniDecafType:
         name: str = ctx.Identifier().getText()
-        local_var = self.symbol_table.lookup_all(name)
-        if local_var is not None:
-            self.__read_var(local_var)
-            self.__push('t0')
-            return local_var.sym_type
-        elif name in self.declare_global_var_dict:
-            self.__read_global_var(name)
-            self.__push('t0')
-            return self.declare_global_var_dict[name]
-        else:
+        symbol = self.symbol_table.lookup_all(name)
+        if symbol is None:
             raise Exception(f"{name} is undefined.")
+        if symbol.slot is None:  # global
+            self.__push(self.__emit_value("la", imm=name))
+        else:
+            self.__push(self.__read_var(symbol))
+        return symbol.sym_type
 
     def visitVarType(self, ctx: MiniDecafParser.VarTypeContext) -> MiniDecafType:
         pointer_level = len(ctx.children) - 1
@@ -544,45 +567,240 @@ class MainVisitor(MiniDecafVisitor):
             return IntType()
         return PointerType(pointer_level)
 
-    def __pop(self, reg: str):
-        self.asm_str += (f"# pop {reg}\n"
-                         f"\tlw {reg}, 0(sp)\n"
-                         f"\taddi sp, sp, 4\n")  # stack ptr
-
-    def __push(self, reg: str):
-        self.asm_str += (f"# push {reg}\n"
-                         f"\taddi sp, sp, -4\n"  # stack ptr
-                         f"\tsw {reg}, 0(sp)\n")
-
-    def __set_bool(self, reg):  # set a reg to bool according to data stored in it
-        self.asm_str += (f"# set bool\n"
-                         f"\tsnez {reg}, {reg}\n")
-
-    def __write_local_var(self, var: Symbol):  # write var with val in t0
-        self.asm_str += (f"# write variable {var.name}\n"
-                         f"\tsw t0, {var.offset}(fp)\n")
-
-    def __write_global_var(self, name):  # write var with val in t0
-        self.asm_str += (f"# write global variable {name}\n"
-                         f"\tla t1, {name}\n"
-                         f"\tsw t0, 0(t1)\n")
-
-    def __read_var(self, symbol: Symbol):
-        self.asm_str += (f"# read variable {symbol.name} as lvalue\n"
-                         f"\taddi t0, fp, {symbol.offset}\n")
-
-    def __read_global_var(self, name):
-        self.asm_str += (f"# read global variable {name} as lvalue\n"
-                         f"\tla t0, {name}\n")
-
-    def __logic_operation(self, operator: str):
-        self.__pop('t1')
-        self.__pop('t0')
-        self.__set_bool('t1')
-        self.__set_bool('t0')
-        self.asm_str += (f"# calculate {operator}\n"
-                         f"\t{operator} t0, t0, t1\n")
-        self.__push('t0')
+    def __pop(self) -> int:  # register holding the value of the last visited expression
+        return self.current_function.value_stack.pop()
+
+    def __push(self, reg: int):
+        self.current_function.value_stack.append(reg)
+
+    def __emit(self, op: str, args: Tuple[int, ...] = (), imm=None, labels: Tuple[str, ...] = (),
+               dst: Optional[int] = None):
+        if self.current_function.block.terminated():  # code after return, break or continue
+            if op == "j":  # nothing falls through to it
+                return
+            self.__label(f".unreachable{self.unreachable_count}")
+            self.unreachable_count += 1
+        self.current_function.block.instrs.append(Instr(op, dst, args, imm, labels))
+
+    def __emit_value(self, op: str, args: Tuple[int, ...] = (), imm=None) -> int:  # result in a new register
+        dst = self.current_function.ir.new_reg()
+        self.__emit(op, args, imm, dst=dst)
+        return dst
+
+    def __label(self, label: str):  # start a new basic block
+        if not self.current_function.block.terminated():  # fall through
+            self.__emit("j", labels=(label,))
+        self.current_function.block = BasicBlock(label)
+        self.current_function.ir.blocks.append(self.current_function.block)
+
+    def __new_array_slot(self, size: int) -> Slot:  # a slot freed by a closed sibling scope if any
+        free_slots = self.current_function.free_slots.get(size)
+        return free_slots.pop() if free_slots else self.current_function.ir.new_slot(size)
+
+    def __pop_scope(self):
+        # closes a scope inside a function, its arrays can be stored in the same place as those of later scopes;
+        # scalars are left to the backend, which shares their places by liveness unless their address is taken
+        for symbol in self.symbol_table.pop_scope():
+            if isinstance(symbol.sym_type, ArrayType):
+                self.current_function.free_slots.setdefault(symbol.slot.size, []).append(symbol.slot)
+
+    def __read_var(self, symbol: Symbol) -> int:  # address of a local variable as lvalue
+        addr = self.__emit_value("addr", imm=symbol.slot)
+        self.current_function.slot_addr_dict[addr] = symbol.slot
+        return addr
+
+    def __visit_block_items(self, items: list):
+        # blocks nested directly in blocks are opened and closed from a work stack rather than by recursion, so that
+        # their depth is not bounded by the recursion limit; None closes the innermost one
+        work = list(reversed(items))
+        while work:
+            item = work.pop()
+            if item is None:
+                self.__pop_scope()
+                continue
+            statement = item.getChild(0) if hasattr(item, "getChild") else item  # ANTLR wraps items in a BlockItem
+            if hasattr(statement, "blockItem"):  # only block statements have items
+                self.symbol_table.add_scope()
+                work.append(None)
+                work.extend(reversed(statement.blockItem()))
+            else:
+                self.visit(item)
+
+    def __visit_left_recursive(self, ctx, operation: Callable[[Any, MiniDecafType], MiniDecafType]) -> MiniDecafType:
+        """
+        a rule like additive: additive op multiplicative | multiplicative, whose trees lean left as deep as the chain
+        of operators is long; the left spine is walked with a loop, then operation applies each operator, bottom up,
+        to the type of the left operand, whose value is pushed, so that a chain of any length is not recursion
+        """
+        if len(ctx.children) == 1:
+            return self.visit(self.__innermost(ctx))
+        innermost, chain = self.__left_spine(ctx)
+        operand_type = self.visit(self.__innermost(innermost))
+        for node in chain:
+            operand_type = operation(node, operand_type)
+        return operand_type
+
+    @staticmethod
+    def __innermost(ctx):
+        # the first node below ctx with operators, through single-child rules and parentheses, in a loop, so that
+        # each parenthesis costs the visit of that node only
+        inner = ctx.accept(SINGLE_CHILD_PROBE)
+        while inner is not None:
+            ctx, inner = inner, inner.accept(SINGLE_CHILD_PROBE)
+        return ctx
+
+    @staticmethod
+    def __left_spine(ctx) -> Tuple[Any, list]:
+        # the innermost left operand of a left recursive rule, and the nodes with an operator, innermost first
+        rule = type(ctx)
+        chain = []
+        while type(ctx) is rule:
+            if len(ctx.children) > 1:  # rule op operand
+                chain.append(ctx)
+            ctx = ctx.children[0]  # the left operand, or the only child
+        chain.reverse()
+        return ctx, chain
+
+    def __visit_logical(self, ctx, exit_branch: str) -> MiniDecafType:
+        """
+        value of a chain of || (exit_branch bnez) or && (beqz): each operand is normalized to 0 or 1 into the
+        result, and the chain is left as soon as that decides it, without evaluating the other operands
+        """
+        if len(ctx.children) == 1:
+            return self.visit(self.__innermost(ctx))
+        innermost, chain = self.__left_spine(ctx)
+        cur_logic_count = self.logic_count
+        self.logic_count += 1
+        result = self.current_function.ir.new_reg()
+        operands = [innermost] + [node.children[2] for node in chain]
+        for i, operand in enumerate(operands):
+            self.__type_check(self.visit(self.__innermost(operand)), IntType)
+            self.__emit("snez", (self.__pop(),), dst=result)
+            if i + 1 < len(operands):
+                next_label = f".logic{cur_logic_count}_{i}"
+                self.__emit(exit_branch, (result,), labels=(f".logicEnd{cur_logic_count}", next_label))
+                self.__label(next_label)
+        self.__label(f".logicEnd{cur_logic_count}")
+        self.__push(result)
+        return IntType()
+
+    def __visit_condition(self, ctx, true_label: str, false_label: str):
+        """
+        jumping code for a condition: ends the current block with branches to true_label when it is not 0, and to
+        false_label otherwise; && and || jump from each operand without computing their own value, ! swaps targets,
+        and comparisons are a single compare and branch
+        """
+        ctx = self.__innermost(ctx)
+        logical = ctx.accept(LOGICAL_PROBE)
+        if logical is None:
+            self.__type_check(self.visit(ctx), IntType)
+            self.__emit("beqz", (self.__pop(),), labels=(false_label, true_label))
+            return
+        operator, chain_ctx = logical
+        if operator == '!':
+            self.__visit_condition(chain_ctx.unary(), false_label, true_label)
+            return
+        if operator in COMPARE_BRANCHES:  # one branch comparing both sides
+            if operator in ("==", "!="):
+                lhs, rhs = self.__equality_operands(chain_ctx, self.visit(chain_ctx.equality()))
+            else:
+                lhs, rhs = self.__relational_operands(chain_ctx, self.visit(chain_ctx.relational()))
+            op, swapped = COMPARE_BRANCHES[operator]
+            self.__emit(op, (rhs, lhs) if swapped else (lhs, rhs), labels=(true_label, false_label))
+            return
+        innermost, chain = self.__left_spine(chain_ctx)
+        operands = [innermost] + [node.children[2] for node in chain]
+        cur_logic_count = self.logic_count
+        self.logic_count += 1
+        for i, operand in enumerate(operands[:-1]):
+            next_label = f".logic{cur_logic_count}_{i}"
+            if operator == "||":  # true as soon as an operand is
+                self.__visit_condition(operand, true_label, next_label)
+            else:  # false as soon as an operand is
+                self.__visit_condition(operand, next_label, false_label)
+            self.__label(next_label)
+        self.__visit_condition(operands[-1], true_label, false_label)
+
+    def __equality_operands(self, ctx: MiniDecafParser.EqualityContext, left_type: MiniDecafType) -> Tuple[int, int]:
+        # equ op rel, the registers of both sides
+        equ_type = self.__type_check(left_type)
+        rel_type = self.__type_check(self.visit(self.__innermost(ctx.relational())))
+        if equ_type != rel_type:
+            raise Exception("Equality operator with different type.")
+        if isinstance(equ_type, ArrayType):
+            raise Exception("Equality operator with array type.")
+        rhs, lhs = self.__pop(), self.__pop()
+        return lhs, rhs
+
+    def __equality(self, ctx: MiniDecafParser.EqualityContext, left_type: MiniDecafType) -> MiniDecafType:
+        lhs, rhs = self.__equality_operands(ctx, left_type)
+        operator: str = ctx.children[1].getText()
+        diff = self.__emit_value("sub", (lhs, rhs))
+        self.__push(self.__emit_value("seqz" if operator == "==" else "snez", (diff,)))
+        return IntType()
+
+    def __relational_operands(self, ctx: MiniDecafParser.RelationalContext,
+                              left_type: MiniDecafType) -> Tuple[int, int]:
+        # rel op add, the registers of both sides
+        self.__type_check(left_type, IntType)
+        self.__type_check(self.visit(self.__innermost(ctx.additive())), IntType)
+        rhs, lhs = self.__pop(), self.__pop()
+        return lhs, rhs
+
+    def __relational(self, ctx: MiniDecafParser.RelationalContext, left_type: MiniDecafType) -> MiniDecafType:
+        lhs, rhs = self.__relational_operands(ctx, left_type)
+        operator: str = ctx.children[1].getText()
+        if operator in BIOPR2IR:
+            self.__push(self.__emit_value(BIOPR2IR[operator], (lhs, rhs)))
+        else:  # a <= b is !(a > b), a >= b is !(a < b)
+            negation = self.__emit_value(BIOPR2IR['>' if operator == "<=" else '<'], (lhs, rhs))
+            self.__push(self.__emit_value("xori", (negation,), 1))
+        return IntType()
+
+    def __additive(self, ctx: MiniDecafParser.AdditiveContext, left_type: MiniDecafType) -> MiniDecafType:
+        # add op mul
+        left_type = self.__type_check(left_type)
+        right_type = self.__type_check(self.visit(self.__innermost(ctx.multiplicative())))
+        rhs, lhs = self.__pop(), self.__pop()
+        operator: str = ctx.children[1].getText()
+        ret_type: MiniDecafType = IntType()
+        pointer_diff = False
+        if operator == '+':
+            if isinstance(left_type, IntType) and isinstance(right_type, IntType):
+                ret_type = IntType()
+            elif isinstance(left_type, PointerType) and isinstance(right_type, IntType):
+                rhs = self.__emit_value("slli", (rhs,), 2)
+                ret_type = left_type
+            elif isinstance(left_type, IntType) and isinstance(right_type, PointerType):
+                lhs = self.__emit_value("slli", (lhs,), 2)
+                ret_type = right_type
+            else:
+                raise Exception(f"Illegal type for addition: {left_type}, {right_type}.")
+        else:
+            if isinstance(left_type, IntType) and isinstance(right_type, IntType):
+                ret_type = IntType()
+            elif isinstance(left_type, PointerType) and isinstance(right_type, IntType):
+                rhs = self.__emit_value("slli", (rhs,), 2)
+                ret_type = left_type
+            elif isinstance(left_type, PointerType) and right_type == left_type:
+                pointer_diff = True
+                ret_type = IntType()
+            else:
+                raise Exception(f"Illegal type for subtraction: {left_type}, {right_type}.")
+        result = self.__emit_value(BIOPR2IR[operator], (lhs, rhs))
+        if pointer_diff:
+            result = self.__emit_value("srai", (result,), 2)
+        self.__push(result)
+        return ret_type
+
+    def __multiplicative(self, ctx: MiniDecafParser.MultiplicativeContext, left_type: MiniDecafType) -> MiniDecafType:
+        # mul op una
+        self.__type_check(left_type, IntType)
+        self.__type_check(self.visit(self.__innermost(ctx.unary())), IntType)
+        operator: str = ctx.children[1].getText()
+        rhs, lhs = self.__pop(), self.__pop()
+        self.__push(self.__emit_value(BIOPR2IR[operator], (lhs, rhs)))
+        return IntType()
 
     def __get_func_type(self, ctx) -> FuncType:
         ret_type: MiniDecafType = self.visit(ctx.varType(0))
@@ -599,10 +817,12 @@ class MainVisitor(MiniDecafVisitor):
         if value_cat_req == ValueCategory.lvalue and type_actual.value_cat == ValueCategory.rvalue:
             raise Exception('Expect lvalue but got rvalue.')
         if value_cat_req == ValueCategory.rvalue and type_actual.value_cat == ValueCategory.lvalue:
-            self.__pop('t0')
-            self.asm_str += ("# cast lvalue to rvalue\n"
-                             f"\t lw t0, 0(t0)\n")
-            self.__push('t0')
+            # cast lvalue to rvalue
+            addr = self.__pop()
+            if addr in self.current_function.slot_addr_dict:
+                self.__push(self.__emit_value("loadslot", imm=self.current_function.slot_addr_dict[addr]))
+            else:
+                self.__push(self.__emit_value("load", (addr,), 0))
             return type_actual.value_category_cast(ValueCategory.rvalue)
         return type_actual.value_category_cast(value_cat_req)
 
@@ -0,0 +1,129 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# a line of assembly is a tuple: (op, operands...) for instructions, (None, text) for labels, directives and comments
+Line = Tuple[Optional[str], ...]
+Pattern = Callable[[List[Line]], Optional[List[Line]]]
+
+
+def parse_line(text: str) -> Line:
+    stripped = text.strip()
+    if not stripped or stripped.endswith(':') or stripped[0] in ".#":
+        return None, text
+    parts = stripped.split(None, 1)
+    return (parts[0],) + (tuple(parts[1].split(", ")) if len(parts) > 1 else ())
+
+
+def format_line(line: Line) -> str:
+    if line[0] is None:
+        return line[1]
+    return f"\t{line[0]} {', '.join(line[1:])}".rstrip()
+
+
+def __self_move(window: List[Line]):  # mv a, a
+    (line,) = window
+    if line[0] == "mv" and line[1] == line[2]:
+        return []
+    return None
+
+
+def __add_zero(window: List[Line]):  # addi a, b, 0
+    (line,) = window
+    if line[0] == "addi" and line[3] == "0":
+        return [] if line[1] == line[2] else [("mv", line[1], line[2])]
+    return None
+
+
+def __store_load(window: List[Line]):  # sw a, x; lw b, x -> sw a, x; mv b, a
+    store, load = window
+    if store[0] == "sw" and load[0] == "lw" and store[2] == load[2]:
+        return [store] if store[1] == load[1] else [store, ("mv", load[1], store[1])]
+    return None
+
+
+def __load_load(window: List[Line]):  # lw a, x; lw b, x -> lw a, x; mv b, a (unless a is the base of x)
+    first, second = window
+    if first[0] == "lw" and second[0] == "lw" and first[2] == second[2] and not first[2].endswith(f"({first[1]})"):
+        return [first] if first[1] == second[1] else [first, ("mv", second[1], first[1])]
+    return None
+
+
+def __store_store(window: List[Line]):  # sw a, x; sw b, x -> sw b, x
+    first, second = window
+    if first[0] == "sw" and second[0] == "sw" and first[2] == second[2]:
+        return [second]
+    return None
+
+
+def __move_back(window: List[Line]):  # mv a, b; mv b, a -> mv a, b
+    first, second = window
+    if first[0] == "mv" and second[0] == "mv" and first[1] == second[2] and first[2] == second[1]:
+        return [first]
+    return None
+
+
+def __merge_add(window: List[Line]):  # addi a, a, x; addi a, a, y -> addi a, a, x + y (e.g. sp adjustments)
+    first, second = window
+    if first[0] == "addi" and second[0] == "addi" and first[1] == first[2] == second[1] == second[2]:
+        imm = int(first[3]) + int(second[3])
+        if -2048 <= imm < 2048:
+            return [] if imm == 0 else [("addi", first[1], first[1], str(imm))]
+    return None
+
+
+def __jump_to_next(window: List[Line]):  # j label; label:
+    jump, label = window
+    if jump[0] == "j" and label[0] is None and label[1] == f"{jump[1]}:":
+        return [label]
+    return None
+
+
+# name, window size and rewrite of each pattern, a rewrite returns None when the window does not match
+PATTERNS: List[Tuple[str, int, Pattern]] = [
+    ("self-move", 1, __self_move),
+    ("add-zero", 1, __add_zero),
+    ("store-load", 2, __store_load),
+    ("load-load", 2, __load_load),
+    ("store-store", 2, __store_store),
+    ("move-back", 2, __move_back),
+    ("merge-add", 2, __merge_add),
+    ("jump-to-next", 2, __jump_to_next),
+]
+
+
+class Peephole:
+    """
+    sliding window optimizer over the assembly of one function
+    lines are pushed one by one, and the patterns are tried on the tail of the output after each push;
+    a rewrite may shrink the tail, so the patterns are tried again until none matches
+    """
+    __patterns: List[Tuple[str, int, Pattern]]
+    hits: Dict[str, int]  # number of rewrites by pattern name
+
+    def __init__(self, disabled: Iterable[str] = ()):
+        disabled = set(disabled)
+        unknown = disabled - {name for name, _, _ in PATTERNS} - {"all"}
+        if unknown:
+            raise Exception(f"Unknown peephole patterns {', '.join(sorted(unknown))}.")
+        self.__patterns = [] if "all" in disabled else [pattern for pattern in PATTERNS if pattern[0] not in disabled]
+        self.hits = {name: 0 for name, _, _ in self.__patterns}
+
+    def run(self, lines: List[str]) -> List[str]:
+        if not self.__patterns:
+            return lines
+        output: List[Line] = []
+        for text in lines:
+            output.append(parse_line(text))
+            matched = True
+            while matched:
+                matched = False
+                for name, size, rewrite in self.__patterns:
+                    window = output[-size:]
+                    if len(window) < size or any(line[0] is None for line in window[:-1]):
+                        continue  # a window only spans one basic block, a label may end it
+                    replacement = rewrite(window)
+                    if replacement is not None:
+                        output[-size:] = replacement
+                        self.hits[name] += 1
+                        matched = True
+                        break
+        return [format_line(line) for line in output]
@@ -0,0 +1,135 @@
+import contextlib
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+
+class Profiler:
+    """
+    wall time, CPU time and peak traced memory of the phases of a compilation, for --time-report
+    phases nest, a nested phase is reported as outer/inner and is included in the outer one;
+    visit* methods of a visitor can be counted and timed too, see instrument
+    tracing memory and the raised recursion limit last until close, which a with block calls whatever happens, so
+    that a failed compilation leaves a long running process as it was
+    """
+    __phases: Dict[str, Dict[str, float]]
+    __stack: List[List]  # active phases: name, peak memory seen so far
+    __visits: Dict[str, List[float]]  # method: calls, cumulative seconds (outermost calls only), self seconds
+
+    enabled = True
+
+    def __init__(self):
+        self.__phases = {}
+        self.__stack = []
+        self.__visits = {}
+        self.__recursion_limit = None
+        self.__closed = False
+        tracemalloc.start()
+        self.__start_wall = time.perf_counter()
+        self.__start_cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        # memory peaks are reset for each phase, so the peak seen so far is first handed to the enclosing ones
+        peak = tracemalloc.get_traced_memory()[1]
+        for outer in self.__stack:
+            outer[1] = max(outer[1], peak)
+        tracemalloc.reset_peak()
+        path = "/".join([outer[0] for outer in self.__stack] + [name])
+        stats = self.__phases.setdefault(path, {"calls": 0, "wall": 0.0, "cpu": 0.0, "peak_memory": 0})
+        self.__stack.append([name, 0])
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = max(self.__stack.pop()[1], tracemalloc.get_traced_memory()[1])
+            if self.__stack:
+                self.__stack[-1][1] = max(self.__stack[-1][1], peak)
+            stats["calls"] += 1
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+            stats["peak_memory"] = max(stats["peak_memory"], peak)
+
+    def instrument(self, visitor):
+        # wraps the visit* methods of this visitor object only, so that uninstrumented visitors pay nothing
+        depth: Dict[str, int] = {}
+        child_time: List[float] = []
+
+        def timed(name, method):
+            stats = self.__visits.setdefault(name, [0, 0.0, 0.0])
+            depth[name] = 0
+
+            def visit(ctx):
+                stats[0] += 1
+                depth[name] += 1
+                child_time.append(0.0)
+                start = time.perf_counter()
+                try:
+                    return method(ctx)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    stats[2] += elapsed - child_time.pop()
+                    if child_time:
+                        child_time[-1] += elapsed
+                    depth[name] -= 1
+                    if depth[name] == 0:  # recursive calls are already in the time of the outermost one
+                        stats[1] += elapsed
+            return visit
+
+        for name in dir(visitor):
+            if name.startswith("visit") and name != "visit":
+                setattr(visitor, name, timed(name, getattr(visitor, name)))
+        # a visit goes through visit, accept and the method, the wrapper is one frame more
+        if self.__recursion_limit is None:
+            self.__recursion_limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(self.__recursion_limit * 4 // 3)
+
+    def report(self) -> dict:  # ready for json.dump
+        peak = tracemalloc.get_traced_memory()[1]
+        for _, phase_peak in self.__stack:
+            peak = max(peak, phase_peak)
+        peak = max([peak] + [stats["peak_memory"] for stats in self.__phases.values()])
+        return {
+            "total": {
+                "wall": time.perf_counter() - self.__start_wall,
+                "cpu": time.process_time() - self.__start_cpu,
+                "peak_memory": peak,
+            },
+            "phases": self.__phases,
+            "visits": {name: {"calls": calls, "cumulative": cumulative, "self": self_time}
+                       for name, (calls, cumulative, self_time) in sorted(self.__visits.items()) if calls},
+        }
+
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        tracemalloc.stop()
+        if self.__recursion_limit is not None:
+            sys.setrecursionlimit(self.__recursion_limit)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NullProfiler:
+    """stands in for Profiler when no report is asked for"""
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    @staticmethod
+    def phase(name: str):
+        return contextlib.nullcontext()
+
+
+NO_PROFILER = NullProfiler()
@@ -0,0 +1,106 @@
+from bisect import bisect_right
+from typing import Dict, List, Tuple, Union
+
+from .CFG import CFG
+from .Dataflow import bits, liveness
+from .IR import Function, Slot
+from .constants import CALLER_SAVED_REGS, CALLEE_SAVED_REGS
+
+
+class Allocation:
+    location: List[Union[str, Slot, None]]  # register name or spill slot of each virtual register
+    used_callee_saved: List[str]
+    spill_intervals: Dict[int, Tuple[int, int]]  # slot index: first and last live points of the register spilled
+
+    def __init__(self, reg_count: int):
+        self.location = [None] * reg_count
+        self.used_callee_saved = []
+        self.spill_intervals = {}
+
+
+def allocate(func: Function, cfg: CFG) -> Allocation:
+    """
+    linear scan register allocation (Poletto & Sarkar) over the instructions in block order
+    each virtual register gets one interval from its first to its last live point; intervals that span a call
+    only get callee-saved registers, others prefer caller-saved ones; spilled registers get a frame slot
+    """
+    live_in, live_out = liveness(cfg)
+    start: Dict[int, int] = {}
+    end: Dict[int, int] = {}
+    calls: List[int] = []
+
+    def extend(reg, position):
+        if reg not in start:
+            start[reg] = end[reg] = position
+        elif position < start[reg]:
+            start[reg] = position
+        elif position > end[reg]:
+            end[reg] = position
+
+    # instruction k reads its arguments at 2k and writes its result at 2k + 1,
+    # registers live into a block are live just before its first instruction
+    position = 0
+    for b, block in enumerate(func.blocks):
+        for reg in bits(live_in[b]):
+            extend(reg, position - 1)
+        for instr in block.instrs:
+            if instr.op == "call":
+                calls.append(position)
+            for arg in instr.args:
+                extend(arg, position)
+            if instr.dst is not None:
+                extend(instr.dst, position + 1)
+            if instr.op == "param":  # parameters are moved from a0-a7 all at once at entry
+                extend(instr.dst, -1)
+            position += 2
+        for reg in bits(live_out[b]):
+            extend(reg, position - 1)
+
+    def crosses_call(reg):
+        i = bisect_right(calls, start[reg])
+        return i < len(calls) and calls[i] < end[reg]
+
+    allocation = Allocation(func.reg_count)
+    location = allocation.location
+    free_caller_saved = list(reversed(CALLER_SAVED_REGS))
+    free_callee_saved = list(reversed(CALLEE_SAVED_REGS))
+    used_callee_saved = set()
+    active: List[int] = []  # registers in physical registers, ordered by interval end
+
+    def free(phys):
+        (free_callee_saved if phys in CALLEE_SAVED_REGS else free_caller_saved).append(phys)
+
+    def spill(reg):
+        location[reg] = func.new_slot(4)
+        allocation.spill_intervals[location[reg].index] = (start[reg], end[reg])
+
+    def activate(reg, phys):
+        location[reg] = phys
+        if phys in CALLEE_SAVED_REGS:
+            used_callee_saved.add(phys)
+        i = len(active)
+        while i > 0 and end[active[i - 1]] > end[reg]:
+            i -= 1
+        active.insert(i, reg)
+
+    for reg in sorted(start, key=lambda r: (start[r], r)):
+        # expire intervals ended before this one starts, an instruction may write the register of its last read
+        while active and end[active[0]] < start[reg]:
+            free(location[active.pop(0)])
+        need_callee_saved = crosses_call(reg)
+        if not need_callee_saved and free_caller_saved:
+            activate(reg, free_caller_saved.pop())
+        elif free_callee_saved:
+            activate(reg, free_callee_saved.pop())
+        else:
+            # spill the interval ending last among those holding a suitable register
+            candidates = [r for r in active if not need_callee_saved or location[r] in CALLEE_SAVED_REGS]
+            victim = candidates[-1] if candidates else None
+            if victim is not None and end[victim] > end[reg]:
+                active.remove(victim)
+                activate(reg, location[victim])
+                spill(victim)
+            else:
+                spill(reg)
+    allocation.used_callee_saved = [reg for reg in CALLEE_SAVED_REGS if reg in used_callee_saved]
+    return allocation
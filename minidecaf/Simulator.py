@@ -0,0 +1,322 @@
+from typing import Callable, Dict, List, Tuple
+
+MASK = 0xffffffff
+DATA_BASE = 0x10000
+STACK_TOP = 0x7ffffff0
+
+REGISTERS = {f"x{i}": i for i in range(32)}
+REGISTERS.update({name: i for i, name in enumerate(
+    ["zero", "ra", "sp", "gp", "tp", "t0", "t1", "t2", "fp", "s1", "a0", "a1", "a2", "a3", "a4", "a5", "a6", "a7",
+     "s2", "s3", "s4", "s5", "s6", "s7", "s8", "s9", "s10", "s11", "t3", "t4", "t5", "t6"])})
+REGISTERS["s0"] = 8
+
+
+def signed(value: int) -> int:
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def divide(x: int, y: int) -> int:  # RISC-V semantics: no trap, x / 0 is -1, overflow gives the dividend
+    x, y = signed(x), signed(y)
+    if y == 0:
+        return -1
+    quotient = abs(x) // abs(y)
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+def remainder(x: int, y: int) -> int:  # sign of the dividend, x % 0 is x
+    x, y = signed(x), signed(y)
+    if y == 0:
+        return x
+    result = abs(x) % abs(y)
+    return -result if x < 0 else result
+
+
+# operations on unsigned 32 bit register values, the result is masked by the caller
+REGISTER_OPS: Dict[str, Callable[[int, int], int]] = {
+    "add": lambda x, y: x + y,
+    "sub": lambda x, y: x - y,
+    "sll": lambda x, y: x << (y & 31),
+    "slt": lambda x, y: int(signed(x) < signed(y)),
+    "sltu": lambda x, y: int(x < y),
+    "sgt": lambda x, y: int(signed(x) > signed(y)),
+    "sgtu": lambda x, y: int(x > y),
+    "xor": lambda x, y: x ^ y,
+    "srl": lambda x, y: x >> (y & 31),
+    "sra": lambda x, y: signed(x) >> (y & 31),
+    "or": lambda x, y: x | y,
+    "and": lambda x, y: x & y,
+    "mul": lambda x, y: x * y,
+    "mulh": lambda x, y: (signed(x) * signed(y)) >> 32,
+    "mulhsu": lambda x, y: (signed(x) * y) >> 32,
+    "mulhu": lambda x, y: (x * y) >> 32,
+    "div": divide,
+    "divu": lambda x, y: x // y if y else MASK,
+    "rem": remainder,
+    "remu": lambda x, y: x % y if y else x,
+}
+IMMEDIATE_OPS = {"addi": "add", "slti": "slt", "sltiu": "sltu", "xori": "xor", "ori": "or", "andi": "and",
+                 "slli": "sll", "srli": "srl", "srai": "sra"}
+UNARY_OPS: Dict[str, Callable[[int], int]] = {
+    "mv": lambda x: x,
+    "neg": lambda x: -x,
+    "not": lambda x: ~x,
+    "seqz": lambda x: int(x == 0),
+    "snez": lambda x: int(x != 0),
+    "sltz": lambda x: int(signed(x) < 0),
+    "sgtz": lambda x: int(signed(x) > 0),
+}
+BRANCH_OPS: Dict[str, Callable[[int, int], bool]] = {
+    "beq": lambda x, y: x == y,
+    "bne": lambda x, y: x != y,
+    "blt": lambda x, y: signed(x) < signed(y),
+    "bge": lambda x, y: signed(x) >= signed(y),
+    "bltu": lambda x, y: x < y,
+    "bgeu": lambda x, y: x >= y,
+    "bgt": lambda x, y: signed(x) > signed(y),
+    "ble": lambda x, y: signed(x) <= signed(y),
+    "bgtu": lambda x, y: x > y,
+    "bleu": lambda x, y: x <= y,
+}
+ZERO_BRANCH_OPS = {"beqz": "beq", "bnez": "bne", "bltz": "blt", "bgez": "bge", "bgtz": "bgt", "blez": "ble"}
+
+Handler = Callable[[], int]  # executes one instruction, returns the index of the next one
+
+
+class Simulator:
+    """
+    RV32IM interpreter for the assembly MiniDecaf emits, so that programs run without a cross toolchain
+    instructions are decoded once into a table of closures, indexed by instruction number, each executing its
+    instruction and returning the number of the next one; the run loop only dispatches through that table
+    return addresses are instruction numbers, memory is a dict of aligned words, and only lw and sw access it
+    """
+    # results of run
+    exit_code: int  # low byte of main's return value, as the exit status of a process
+    instructions: int
+    loads: int
+    stores: int
+    max_stack_depth: int  # bytes below the initial sp
+
+    def __init__(self, asm: str):
+        self.registers = [0] * 32
+        self.memory: Dict[int, int] = {}
+        self.__counts = [0, 0]  # loads, stores
+        self.__min_sp = [STACK_TOP]
+        self.__labels: Dict[str, int] = {}  # text labels: instruction number
+        self.__symbols: Dict[str, int] = {}  # data labels: address
+        instrs = self.__assemble(asm)
+        self.__handlers: List[Handler] = [self.__decode(op, operands, i) for i, (op, operands) in enumerate(instrs)]
+        self.__handlers.append(lambda: -1)  # where main returns to
+
+    def run(self, max_instructions: int = 10 ** 9) -> int:
+        if "main" not in self.__labels:
+            raise Exception("No main function.")
+        registers = self.registers
+        registers[1] = len(self.__handlers) - 1
+        registers[2] = registers[8] = STACK_TOP
+        handlers = self.__handlers
+        pc = self.__labels["main"]
+        count = 0
+        try:
+            for count in range(max_instructions + 1):  # counted by range rather than by an addition in the loop
+                pc = handlers[pc]()
+                if pc < 0:
+                    break
+            else:
+                raise Exception(f"More than {max_instructions} instructions executed.")
+        except IndexError:
+            raise Exception(f"Jump out of the program to {pc}.")
+        self.instructions = count  # the return to the exit handler is not counted
+        self.loads, self.stores = self.__counts
+        self.max_stack_depth = STACK_TOP - self.__min_sp[0]
+        self.exit_code = registers[10] & 0xff
+        return self.exit_code
+
+    def __assemble(self, asm: str) -> List[Tuple[str, List[str]]]:
+        # instructions of .text, with labels resolved; .data words and .comm blocks are laid out from DATA_BASE
+        instrs = []
+        in_text = True
+        address = DATA_BASE
+        commons = []
+        for line in asm.splitlines():
+            line = line.split('#', 1)[0].strip()
+            while ':' in line:
+                label, line = line.split(':', 1)
+                if in_text:
+                    self.__labels[label.strip()] = len(instrs)
+                else:
+                    self.__symbols[label.strip()] = address
+                line = line.strip()
+            if not line:
+                continue
+            parts = line.split(None, 1)
+            op = parts[0]
+            operands = [operand.strip() for operand in parts[1].split(',')] if len(parts) > 1 else []
+            if op == ".text":
+                in_text = True
+            elif op == ".data":
+                in_text = False
+            elif op == ".global" or op == ".globl":
+                pass
+            elif op == ".align":  # a power of two, as in GNU as for RISC-V
+                alignment = 1 << int(operands[0])
+                address = (address + alignment - 1) // alignment * alignment
+            elif op == ".word":
+                for operand in operands:
+                    self.memory[address] = int(operand, 0) & MASK
+                    address += 4
+            elif op == ".comm":  # name, size, alignment
+                commons.append((operands[0], int(operands[1]), int(operands[2]) if len(operands) > 2 else 4))
+            elif op.startswith('.'):
+                raise Exception(f"Unsupported directive {op}.")
+            elif not in_text:
+                raise Exception(f"Instruction {op} out of .text.")
+            else:
+                instrs.append((op, operands))
+        for name, size, alignment in commons:
+            address = (address + alignment - 1) // alignment * alignment
+            self.__symbols[name] = address
+            address += size
+        return instrs
+
+    def __decode(self, op: str, operands: List[str], index: int) -> Handler:
+        registers, memory, counts = self.registers, self.memory, self.__counts
+        following = index + 1
+        reg = self.__register
+        if op in REGISTER_OPS or op in IMMEDIATE_OPS or op in UNARY_OPS or op in ("li", "la", "lui"):
+            rd = reg(operands[0])
+            if rd == 0:
+                return lambda: following
+            if op in REGISTER_OPS:
+                function, rs1, rs2 = REGISTER_OPS[op], reg(operands[1]), reg(operands[2])
+                if op == "add":  # the frequent ones without the call of function
+
+                    def handler():
+                        registers[rd] = (registers[rs1] + registers[rs2]) & MASK
+                        return following
+                elif op == "sub":
+
+                    def handler():
+                        registers[rd] = (registers[rs1] - registers[rs2]) & MASK
+                        return following
+                else:
+
+                    def handler():
+                        registers[rd] = function(registers[rs1], registers[rs2]) & MASK
+                        return following
+            elif op in IMMEDIATE_OPS:
+                # immediates are sign extended, and kept as unsigned 32 bit values like registers
+                function, rs1, imm = REGISTER_OPS[IMMEDIATE_OPS[op]], reg(operands[1]), int(operands[2], 0) & MASK
+                if op == "addi":  # the most frequent by far
+
+                    def handler():
+                        registers[rd] = (registers[rs1] + imm) & MASK
+                        return following
+                else:
+
+                    def handler():
+                        registers[rd] = function(registers[rs1], imm) & MASK
+                        return following
+            elif op == "mv":
+                rs1 = reg(operands[1])
+
+                def handler():
+                    registers[rd] = registers[rs1]
+                    return following
+            elif op in UNARY_OPS:
+                function, rs1 = UNARY_OPS[op], reg(operands[1])
+
+                def handler():
+                    registers[rd] = function(registers[rs1]) & MASK
+                    return following
+            else:
+                value = self.__symbols[operands[1]] if op == "la" else int(operands[1], 0)
+                value = (value << 12 if op == "lui" else value) & MASK
+
+                def handler():
+                    registers[rd] = value
+                    return following
+            if rd == 2:  # keeps track of the stack depth
+                return self.__track_stack(handler)
+            return handler
+        if op == "lw" or op == "sw":
+            rt = reg(operands[0])
+            offset, base = operands[1][:-1].split('(')
+            offset, base = int(offset or "0", 0), reg(base)
+            if op == "lw":
+
+                def handler():
+                    address = (registers[base] + offset) & MASK
+                    if address & 3:
+                        raise Exception(f"Misaligned load from {address:#x}.")
+                    counts[0] += 1
+                    if rt:
+                        registers[rt] = memory.get(address, 0)
+                    return following
+            else:
+
+                def handler():
+                    address = (registers[base] + offset) & MASK
+                    if address & 3:
+                        raise Exception(f"Misaligned store to {address:#x}.")
+                    counts[1] += 1
+                    memory[address] = registers[rt]
+                    return following
+            return handler
+        if op in BRANCH_OPS or op in ZERO_BRANCH_OPS:
+            if op in ZERO_BRANCH_OPS:
+                condition, rs1, rs2, target = BRANCH_OPS[ZERO_BRANCH_OPS[op]], reg(operands[0]), 0, operands[1]
+            else:
+                condition, rs1, rs2, target = BRANCH_OPS[op], reg(operands[0]), reg(operands[1]), operands[2]
+            target = self.__target(target)
+            if op == "beqz":
+
+                def handler():
+                    return target if registers[rs1] == 0 else following
+            elif op == "bnez":
+
+                def handler():
+                    return following if registers[rs1] == 0 else target
+            else:
+
+                def handler():
+                    return target if condition(registers[rs1], registers[rs2]) else following
+            return handler
+        if op == "j" or op == "tail":
+            target = self.__target(operands[0])
+            return lambda: target
+        if op == "call" or op == "jal":
+            rd, target = (reg(operands[0]), operands[1]) if len(operands) == 2 else (1, operands[0])
+            target = self.__target(target)
+
+            def handler():
+                if rd:
+                    registers[rd] = following
+                return target
+            return handler
+        if op == "ret" or op == "jr":
+            rs1 = 1 if op == "ret" else reg(operands[0])
+            return lambda: registers[rs1]
+        if op == "nop":
+            return lambda: following
+        raise Exception(f"Unsupported instruction {op}.")
+
+    def __track_stack(self, handler: Handler) -> Handler:
+        registers, min_sp = self.registers, self.__min_sp
+
+        def tracked():
+            following = handler()
+            if registers[2] < min_sp[0]:
+                min_sp[0] = registers[2]
+            return following
+        return tracked
+
+    @staticmethod
+    def __register(name: str) -> int:
+        if name not in REGISTERS:
+            raise Exception(f"Unknown register {name}.")
+        return REGISTERS[name]
+
+    def __target(self, label: str) -> int:
+        if label not in self.__labels:
+            raise Exception(f"Undefined label {label}.")
+        return self.__labels[label]
@@ -1,56 +1,66 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+from .IR import Slot
 from .Type import MiniDecafType
 
 
 class Symbol:
+    __slots__ = ("name", "slot", "sym_type")
     sym_type: MiniDecafType
-    offset: int  # relative position
+    slot: Optional[Slot]  # frame slot holding the variable, None for globals
     name: str
 
-    def __init__(self, name: str, offset: int, sym_type: MiniDecafType):
+    def __init__(self, name: str, slot: Optional[Slot], sym_type: MiniDecafType):
         self.name = name
-        self.offset = offset
+        self.slot = slot
         self.sym_type = sym_type
 
     def __str__(self):
-        return f"{self.name}@{self.sym_type}:{self.offset}"
-
-
-class SymbolMap:
-    __symbol_map: Dict[str, Symbol]
-
-    def __init__(self):
-        self.__symbol_map = {}
-
-    def lookup(self, name):
-        return self.__symbol_map.get(name, None)
-
-    def add(self, symbol: Symbol):
-        self.__symbol_map[symbol.name] = symbol
+        return f"{self.name}@{self.sym_type}:{self.slot}"
 
 
 class SymbolTable:
-    __symbol_table: List[SymbolMap]
+    """
+    one dict from each name to the stack of its visible declarations, innermost last, each with the depth of its
+    scope, plus for each scope the names it declared, to undo on pop; lookups, additions and pops are all O(1)
+    per name, whatever the nesting; globals are the outermost scope, which is never popped
+    """
+    __symbols: Dict[str, List[Tuple[int, Symbol]]]
+    __scopes: List[List[str]]  # undo log of each scope
 
     def __init__(self):
-        self.__symbol_table = []
+        self.__symbols = {}
+        self.__scopes = [[]]
 
-    def lookup_all(self, name):
-        # lookup in inner block first
-        for symbol_map in reversed(self.__symbol_table):
-            if symbol_map.lookup(name) is not None:
-                return symbol_map.lookup(name)
-        return None
+    def lookup_all(self, name) -> Optional[Symbol]:  # innermost declaration
+        declarations = self.__symbols.get(name)
+        return declarations[-1][1] if declarations else None
 
-    def lookup_top(self, name):
-        return self.__symbol_table[-1].lookup(name)
+    def lookup_top(self, name) -> Optional[Symbol]:  # declaration in the current scope only
+        declarations = self.__symbols.get(name)
+        if declarations and declarations[-1][0] == len(self.__scopes) - 1:
+            return declarations[-1][1]
+        return None
 
-    def pop_scope(self):
-        self.__symbol_table.pop()
+    def pop_scope(self) -> List[Symbol]:  # the declarations of the scope
+        symbols = self.__symbols
+        popped = []
+        for name in self.__scopes.pop():
+            declarations = symbols[name]
+            popped.append(declarations.pop()[1])
+            if not declarations:
+                del symbols[name]
+        return popped
 
     def add_scope(self):
-        self.__symbol_table.append(SymbolMap())
+        self.__scopes.append([])
 
     def add_symbol(self, symbol: Symbol):
-        self.__symbol_table[-1].add(symbol)
+        # replaces a declaration of the same scope, as a global can be declared again
+        depth = len(self.__scopes) - 1
+        declarations = self.__symbols.setdefault(symbol.name, [])
+        if declarations and declarations[-1][0] == depth:
+            declarations[-1] = (depth, symbol)
+        else:
+            declarations.append((depth, symbol))
+            self.__scopes[-1].append(symbol.name)
@@ -0,0 +1,73 @@
+from typing import Dict, Optional
+
+from .IR import Function, BasicBlock, Instr, Slot
+from .constants import ARG_REGS
+
+
+def __tail_call(block: BasicBlock) -> Optional[Instr]:
+    # the call whose result the block returns right away, if any
+    if len(block.instrs) < 2:
+        return None
+    call, ret = block.instrs[-2:]
+    if call.op == "call" and ret.op == "ret" and ret.args == (call.dst,):
+        return call
+    return None
+
+
+def __takes_address(func: Function) -> bool:
+    # whether a pointer into the frame may be passed on, which must outlive the call; the front end takes the
+    # address of every local it reads or writes, unused unless the local is an array or its address is taken
+    used = {arg for block in func.blocks for instr in block.instrs for arg in instr.args}
+    return any(instr.op == "addr" and instr.dst in used for block in func.blocks for instr in block.instrs)
+
+
+def loop_self_tail_calls(func: Function):
+    """
+    turns the calls of a function to itself in tail position into loops, once its callees are inlined and before
+    the other optimizations: the arguments are stored to the slots of the parameters, and the call and return are
+    a jump back to the code following the parameters, so that the frame is set up once whatever the depth of the
+    recursion
+    """
+    if __takes_address(func):
+        return
+    tail_calls = []
+    for block in func.blocks:
+        call = __tail_call(block)
+        if call is not None and call.imm == func.name:
+            tail_calls.append(block)
+    if not tail_calls:
+        return
+    entry = func.blocks[0]
+    params = {instr.dst: instr.imm for instr in entry.instrs if instr.op == "param"}
+    param_slots: Dict[int, Slot] = {}  # parameter index: its slot
+    k = 0
+    while k < len(entry.instrs) and (entry.instrs[k].op == "param" or entry.instrs[k].op == "storeslot"
+                                     and entry.instrs[k].args[0] in params):
+        if entry.instrs[k].op == "storeslot":
+            param_slots[params[entry.instrs[k].args[0]]] = entry.instrs[k].imm
+        k += 1
+    if len(param_slots) != func.param_count:
+        return
+    header = BasicBlock(f".tailcall.{func.name}")
+    header.instrs = entry.instrs[k:]
+    entry.instrs[k:] = [Instr("j", labels=(header.label,))]
+    func.blocks.insert(1, header)
+    for block in tail_calls:
+        # the arguments are all computed before the first store
+        args = block.instrs[-2].args
+        block.instrs[-2:] = [Instr("storeslot", None, (arg,), param_slots[i]) for i, arg in enumerate(args)]
+        block.instrs.append(Instr("j", labels=(header.label,)))
+
+
+def mark_tail_calls(func: Function):
+    """
+    turns the other calls in tail position into tailcall, once optimized: the backend moves the arguments to
+    a0-a7, tears the frame down and jumps to the callee, which returns to the caller of this function
+    calls with arguments on the stack are kept, as well as calls of functions taking the address of a local
+    """
+    if __takes_address(func):
+        return
+    for block in func.blocks:
+        call = __tail_call(block)
+        if call is not None and len(call.args) <= len(ARG_REGS):
+            block.instrs[-2:] = [Instr("tailcall", None, call.args, call.imm)]
@@ -1,6 +1,6 @@
 import abc
 from enum import Enum
-from typing import List
+from typing import Dict, List, Tuple
 
 
 class ValueCategory(Enum):
@@ -9,14 +9,30 @@ class ValueCategory(Enum):
 
 
 class MiniDecafType(abc.ABC):
+    """
+    types are interned: constructors return the one object of each kind, pointer level or base type and length,
+    and value category, so that equality is an identity check; each type links to its rvalue and lvalue versions,
+    so that value category casts are attribute reads
+    """
+    __slots__ = ("name", "value_cat", "rvalue", "lvalue")
+    name: str
+    value_cat: ValueCategory
+    rvalue: "MiniDecafType"
+    lvalue: "MiniDecafType"
+
+    @classmethod
+    def _make(cls, name, value_cat: ValueCategory = ValueCategory.rvalue):
+        # the only place creating types, once for each key
+        instance = object.__new__(cls)
+        instance.name = name
+        instance.value_cat = value_cat
+        return instance
 
-    def __init__(self, name, value_cat: ValueCategory = ValueCategory.rvalue):
-        self.name = name
-        self.value_cat = value_cat
-
-    @abc.abstractmethod
     def __eq__(self, other):
-        pass
+        return self is other
+
+    def __hash__(self):
+        return id(self)
 
     @abc.abstractmethod
     def get_size(self):
@@ -36,6 +52,11 @@ class MiniDecafType(abc.ABC):
 
 
 class NoType(MiniDecafType):
+    __slots__ = ()
+
+    def __new__(cls):
+        return NO_TYPE
+
     def reference(self):
         raise Exception('Cannot reference NoType.')
 
@@ -48,27 +69,33 @@ class NoType(MiniDecafType):
     def get_size(self):
         raise Exception('Cannot get size of NoType.')
 
-    def __init__(self):
-        super().__init__("NoType")
-
-    def __eq__(self, other):
-        return isinstance(other, NoType)
-
 
 class PointerType(MiniDecafType):
-
-    def __init__(self, level, value_cat=ValueCategory.rvalue):
-        super().__init__(f"PointerType<{level}>", value_cat)
-        self.level = level  # level of pointers == num of *
-
-    def __eq__(self, other):
-        return isinstance(other, PointerType) and self.level == other.level
+    __slots__ = ("level",)
+    level: int  # level of pointers == num of *
+
+    def __new__(cls, level, value_cat=ValueCategory.rvalue):
+        versions = POINTER_TYPES.get(level)
+        if versions is None:
+            rvalue = cls._make(f"PointerType<{level}>")
+            lvalue = cls._make(f"PointerType<{level}>", ValueCategory.lvalue)
+            for version in rvalue, lvalue:
+                version.level = level
+                version.rvalue, version.lvalue = rvalue, lvalue
+            versions = POINTER_TYPES[level] = (rvalue, lvalue)
+        return versions[1] if value_cat is ValueCategory.lvalue else versions[0]
+
+    def __eq__(self, other):  # whatever the value category
+        return isinstance(other, PointerType) and self.rvalue is other.rvalue
+
+    def __hash__(self):
+        return id(self.rvalue)
 
     def get_size(self):
         return 4
 
     def reference(self):
-        if self.value_cat == ValueCategory.lvalue:
+        if self.value_cat is ValueCategory.lvalue:
             return PointerType(self.level + 1)
         raise Exception('Cannot reference rvalue pointer.')
 
@@ -76,15 +103,20 @@ class PointerType(MiniDecafType):
         if self.level > 1:
             return PointerType(self.level - 1, ValueCategory.lvalue)
         else:
-            return IntType(ValueCategory.lvalue)
+            return INT_LVALUE
 
     def value_category_cast(self, target_value_cat: ValueCategory):
-        return PointerType(self.level, target_value_cat)
+        return self.lvalue if target_value_cat is ValueCategory.lvalue else self.rvalue
 
 
 class IntType(MiniDecafType):
+    __slots__ = ()
+
+    def __new__(cls, value_cat=ValueCategory.rvalue):
+        return INT_LVALUE if value_cat is ValueCategory.lvalue else INT_RVALUE
+
     def reference(self):
-        if self.value_cat == ValueCategory.lvalue:
+        if self.value_cat is ValueCategory.lvalue:
             return PointerType(1)
         raise Exception('Cannot reference rvalue int.')
 
@@ -92,29 +124,26 @@ class IntType(MiniDecafType):
         raise Exception('Cannot dereference int.')
 
     def value_category_cast(self, target_value_cat: ValueCategory):
-        return IntType(target_value_cat)
+        return self.lvalue if target_value_cat is ValueCategory.lvalue else self.rvalue
 
     def get_size(self):
         return 4
 
-    def __init__(self, value_cat=ValueCategory.rvalue):
-        super().__init__("IntType", value_cat)
-
-    def __eq__(self, other):
-        return isinstance(other, IntType) and self.value_cat == other.value_cat
-
 
 class ArrayType(MiniDecafType):
+    __slots__ = ("size", "base_type")
     size: int
     base_type: MiniDecafType
 
-    def __init__(self, base_type, length):
-        super().__init__(f"ArrayType<{base_type}>({length})")
-        self.base_type = base_type
-        self.size = length * base_type.get_size()
-
-    def __eq__(self, other):
-        return isinstance(other, ArrayType) and self.size == other.get_size() and self.base_type == other.base_type
+    def __new__(cls, base_type, length):
+        key = (base_type, length)  # equal base types, whatever their category for pointers, give the same array
+        array = ARRAY_TYPES.get(key)
+        if array is None:
+            array = ARRAY_TYPES[key] = cls._make(f"ArrayType<{base_type}>({length})")
+            array.base_type = base_type
+            array.size = length * base_type.get_size()
+            array.rvalue = array.lvalue = array
+        return array
 
     def get_size(self):
         return self.size
@@ -126,12 +155,13 @@ class ArrayType(MiniDecafType):
         raise Exception("Cannot dereference array.")
 
     def value_category_cast(self, target_value_cat: ValueCategory):
-        if target_value_cat == ValueCategory.lvalue:
+        if target_value_cat is ValueCategory.lvalue:
             raise Exception("Cannot cast array to lvalue.")
         return self
 
 
 class FuncType:
+    __slots__ = ("ret_type", "para_types")
     para_types: List[MiniDecafType]
     ret_type: MiniDecafType
 
@@ -146,3 +176,14 @@ class FuncType:
         return (isinstance(other, FuncType) and
                 self.ret_type == other.ret_type and
                 self.para_types == other.para_types)
+
+
+# the interned types
+NO_TYPE = NoType._make("NoType")
+NO_TYPE.rvalue = NO_TYPE.lvalue = NO_TYPE
+INT_RVALUE = IntType._make("IntType")
+INT_LVALUE = IntType._make("IntType", ValueCategory.lvalue)
+INT_RVALUE.rvalue = INT_LVALUE.rvalue = INT_RVALUE
+INT_RVALUE.lvalue = INT_LVALUE.lvalue = INT_LVALUE
+POINTER_TYPES: Dict[int, Tuple[PointerType, PointerType]] = {}  # level: rvalue and lvalue
+ARRAY_TYPES: Dict[Tuple[MiniDecafType, int], ArrayType] = {}
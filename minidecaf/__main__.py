@@ -1,5 +1,12 @@
 """minidecaf 是个包所以使用相对 import，注意下面 main 之前的句点。"""
-from .main import main
+import sys
+
+if "--connect" in sys.argv:  # thin client, does not load the parser at all
+    from .client import main
+elif "--serve" in sys.argv:
+    from .server import main
+else:
+    from .main import main
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,105 @@
+"""batch mode: compile many files with a pool of warmed up worker processes
+
+python -m minidecaf.batch [-j N] [--output-dir DIR] INPUT...
+an INPUT is a .c file (compiled to the same path with .s), a pair in.c:out.s, or a directory searched for .c files
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .main import Frontend, add_compile_options, compile_file, get_frontend, print_cache_stats
+
+Job = Tuple[str, str]  # input and output path
+Result = Tuple[str, Optional[str], float]  # input path, error message or None, seconds
+
+__frontends: Dict[str, Frontend] = {}  # of this worker
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m minidecaf.batch")
+    parser.add_argument("inputs", type=str, nargs='+', metavar="INPUT")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes, defaults to the number of cores")
+    parser.add_argument("--output-dir", type=str,
+                        help="write outputs here, mirroring the paths of the inputs, instead of next to them")
+    add_compile_options(parser)
+    return parser.parse_args()
+
+
+def collect_jobs(inputs: List[str], output_dir: Optional[str]) -> List[Job]:
+    jobs: List[Job] = []
+
+    def add(path: str, root: str):
+        output = os.path.splitext(path)[0] + ".s"
+        if output_dir is not None:
+            output = os.path.join(output_dir, os.path.relpath(output, root))
+        jobs.append((path, output))
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for directory, _, files in sorted(os.walk(item)):
+                for name in sorted(files):
+                    if name.endswith(".c"):
+                        add(os.path.join(directory, name), item)
+        elif ':' in item:
+            jobs.append(tuple(item.split(':', 1)))
+        else:
+            add(item, os.path.dirname(item))
+    return jobs
+
+
+def init_worker(frontend: str):
+    get_frontend(frontend, __frontends)
+
+
+def compile_job(job: Job, args: argparse.Namespace) -> Result:
+    source, output = job
+    start = time.perf_counter()
+    try:
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        compile_file(args, source, output, __frontends)
+    except Exception as e:
+        return source, str(e) or type(e).__name__, time.perf_counter() - start
+    return source, None, time.perf_counter() - start
+
+
+def run(jobs: List[Job], args: argparse.Namespace):
+    # yields results in the order of the jobs
+    if args.jobs <= 1 or len(jobs) <= 1:  # a pool would only add start up and pickling
+        init_worker(args.frontend)
+        for job in jobs:
+            yield compile_job(job, args)
+        return
+    # jobs are handed out in chunks to save round trips, but small enough to balance the load
+    chunk_size = max(1, len(jobs) // (args.jobs * 8))
+    with ProcessPoolExecutor(args.jobs, initializer=init_worker, initargs=(args.frontend,)) as executor:
+        yield from executor.map(compile_job, jobs, [args] * len(jobs), chunksize=chunk_size)
+
+
+def main():
+    args = parse_args()
+    jobs = collect_jobs(args.inputs, args.output_dir)
+    start = time.perf_counter()
+    failed = 0
+    compile_time = 0.0
+    for source, error, seconds in run(jobs, args):
+        compile_time += seconds
+        if error is None:
+            print(f"ok   {seconds:8.3f}s  {source}")
+        else:
+            failed += 1
+            print(f"FAIL {seconds:8.3f}s  {source}: {error}")
+    print(f"{len(jobs)} files, {len(jobs) - failed} ok, {failed} failed, "
+          f"{time.perf_counter() - start:.2f}s wall, {compile_time:.2f}s compiling, {args.jobs} jobs")
+    if args.cache_stats:
+        print_cache_stats(args)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""check of the generated code: the programs of a corpus are run in the built-in simulator
+
+python -m minidecaf.check [--frontend antlr|fast]... [--inline-budget N]... CORPUS
+every .c file under CORPUS/valid is compiled with each front end and inline budget, both front ends at the default
+budget and with inlining disabled by default, and run; its exit status must be the one recorded in
+CORPUS/expected.json, that of the program compiled by gcc, and its stack must stay within max_stack_depth bytes
+when one is recorded; a file without a recorded exit status fails too
+make check checks the corpus directory
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from .Inliner import INLINE_BUDGET
+from .Simulator import Simulator
+from .differential import collect_sources
+from .main import Frontend, get_frontend, new_visitor, parse_args as parse_compile_args
+
+MAX_INSTRUCTIONS = 10 ** 7
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m minidecaf.check")
+    parser.add_argument("corpus", type=str, metavar="CORPUS")
+    parser.add_argument("--frontend", choices=["antlr", "fast"], action="append",
+                        help="front ends compiling the programs, both by default")
+    parser.add_argument("--inline-budget", type=int, action="append", metavar="N",
+                        help=f"inline budgets compiling the programs, {INLINE_BUDGET} and 0 by default")
+    return parser.parse_args()
+
+
+def run(frontend: Frontend, source: str, inline_budget: int, expected: dict) -> Optional[str]:
+    # what is wrong, or None
+    args = parse_compile_args([source, "--inline-budget", str(inline_budget)])
+    try:
+        visitor = new_visitor(args)
+        visitor.visit(frontend.parse(source))
+        simulator = Simulator("".join(visitor.emitter))
+        exit_code = simulator.run(MAX_INSTRUCTIONS)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    if exit_code != expected["exit_code"]:
+        return f"exit status {exit_code}, expected {expected['exit_code']}"
+    if simulator.max_stack_depth > expected.get("max_stack_depth", simulator.max_stack_depth):
+        return f"stack depth {simulator.max_stack_depth} bytes, expected at most {expected['max_stack_depth']}"
+    return None
+
+
+def main():
+    options = parse_args()
+    with open(os.path.join(options.corpus, "expected.json")) as file:
+        expected_results: Dict[str, dict] = json.load(file)
+    frontends: Dict[str, Frontend] = {}
+    names: List[str] = options.frontend or ["antlr", "fast"]
+    budgets: List[int] = options.inline_budget or [INLINE_BUDGET, 0]
+    sources = collect_sources([os.path.join(options.corpus, "valid")])
+    failures = 0
+    for source in sources:
+        expected = expected_results.get(os.path.relpath(source, options.corpus).replace(os.sep, "/"))
+        if expected is None:
+            failures += 1
+            print(f"FAIL {source}: no expected exit status in expected.json")
+            continue
+        errors = [f"{name} --inline-budget={budget}: {error}" for name in names for budget in budgets
+                  for error in [run(get_frontend(name, frontends), source, budget, expected)] if error is not None]
+        if errors:
+            failures += 1
+            print(f"FAIL {source}: " + "; ".join(errors))
+        else:
+            print(f"ok {source}: {expected['exit_code']}")
+    print(f"{len(sources)} files, {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
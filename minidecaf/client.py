@@ -0,0 +1,50 @@
+"""thin client of the compile server, kept free of antlr4 and the generated parser so that it starts fast
+
+python -m minidecaf --connect [--socket PATH] ARGS...
+ARGS are the same as for python -m minidecaf; relative paths are resolved in the directory of the client.
+Without a running server, the file is compiled in this process instead.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import List, Tuple
+
+
+def default_socket_path() -> str:
+    return os.environ.get("MINIDECAF_SOCKET", f"/tmp/minidecaf-{os.getuid()}.sock")
+
+
+def split_args(argv: List[str]) -> Tuple[str, List[str]]:
+    # socket path and the arguments left for the compiler, without --connect, --serve and --socket
+    path = default_socket_path()
+    rest = []
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--socket" and i + 1 < len(argv):
+            path = argv[i + 1]
+            i += 1
+        elif argv[i].startswith("--socket="):
+            path = argv[i][len("--socket="):]
+        elif argv[i] not in ("--connect", "--serve"):
+            rest.append(argv[i])
+        i += 1
+    return path, rest
+
+
+def main():
+    path, argv = split_args(sys.argv[1:])
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall((json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n").encode())
+            with sock.makefile("rb") as reply_file:
+                reply = json.loads(reply_file.read())
+    except (FileNotFoundError, ConnectionRefusedError):
+        from .main import main as compile_main
+        compile_main(argv)
+        return
+    sys.stdout.write(reply["stdout"])
+    sys.stderr.write(reply["stderr"])
+    sys.exit(reply["status"])
@@ -1,25 +1,32 @@
-# dictionary of operators to assembly string
-# ignore the starting '\t' and trailing '\n'
+# dictionary of operators to IR opcodes
 
-UNOPR2ASM = {
-    '-': "neg t0, t0",
-    '!': "seqz t0, t0",
-    '~': "not t0, t0",
+UNOPR2IR = {
+    '-': "neg",
+    '!': "seqz",
+    '~': "not",
+}
 
+BIOPR2IR = {
+    '+': "add",
+    '-': "sub",
+    '*': "mul",
+    '/': "div",
+    '%': "rem",
+    '<': "slt",
+    '>': "sgt",
 }
 
-BIOPR2ASM = {
-    '+': "add t0, t0, t1",
-    '-': "sub t0, t0, t1",
-    '*': "mul t0, t0, t1",
-    '/': "div t0, t0, t1",
-    '%': "rem t0, t0, t1",
-    '==': "seqz t0, t0",
-    '!=': "snez t0, t0",
-    '<': "slt t0, t0, t1",
-    '>': "sgt t0, t0, t1",
-    '<=': "sgt t0, t0, t1\n"  # not >
-          "\txori t0, t0, 1",
-    '>=': "slt t0, t0, t1\n"
-          "\txori t0, t0, 1"
+# comparison operators to compare and branch IR opcodes, and whether the operands are swapped
+COMPARE_BRANCHES = {
+    '==': ("beq", False),
+    '!=': ("bne", False),
+    '<': ("blt", False),
+    '>': ("blt", True),
+    '<=': ("bge", True),
+    '>=': ("bge", False),
 }
+
+# registers for the allocator, t0-t2 are kept by the backend as scratch registers for spilled values and large offsets
+ARG_REGS = [f"a{i}" for i in range(8)]
+CALLER_SAVED_REGS = ["t3", "t4", "t5", "t6"] + ARG_REGS
+CALLEE_SAVED_REGS = [f"s{i}" for i in range(1, 12)]
@@ -0,0 +1,169 @@
+"""cross-check of the bitset dataflow solver against a naive set-based fixpoint
+
+python -m minidecaf.dataflow_check [--frontend antlr|fast] [--inline-budget N] PATH...
+a PATH is a .c file or a directory searched for .c files; the IR of each function, as optimized before code
+generation, is analyzed by liveness, slot_liveness, reaching_definitions and available_expressions, and by a naive
+version of each, which iterates over every block with Python sets until nothing changes, applying each instruction
+in turn instead of gen and kill sets; the facts at the beginning and at the end of each block must be the same
+make check runs it on the corpus
+"""
+
+import argparse
+import sys
+from typing import Callable, Dict, List, Set, Tuple
+
+from .Backend import IRPrinter
+from .CFG import CFG
+from .Dataflow import available_expressions, bits, liveness, reaching_definitions, slot_liveness
+from .IR import Function, BINARY_OPS, UNARY_OPS, IMMEDIATE_OPS
+from .Inliner import INLINE_BUDGET
+from .differential import collect_sources
+from .main import Frontend, get_frontend, new_visitor, parse_args as parse_compile_args
+
+Facts = Tuple[List[Set], List[Set]]  # at the beginning and at the end of each block
+
+
+class IRCollector(IRPrinter):
+    """keeps the IR of each function handed to the backend"""
+    functions: List[Function]
+
+    def __init__(self, emitter):
+        super().__init__(emitter)
+        self.functions = []
+
+    def function_text(self, func: Function) -> str:
+        self.functions.append(func)
+        return super().function_text(func)
+
+
+def naive_fixpoint(func: Function, transfer: Callable[[int, Set], Set], forward: bool, initial: Set,
+                   universe: Set = None) -> Facts:
+    # meet by union, or by intersection when there is a universe, of the neighbours' facts, empty without neighbours
+    index = {block.label: i for i, block in enumerate(func.blocks)}
+    successors = [[index[label] for label in block.successors()] for block in func.blocks]
+    predecessors = [[i for i in range(len(func.blocks)) if k in successors[i]] for k in range(len(func.blocks))]
+    sources = predecessors if forward else successors
+    before = [set(initial) for _ in func.blocks]
+    after = [set(initial) for _ in func.blocks]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(func.blocks)):
+            facts = [after[source] for source in sources[i]]
+            if not facts:
+                meet = set()
+            elif universe is not None:
+                meet = set.intersection(*facts)
+            else:
+                meet = set.union(*facts)
+            result = transfer(i, set(meet))
+            if meet != before[i] or result != after[i]:
+                before[i], after[i] = meet, result
+                changed = True
+    return (before, after) if forward else (after, before)
+
+
+def naive_liveness(func: Function) -> Facts:
+    def transfer(i: int, live: Set) -> Set:
+        for instr in reversed(func.blocks[i].instrs):
+            live.discard(instr.dst)
+            live.update(instr.args)
+        return live
+    return naive_fixpoint(func, transfer, forward=False, initial=set())
+
+
+def naive_slot_liveness(func: Function, slots: Set[int]) -> Facts:
+    def transfer(i: int, live: Set) -> Set:
+        for instr in reversed(func.blocks[i].instrs):
+            if instr.op == "storeslot" and instr.imm.index in slots:
+                live.discard(instr.imm.index)
+            elif instr.op == "loadslot" and instr.imm.index in slots:
+                live.add(instr.imm.index)
+        return live
+    return naive_fixpoint(func, transfer, forward=False, initial=set())
+
+
+def naive_reaching_definitions(func: Function) -> Facts:
+    # definitions as (block index, instruction index), grouped by register while propagated
+    def transfer(i: int, reaching: Set) -> Set:
+        by_reg: Dict[int, Set] = {}
+        for b, k in reaching:
+            by_reg.setdefault(func.blocks[b].instrs[k].dst, set()).add((b, k))
+        for k, instr in enumerate(func.blocks[i].instrs):
+            if instr.dst is not None:
+                by_reg[instr.dst] = {(i, k)}
+        return set().union(*by_reg.values())
+    return naive_fixpoint(func, transfer, forward=True, initial=set())
+
+
+def naive_available_expressions(func: Function) -> Facts:
+    # expressions as (op, args, imm)
+    expression_ops = BINARY_OPS | UNARY_OPS | IMMEDIATE_OPS
+    universe = {(instr.op, instr.args, instr.imm) for block in func.blocks for instr in block.instrs
+                if instr.op in expression_ops}
+    readers: Dict[int, Set] = {}  # register: expressions reading it
+    for expression in universe:
+        for arg in expression[1]:
+            readers.setdefault(arg, set()).add(expression)
+
+    def transfer(i: int, available: Set) -> Set:
+        for instr in func.blocks[i].instrs:
+            if instr.op in expression_ops:
+                available.add((instr.op, instr.args, instr.imm))
+            if instr.dst is not None:
+                available -= readers.get(instr.dst, set())
+        return available
+    return naive_fixpoint(func, transfer, forward=True, initial=universe, universe=universe)
+
+
+def as_sets(facts: Tuple[List[int], List[int]], items: List = None) -> Facts:
+    # bitsets of the solver as sets of items, or of bit numbers without items
+    return tuple([{k if items is None else items[k] for k in bits(mask)} for mask in masks]
+                 for masks in facts)
+
+
+def check_function(func: Function) -> List[str]:
+    # names of the analyses disagreeing with their naive version
+    cfg = CFG(func)
+    slots = {slot.index for slot in func.slots}
+    definitions, *reaching = reaching_definitions(cfg)
+    expressions, *available = available_expressions(cfg)
+    results = {
+        "liveness": (as_sets(liveness(cfg)), naive_liveness(func)),
+        "slot_liveness": (as_sets(slot_liveness(cfg, slots)), naive_slot_liveness(func, slots)),
+        "reaching_definitions": (as_sets(reaching, definitions), naive_reaching_definitions(func)),
+        "available_expressions": (as_sets(available, expressions), naive_available_expressions(func)),
+    }
+    return [name for name, (solved, naive) in results.items() if tuple(solved) != tuple(naive)]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m minidecaf.dataflow_check")
+    parser.add_argument("paths", type=str, nargs='+', metavar="PATH")
+    parser.add_argument("--frontend", choices=["antlr", "fast"], default="fast")
+    parser.add_argument("--inline-budget", type=int, default=INLINE_BUDGET, metavar="N")
+    options = parser.parse_args()
+    frontends: Dict[str, Frontend] = {}
+    frontend = get_frontend(options.frontend, frontends)
+    functions = 0
+    failures = 0
+    for source in collect_sources(options.paths):
+        visitor = new_visitor(parse_compile_args([source, "--inline-budget", str(options.inline_budget)]))
+        collector = visitor.backend = IRCollector(visitor.emitter)
+        visitor.visit(frontend.parse(source))
+        file_failures = 0
+        for func in collector.functions:
+            wrong = check_function(func)
+            if wrong:
+                file_failures += 1
+                print(f"DIFF {source} {func.name}: {', '.join(wrong)}")
+        if not file_failures:
+            print(f"same {source}: {len(collector.functions)} functions")
+        functions += len(collector.functions)
+        failures += file_failures
+    print(f"{functions} functions, {failures} disagreeing with the naive fixpoint")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""differential check of the fast front end against the ANTLR one
+
+python -m minidecaf.differential [--emit-ir] PATH...
+a PATH is a .c file or a directory searched for .c files; each file is compiled with both front ends, and the
+outputs must be identical, or both compilations must fail; files under a directory named invalid must be rejected,
+the others compiled, so that both front ends agreeing on a wrong answer fails too
+make differential checks the corpus directory, which uses every rule of MiniDecaf.g4
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from .main import Frontend, get_frontend, new_visitor, parse_args as parse_compile_args
+
+
+def collect_sources(paths: List[str]) -> List[str]:
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                sources.extend(os.path.join(directory, name) for name in sorted(files) if name.endswith(".c"))
+        else:
+            sources.append(path)
+    return sources
+
+
+def compile_with(frontend: Frontend, source: str, args: argparse.Namespace) -> Tuple[Optional[str], Optional[str]]:
+    # output, or None and the error
+    try:
+        visitor = new_visitor(args)
+        visitor.visit(frontend.parse(source))
+        return "".join(visitor.emitter), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m minidecaf.differential")
+    parser.add_argument("paths", type=str, nargs='+', metavar="PATH")
+    parser.add_argument("--emit-ir", action="store_true", help="compare the IR instead of the assembly")
+    options = parser.parse_args()
+    frontends: Dict[str, Frontend] = {}
+    mismatches = 0
+    wrong = 0
+    sources = collect_sources(options.paths)
+    for source in sources:
+        args = parse_compile_args([source] + (["--emit-ir"] if options.emit_ir else []))
+        expected, expected_error = compile_with(get_frontend("antlr", frontends), source, args)
+        actual, actual_error = compile_with(get_frontend("fast", frontends), source, args)
+        must_reject = "invalid" in os.path.normpath(source).split(os.sep)
+        if expected != actual:
+            mismatches += 1
+            print(f"DIFF {source}: antlr {expected_error or 'compiled'}, fast {actual_error or 'compiled'}")
+        elif (expected is None) != must_reject:
+            wrong += 1
+            print(f"WRONG {source}: both " + ("compiled, it should be rejected" if must_reject
+                                              else f"rejected it, antlr {expected_error}, fast {actual_error}"))
+        else:
+            print(f"same {source}" + (" (both rejected)" if expected is None else ""))
+    print(f"{len(sources)} files, {mismatches} mismatches, {wrong} wrongly accepted or rejected")
+    sys.exit(1 if mismatches or wrong else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,208 @@
 """实例：真·main"""
 
-import argparse
+from __future__ import annotations
 
-import antlr4
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Optional, Union, TYPE_CHECKING
 
+from .Ast import Program
+from .Cache import CompileCache
+from .Inliner import INLINE_BUDGET
 from .MainVisitor import MainVisitor
-from .generated.MiniDecafLexer import MiniDecafLexer
-from .generated.MiniDecafParser import MiniDecafParser
+from .Peephole import Peephole
+from .Profiler import Profiler, NO_PROFILER
+
+if TYPE_CHECKING:
+    from .AntlrFrontend import AntlrFrontend
+    from .FastFrontend import FastFrontend
+    from .generated.MiniDecafParser import MiniDecafParser
+
+Frontend = Union["AntlrFrontend", "FastFrontend"]
+
+STREAM_BUFFER_SIZE = 1 << 16
 
 
-def parse_args():
-    parser = argparse.ArgumentParser()
+def add_compile_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--stream", action="store_true",
+                        help="write each function as soon as it is compiled instead of holding the whole program")
+    parser.add_argument("--emit-ir", action="store_true", help="print the intermediate representation instead of assembly")
+    parser.add_argument("--no-peephole", type=str, default="", metavar="PATTERNS",
+                        help="comma separated peephole patterns to disable, or all")
+    parser.add_argument("--inline-budget", type=int, default=INLINE_BUDGET, metavar="N",
+                        help="size limit in IR instructions of the functions inlined into callers, 0 to disable")
+    parser.add_argument("--frontend", choices=["antlr", "fast"], default="antlr",
+                        help="antlr (the reference) or fast, a hand-written lexer and parser without antlr4")
+    parser.add_argument("--ll-only", action="store_true",
+                        help="parse with full LL prediction only, instead of trying SLL first")
+    parser.add_argument("--cache", type=str, default=os.environ.get("MINIDECAF_CACHE"), metavar="DIR",
+                        help="reuse outputs of identical compilations stored in DIR, defaults to $MINIDECAF_CACHE")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MB", help="size limit of the cache")
+    parser.add_argument("--cache-stats", action="store_true", help="print the hits, misses and size of the cache")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m minidecaf",
+        epilog="--serve [--socket PATH] runs a compile server keeping the parser warm, "
+               "--connect [--socket PATH] sends the compilation to it")
     parser.add_argument("input", type=str)
     parser.add_argument("output", type=str, nargs='?')
-    return parser.parse_args()
-
-
-def main():
-    args: argparse.Namespace = parse_args()
-    input_stream: antlr4.FileStream = antlr4.FileStream(args.input)
-    token_stream: antlr4.CommonTokenStream = antlr4.CommonTokenStream(MiniDecafLexer(input_stream))
-    parser: MiniDecafParser = MiniDecafParser(token_stream)
-    parser._errHandler = antlr4.BailErrorStrategy()
-    tree: MiniDecafParser.ProgramContext = parser.program()
-    visitor: MainVisitor = MainVisitor()
-    visitor.visit(tree)
-    if args.output is not None:
-        with open(args.output, mode='w') as file:
-            file.write(visitor.asm_str)
+    add_compile_options(parser)
+    parser.add_argument("--peephole-stats", action="store_true", help="print the hits of each peephole pattern to stderr")
+    parser.add_argument("--parse-stats", action="store_true",
+                        help="print how often parsing fell back from SLL to LL prediction and the time spent in each")
+    parser.add_argument("--time-report", action="store_true",
+                        help="print the time, CPU time and peak memory of each phase and of each visit method as JSON "
+                             "to stderr")
+    parser.add_argument("--time-report-file", type=str, metavar="FILE", help="write the time report to FILE instead")
+    return parser.parse_args(argv)
+
+
+def get_frontend(name: str, frontends: Dict[str, Frontend]) -> Frontend:
+    # front ends are created on first use and kept, and imported only then, so that the fast one never loads antlr4
+    if name not in frontends:
+        if name == "fast":
+            from .FastFrontend import FastFrontend
+            frontends[name] = FastFrontend()
+        else:
+            from .AntlrFrontend import AntlrFrontend
+            frontends[name] = AntlrFrontend()
+    return frontends[name]
+
+
+def main(argv=None, frontends: Optional[Dict[str, Frontend]] = None):
+    args: argparse.Namespace = parse_args(argv)
+    frontends = {} if frontends is None else frontends
+    report = args.time_report or args.time_report_file is not None
+    if args.time_report_file is not None and os.path.realpath(args.time_report_file) in \
+            {os.path.realpath(path) for path in (args.input, args.output) if path is not None}:
+        raise Exception(f"The time report would overwrite {args.time_report_file}.")
+    with Profiler() if report else NO_PROFILER as profiler:
+        visitor = compile_file(args, args.input, args.output, frontends, profiler)
+        if report:
+            write_time_report(args, profiler, visitor is None)
+    if args.peephole_stats and visitor is not None and not args.emit_ir:
+        for name, hits in visitor.backend.peephole.hits.items():
+            print(f"{name}: {hits}", file=sys.stderr)
+    if args.cache_stats:
+        print_cache_stats(args)
+    if args.parse_stats:
+        get_frontend(args.frontend, frontends).print_stats()
+
+
+def compile_file(args: argparse.Namespace, source: str, output, frontends: Dict[str, Frontend],
+                 profiler=NO_PROFILER) -> Optional[MainVisitor]:
+    # through the cache if there is one, returns None when the output comes from the cache
+    cache = open_cache(args)
+    if cache is None:
+        return compile_tree(parse(args, source, frontends, profiler), args, output, profiler)
+    new_peephole(args)  # unknown pattern names fail before the lookup, which would count a miss
+    with profiler.phase("cache"):
+        with open(source, mode='rb') as file:
+            key = cache.key(file.read(), cache_options(args))
+        asm_str = cache.get(key)
+    if asm_str is not None:
+        with profiler.phase("write"):
+            write_output(asm_str, output)
+        return None
+    visitor = compile_tree(parse(args, source, frontends, profiler), args, output, profiler)
+    if not args.stream:
+        cache.put(key, "".join(visitor.emitter))
+    elif output is not None:  # what was streamed to stdout is gone
+        with open(output) as file:
+            cache.put(key, file.read())
+    return visitor
+
+
+def parse(args: argparse.Namespace, source: str, frontends: Dict[str, Frontend], profiler=NO_PROFILER) \
+        -> Union[MiniDecafParser.ProgramContext, Program]:
+    # the front end is only created here, so that a cache hit never imports antlr4 nor builds a parser
+    with profiler.phase("load"):  # imports the front end on first use
+        frontend = get_frontend(args.frontend, frontends)
+    return frontend.parse(source, not args.ll_only, profiler)
+
+
+def open_cache(args: argparse.Namespace) -> Optional[CompileCache]:
+    return CompileCache(args.cache, args.cache_size << 20) if args.cache else None
+
+
+def cache_options(args: argparse.Namespace) -> str:  # options changing the output, both front ends giving the same
+    return f"emit_ir={args.emit_ir} no_peephole={','.join(sorted(set(args.no_peephole.split(','))))}" \
+           f" inline_budget={args.inline_budget}"
+
+
+def print_cache_stats(args: argparse.Namespace):
+    cache = open_cache(args)
+    if cache is None:
+        print("cache: not enabled, see --cache", file=sys.stderr)
+        return
+    stats = cache.stats()
+    print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries, "
+          f"{stats['bytes']} bytes, {stats['evictions']} evictions", file=sys.stderr)
+
+
+def write_time_report(args: argparse.Namespace, profiler: Profiler, cached: bool):
+    report = {"input": args.input, "frontend": args.frontend, "cached": cached}
+    report.update(profiler.report())
+    if args.time_report_file is None:
+        print(json.dumps(report, indent=2), file=sys.stderr)
     else:
-        print(visitor.asm_str)
+        with open(args.time_report_file, mode='w') as file:
+            json.dump(report, file, indent=2)
+
+
+def compile_tree(tree: Union[MiniDecafParser.ProgramContext, Program], args: argparse.Namespace, output,
+                 profiler=NO_PROFILER) -> MainVisitor:
+    if args.stream:
+        return stream_compile(tree, args, output, profiler)
+    visitor = new_visitor(args, profiler=profiler)
+    with profiler.phase("visit"):
+        visitor.visit(tree)
+    with profiler.phase("write"):
+        write_output("".join(visitor.emitter), output)
+    return visitor
+
+
+def write_output(asm_str: str, output):
+    if output is not None:
+        with open(output, mode='w') as file:
+            file.write(asm_str)
+    else:
+        print(asm_str)
+
+
+def new_peephole(args: argparse.Namespace) -> Peephole:  # raises on unknown --no-peephole names
+    return Peephole(name for name in args.no_peephole.split(",") if name)
+
+
+def new_visitor(args: argparse.Namespace, sink=None, profiler=NO_PROFILER) -> MainVisitor:
+    visitor = MainVisitor(sink, args.emit_ir, new_peephole(args), profiler, args.inline_budget)
+    if profiler.enabled:
+        profiler.instrument(visitor)
+    return visitor
+
+
+def stream_compile(tree: Union[MiniDecafParser.ProgramContext, Program], args: argparse.Namespace, output,
+                   profiler=NO_PROFILER) -> MainVisitor:
+    # writing is part of the visit phase here, as functions are written as they are compiled
+    if output is None:
+        visitor: MainVisitor = new_visitor(args, sys.stdout, profiler)
+        with profiler.phase("visit"):
+            visitor.visit(tree)
+            visitor.emitter.flush()
+        return visitor
+    with open(output, mode='w', buffering=STREAM_BUFFER_SIZE) as file:
+        try:
+            visitor: MainVisitor = new_visitor(args, file, profiler)
+            with profiler.phase("visit"):
+                visitor.visit(tree)
+                visitor.emitter.flush()  # globals
+        except Exception:
+            # do not leave half a program behind, same as the non-streaming mode
+            file.close()
+            os.remove(output)
+            raise
+    return visitor
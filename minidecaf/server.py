@@ -0,0 +1,73 @@
+"""compile server: one process keeping antlr4, the generated parser and its prediction caches warm
+
+python -m minidecaf --serve [--socket PATH]
+requests are served one at a time, each with a fresh MainVisitor; see client.py for the protocol
+"""
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from typing import Dict
+
+from .client import split_args
+from .main import Frontend, get_frontend, main as compile_main
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+    server: "CompileServer"
+
+    def handle(self):
+        # request: {"argv": [...], "cwd": ...}, reply: {"stdout": ..., "stderr": ..., "status": ...}
+        line = self.rfile.readline()
+        if not line:  # a connection only checking whether the server is up
+            return
+        request = json.loads(line)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = 0
+        cwd = os.getcwd()
+        try:
+            os.chdir(request["cwd"])
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                compile_main(request["argv"], self.server.frontends)
+        except SystemExit as e:  # bad arguments or --help
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc(file=stderr)
+            status = 1
+        finally:
+            os.chdir(cwd)
+        reply = {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "status": status}
+        self.wfile.write(json.dumps(reply).encode())
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    frontends: Dict[str, Frontend]  # shared by all requests, only the parse trees and visitors are per request
+
+    def __init__(self, path: str):
+        super().__init__(path, CompileHandler)
+        self.frontends = {}
+        get_frontend("antlr", self.frontends)  # the default one is loaded up front
+
+
+def main():
+    path, _ = split_args(sys.argv[1:])
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(path) == 0:
+                raise Exception(f"A server is already listening on {path}.")
+        os.remove(path)  # left by a server that did not shut down cleanly
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # shut down cleanly, removing the socket
+    with CompileServer(path) as server:
+        print(f"minidecaf server listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
@@ -0,0 +1,41 @@
+"""run the assembly of a compiled program with the built-in RV32IM simulator, without a cross toolchain
+
+python -m minidecaf.simulate [--stats] [--max-instructions N] FILE.s
+the exit status is the one of the program; --stats prints the executed instructions, loads, stores and the maximum
+stack depth as JSON to stderr
+"""
+
+import argparse
+import json
+import sys
+
+from .Simulator import Simulator
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m minidecaf.simulate")
+    parser.add_argument("input", type=str)
+    parser.add_argument("--stats", action="store_true", help="print the execution counts as JSON to stderr")
+    parser.add_argument("--max-instructions", type=int, default=10 ** 9,
+                        help="stop with an error after this many instructions")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.input) as file:
+        simulator = Simulator(file.read())
+    exit_code = simulator.run(args.max_instructions)
+    if args.stats:
+        print(json.dumps({
+            "exit_code": exit_code,
+            "instructions": simulator.instructions,
+            "loads": simulator.loads,
+            "stores": simulator.stores,
+            "max_stack_depth": simulator.max_stack_depth,
+        }), file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()